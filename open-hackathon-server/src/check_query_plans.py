@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+from hackathon.database import engine
+from hackathon.database.query_plans import find_full_scans
+
+
+def check_query_plans():
+    """Fail if any hot query shape is executed as a full table scan on the MySQL db
+
+    Run it after migrate_db.py. Full scans are printed and the exit code is 1.
+    """
+    if engine.dialect.name != "mysql":
+        print "query plans are checked on MySQL only, skip %s" % engine.dialect.name
+        return 0
+
+    full_scans = find_full_scans(engine)
+    for table_name, columns in full_scans:
+        print "full scan of %s by %s" % (table_name, ", ".join(columns))
+    return 1 if full_scans else 0
+
+
+sys.exit(check_query_plans())
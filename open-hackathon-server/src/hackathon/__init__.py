@@ -33,7 +33,7 @@ from flask_cors import CORS
 from datetime import timedelta
 
 from util import safe_get_config, get_class, Utility
-from hackathon_factory import factory, RequiredFeature
+from hackathon_factory import factory, RequiredFeature, Scope
 from hackathon_scheduler import HackathonScheduler
 from hackathon_response import *
 from log import log
@@ -45,6 +45,7 @@ __all__ = [
     "app",
     "Context",
     "RequiredFeature",
+    "Scope",
     "Component",
 ]
 
@@ -96,7 +97,8 @@ class HackathonApi(Api):
 api = HackathonApi(app)
 
 # Enable CORS support. Currently requests of all methods from all domains are allowed
-app.config['CORS_HEADERS'] = 'Content-Type, token, hackathon_name'
+app.config['CORS_HEADERS'] = 'Content-Type, token, hackathon_name, If-None-Match'
+app.config['CORS_EXPOSE_HEADERS'] = 'ETag'
 cors = CORS(app)
 
 # initialize hackathon scheduler
@@ -121,6 +123,16 @@ def exception_handler(error):
     return internal_server_error(error.message)
 
 
+@app.teardown_appcontext
+def remove_db_session(exception=None):
+    """Remove the DB session of current thread at the end of request
+
+    Read-only queries don't commit, so the transaction they opened must be closed here. Otherwise the thread will keep
+    reading from a stale snapshot in the next request.
+    """
+    factory["db"].remove()
+
+
 class Component(object):
     """Base class of business object
 
@@ -142,6 +154,11 @@ def init_components():
     from hackathon.template.template_mgr import TemplateManager
     from hackathon.remote.guacamole import GuacamoleInfo
     from hackathon.expr.expr_mgr import ExprManager
+    from hackathon.expr.expr_recycler import ExprRecycler
+    from hackathon.expr.heart_beat_buffer import HeartBeatBuffer
+    from hackathon.expr.expr_pre_allocator import ExprPreAllocator
+    from hackathon.expr.expr_starter import ExprStarter
+    from hackathon.expr.expr_status_watcher import ExprStatusWatcher
     from hackathon.cache.cache_mgr import CacheManagerExt
     from hackathon.azureformation.azure_adapter import AzureAdapter
     from hackathon.azureformation.azure_subscription_service import SubscriptionService
@@ -167,6 +184,11 @@ def init_components():
     factory.provide("docker_host_manager", DockerHostManager)
     factory.provide("template_manager", TemplateManager)
     factory.provide("expr_manager", ExprManager)
+    factory.provide("expr_recycler", ExprRecycler)
+    factory.provide("heart_beat_buffer", HeartBeatBuffer)
+    factory.provide("expr_pre_allocator", ExprPreAllocator)
+    factory.provide("expr_starter", ExprStarter)
+    factory.provide("expr_status_watcher", ExprStatusWatcher)
     factory.provide("admin_manager", AdminManager)
     factory.provide("team_manager", TeamManager)
     factory.provide("guacamole", GuacamoleInfo)
@@ -185,7 +207,8 @@ def init_components():
     factory.provide("alauda_docker", get_class("hackathon.docker.alauda_docker.AlaudaDockerFormation"))
 
     # azure
-    factory.provide("azure_adapter", AzureAdapter)
+    # AzureAdapter caches the ServiceManagementService of the last used subscription, keep one per thread
+    factory.provide("azure_adapter", AzureAdapter, scope=Scope.THREAD)
     factory.provide("azure_subscription_service", SubscriptionService)
     factory.provide("azure_vm_service", AzureVMService)
     factory.provide("azure_cloud_service", CloudService)
@@ -240,6 +263,9 @@ def __init_schedule_jobs():
     # schedule job to pre-allocate environment
     expr_manager.schedule_pre_allocate_expr_job()
 
+    # schedule job to recover experiments left in STARTING by a stopped server
+    expr_manager.schedule_recover_orphaned_expr_job()
+
     # schedule job to pull docker images automatically
     if not safe_get_config("docker.alauda.enabled", False):
         docker = RequiredFeature("hosted_docker")
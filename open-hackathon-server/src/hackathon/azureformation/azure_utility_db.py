@@ -27,6 +27,7 @@ __author__ = 'Yifu Huang'
 import sys
 
 sys.path.append("..")
+from hackathon import RequiredFeature
 from hackathon.database import (
     db_adapter,
 )
@@ -71,6 +72,8 @@ PORT_BOUND = 65536
 ENDPOINT_PREFIX = 'AUTO-'
 ENDPOINT_PROTOCOL = 'TCP'
 
+expr_status_watcher = RequiredFeature("expr_status_watcher")
+
 
 # -------------------------------------------------- azure log --------------------------------------------------#
 def commit_azure_log(experiment_id, operation, status, note=None, code=None):
@@ -267,6 +270,7 @@ def update_virtual_environment_status(virtual_machine, status):
     ve = virtual_machine.virtual_environment
     ve.status = status
     db_adapter.commit()
+    expr_status_watcher.notify(ve.experiment_id)
 
 
 def update_virtual_environment_remote_paras(virtual_machine, remote_paras):
@@ -346,6 +350,7 @@ def update_experiment_status(experiment_id, status):
     e = db_adapter.get_object(Experiment, experiment_id)
     e.status = status
     db_adapter.commit()
+    expr_status_watcher.notify(experiment_id)
 
 
 def check_experiment_done(experiment_id, need_status):
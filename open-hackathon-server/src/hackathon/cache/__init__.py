@@ -23,3 +23,5 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 __author__ = 'ZGQ'
+
+from ttl_cache import TTLCache
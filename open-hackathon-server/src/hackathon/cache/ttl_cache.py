@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+
+The MIT License (MIT)
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import time
+from collections import OrderedDict
+from threading import Lock
+
+__all__ = ["TTLCache"]
+
+
+class TTLCache(object):
+    """A bounded in-process LRU cache whose entries expire after certain seconds
+
+    Unlike CacheManagerExt which is backed by files, it keeps values in memory of current process and it's thread-safe.
+    So it's suitable for small and hot data that are read on every request. Values are shared between threads, NEVER put
+    objects that are bound to a DB session into it.
+
+    :Example:
+        cache = TTLCache(max_size=1000, ttl_seconds=300)
+        cache.set("key", "value")
+        cache.set("key2", "value2", ttl_seconds=10) # expires in 10 seconds instead of 300
+        cache.get("key") # "value"
+        cache.stats() # {"size": 2, "hits": 1, "misses": 0, "evictions": 0}
+
+    Every invalidation increases the version of the cache. To avoid caching a value loaded before an concurrent
+    invalidation, read the version before loading and pass it to set():
+
+        version = cache.version
+        value = load_from_db(key)
+        cache.set(key, value, version=version) # ignored if cache is invalidated during loading
+    """
+
+    # marker of cache miss since None is a valid value
+    __MISSING = object()
+
+    def __init__(self, max_size=1024, ttl_seconds=300, timer=time.time):
+        """Create a new cache
+
+        :type max_size: int
+        :param max_size: the maximum count of entries. The least recently used one will be evicted if exceeded
+
+        :type ttl_seconds: int|float
+        :param ttl_seconds: the default time-to-live of an entry in seconds
+
+        :type timer: callable
+        :param timer: function that returns the current time in seconds. time.time by default
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.timer = timer
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.version = 0
+        self.__entries = OrderedDict()  # key -> (expire_at, value), the most recently used at the end
+        self.__lock = Lock()
+
+    def get(self, key, default=None):
+        """Get the cached value of key
+
+        :return the cached value or default if key not found or expired
+        """
+        with self.__lock:
+            entry = self.__entries.pop(key, self.__MISSING)
+            if entry is self.__MISSING or entry[0] <= self.timer():
+                self.misses += 1
+                return default
+
+            # re-insert to mark it as the most recently used
+            self.__entries[key] = entry
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl_seconds=None, version=None):
+        """Cache value for key
+
+        :type ttl_seconds: int|float
+        :param ttl_seconds: time-to-live of this entry. Default ttl of the cache is used if None. The value will NOT be
+        cached if it's not positive
+
+        :type version: int
+        :param version: version of the cache when the value was loaded. The value will NOT be cached if the cache has
+        been invalidated since then
+        """
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if ttl <= 0:
+            return
+
+        with self.__lock:
+            if version is not None and version != self.version:
+                return
+            self.__entries.pop(key, None)
+            self.__entries[key] = (self.timer() + ttl, value)
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """Remove the entry of key if it exists"""
+        with self.__lock:
+            self.version += 1
+            self.__entries.pop(key, None)
+
+    def invalidate_if(self, predicate):
+        """Remove all entries that predicate(key, value) returns True
+
+        It walks through all entries, don't call it on hot path.
+        """
+        with self.__lock:
+            self.version += 1
+            keys = [k for k, (expire_at, v) in self.__entries.iteritems() if predicate(k, v)]
+            for k in keys:
+                del self.__entries[k]
+
+    def clear(self):
+        """Remove all entries"""
+        with self.__lock:
+            self.version += 1
+            self.__entries.clear()
+
+    def stats(self):
+        """Return the statistics of the cache
+
+        :rtype: dict
+        :return size, hits, misses and evictions of the cache
+        """
+        with self.__lock:
+            return {
+                "size": len(self.__entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
@@ -46,6 +46,9 @@ Config = {
     "mysql": {
         "connection": 'mysql://%s:%s@%s:%s/%s' % (MYSQL_USER, MYSQL_PWD, MYSQL_HOST, MYSQL_PORT, MYSQL_DB)
     },
+    "pagination": {
+        "max_limit": 1000
+    },
     "login": {
         "github": {
             "user_info_url": 'https://api.github.com/user?access_token=',
@@ -66,7 +69,13 @@ Config = {
         "live": {
             "user_info_url": 'https://apis.live.net/v5.0/me?access_token='
         },
-        "token_expiration_minutes": 60 * 24
+        "token_expiration_minutes": 60 * 24,
+        "token_cache": {
+            "max_size": 10000,
+            # logout evicts tokens from the cache of the current process only. Other processes keep accepting the
+            # logged out tokens until their cache entries expire, so logout takes up to ttl_seconds to be effective
+            "ttl_seconds": 300
+        }
     },
     "azure": {
         "cert_base": "",
@@ -78,8 +87,51 @@ Config = {
         "job_store": "mysql",
         "job_store_url": 'mysql://%s:%s@%s:%s/%s' % (MYSQL_USER, MYSQL_PWD, MYSQL_HOST, MYSQL_PORT, MYSQL_DB)
     },
+    "admin": {
+        "entitlement_cache": {
+            "max_size": 10000,
+            "ttl_seconds": 60
+        }
+    },
+    "hackathon": {
+        "name_cache": {
+            "max_size": 1024,
+            "ttl_seconds": 60
+        },
+        "settings_cache": {
+            "max_size": 1024,
+            "ttl_seconds": 3600
+        }
+    },
+    "heart_beat": {
+        "flush_seconds": 30
+    },
+    "recycle": {
+        "pool_size": 8,
+        # shared by the processes of the machine, a run locks "<checkpoint_file>.lock" and the others skip
+        "checkpoint_file": "/tmp/open-hackathon/recycle_checkpoint.json"
+    },
+    "health": {
+        "refresh_seconds": 10,
+        "item_timeout_seconds": 5
+    },
+    "start_expr": {
+        "unit_pool_size": 8,
+        "workers": 4,
+        "queue_size": 200,
+        "lease_renew_seconds": 60,
+        "lease_timeout_seconds": 300,
+        "recover_interval_minutes": 5
+    },
+    "expr_status": {
+        "ttl_seconds": 10,
+        "max_size": 10000,
+        "max_wait_seconds": 30
+    },
     "pre_allocate": {
         "check_interval_minutes": 5,
+        "max_concurrency": 10,
+        "hackathon_concurrency_per_host": 2,
         "azure": 1,
         "docker": 1
     },
@@ -96,6 +148,23 @@ Config = {
         }
     },
     "docker": {
+        "placement": {
+            "policy": "least_loaded",
+            "refresh_seconds": 30,
+            "ping_pool_size": 10
+        },
+        "host_ports": {
+            "start": 10000,
+            "end": 65535
+        },
+        "http": {
+            "connect_timeout_seconds": 3,
+            "read_timeout_seconds": 30,
+            "pull_timeout_seconds": 1800,
+            "max_retries": 2,
+            "backoff_seconds": 0.2,
+            "pool_size": 10
+        },
         "alauda": {
             "token": "",
             "namespace": "",
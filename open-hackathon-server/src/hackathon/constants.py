@@ -81,6 +81,8 @@ class HACKATHON_BASIC_INFO:
         AUTO_APPROVE: bool, whether manual approve is required, default false
         RECYCLE_ENABLED: bool, whether environment be recycled automatically. default false
         RECYCLE_MINUTES: int, the maximum time (unit:minute) of recycle for per experiment. default 0
+        RECYCLE_IDLE_MINUTES: int, recycle experiment once no heart beat received for such minutes instead of
+            RECYCLE_MINUTES after its creation. Pre-allocated experiments are not affected. default 0(disabled)
         PRE_ALLOCATE_ENABLED: bool, whether to pre-start several environment. default false
         PRE_ALLOCATE_NUMBER: int, the maximum count of pre-start environment per hackathon and per template. default 1
         ALAUDA_ENABLED: bool,default false, whether to use alauda service, no azure resource needed if true
@@ -97,6 +99,7 @@ class HACKATHON_BASIC_INFO:
     AUTO_APPROVE = "auto_approve"
     RECYCLE_ENABLED = "recycle_enabled"
     RECYCLE_MINUTES = "recycle_minutes"
+    RECYCLE_IDLE_MINUTES = "recycle_idle_minutes"
     PRE_ALLOCATE_ENABLED = "pre_allocate_enabled"
     PRE_ALLOCATE_NUMBER = "pre_allocate_number"
     ALAUDA_ENABLED = "alauda_enabled"
@@ -25,12 +25,35 @@
 # -----------------------------------------------------------------------------------
 
 
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import object_mapper, make_transient_to_detached
+from hackathon.util import safe_get_config
+
+# ER_DUP_ENTRY of MySQL
+DUPLICATE_KEY_ERROR = 1062
+
+
+def is_duplicate_key(e):
+    """Whether an IntegrityError is caused by a duplicate unique key, MySQL error 1062 or the sqlite equivalent"""
+    args = getattr(e.orig, "args", ())
+    return (len(args) > 0 and args[0] == DUPLICATE_KEY_ERROR) or "UNIQUE constraint failed" in str(e.orig)
+
+
 class SQLAlchemyAdapterMetaClass(type):
     @staticmethod
     def wrap(func):
         """Return a wrapped instance method"""
 
         def auto_commit(self, *args, **kwargs):
+            if self.in_transaction():
+                # the enclosing unit of work commits or rolls back. Flush so that new objects get their ids
+                return_value = func(self, *args, **kwargs)
+                self.db_session.flush()
+                return return_value
+
             try:
                 # todo a trick for DB transaction issue
                 # self.commit()
@@ -43,14 +66,46 @@ class SQLAlchemyAdapterMetaClass(type):
 
         return auto_commit
 
+    @staticmethod
+    def wrap_read_only(func):
+        """Return a wrapped instance method which doesn't commit unless there are pending changes
+
+        Objects might be modified through their attributes and persisted by the next DB call, which was always committed
+        before. Keep that behavior when session has pending changes, otherwise skip the COMMIT round trip. The read
+        transaction will be closed when the session is removed at the end of request.
+        """
+
+        def read_only(self, *args, **kwargs):
+            if self.in_transaction():
+                return func(self, *args, **kwargs)
+
+            session = self.db_session
+            has_pending = session.new or session.deleted or session.dirty
+            try:
+                return_value = func(self, *args, **kwargs)
+                if has_pending:
+                    self.commit()
+                return return_value
+            except:
+                self.rollback()
+                raise
+
+        return read_only
+
     def __new__(cls, name, bases, attrs):
         """If the method in this list, DON'T wrap it"""
-        no_wrap = ["commit", "merge", "rollback", "remove", "session"]
+        no_wrap = ["commit", "merge", "rollback", "remove", "session", "transaction", "in_transaction", "snapshot",
+                   "attach"]
+        # methods with these prefixes only query DB, they will not be committed
+        read_only_prefixes = ("get_", "find_", "count")
 
         def wrap(method):
             """private methods are not wrapped"""
             if method not in no_wrap and not method.startswith("__"):
-                attrs[method] = cls.wrap(attrs[method])
+                if method.startswith(read_only_prefixes):
+                    attrs[method] = cls.wrap_read_only(attrs[method])
+                else:
+                    attrs[method] = cls.wrap(attrs[method])
 
         map(lambda m: wrap(m), attrs.keys())
         return super(SQLAlchemyAdapterMetaClass, cls).__new__(cls, name, bases, attrs)
@@ -68,11 +123,17 @@ class SQLAlchemyAdapter(DBAdapter):
     def __init__(self, db_session):
         print 'net SQLAlchemyAdapter'
         super(SQLAlchemyAdapter, self).__init__(db_session)
+        # db_session is scoped per thread, so is the depth of nested transactions
+        self.local = threading.local()
 
     # ------------------------------ methods that no need to wrap --- start ------------------------------
 
     def commit(self):
-        self.db_session.commit()
+        if self.in_transaction():
+            # the enclosing unit of work commits in the end
+            self.db_session.flush()
+        else:
+            self.db_session.commit()
 
     def remove(self):
         self.db_session.remove()
@@ -86,6 +147,56 @@ class SQLAlchemyAdapter(DBAdapter):
     def session(self):
         return self.db_session
 
+    def snapshot(self, obj):
+        """Return a detached copy of obj that contains the values of all its columns
+
+        The copy is not bound to any session so it can be cached and shared between threads and requests. Don't modify
+        it, call attach() to get an instance of current session instead.
+        """
+        mapper = object_mapper(obj)
+        copy = mapper.class_manager.new_instance()
+        for prop in mapper.column_attrs:
+            setattr(copy, prop.key, getattr(obj, prop.key))
+        make_transient_to_detached(copy)
+        return copy
+
+    def attach(self, snapshot):
+        """Return an instance in current session that copies the state of snapshot without querying DB
+
+        Relationships of the returned instance are lazy loaded in current session as usual.
+        """
+        return self.db_session.merge(snapshot, load=False)
+
+    def in_transaction(self):
+        """Whether current thread is inside a 'with db.transaction()' block"""
+        return getattr(self.local, "depth", 0) > 0
+
+    @contextmanager
+    def transaction(self):
+        """Unit of work that commits all the writes inside the block once
+
+        Writes and explicit commit() inside the block only flush to DB. The outermost block commits when it exits or rolls
+        back when an exception raised. Nested blocks join the outermost one.
+
+        :Example:
+            with self.db.transaction():
+                self.db.add_object(a)
+                self.db.add_object(b)
+            # both a and b are committed here
+        """
+        depth = getattr(self.local, "depth", 0)
+        self.local.depth = depth + 1
+        try:
+            yield self
+            if depth == 0:
+                self.db_session.commit()
+        except:
+            if depth == 0:
+                self.db_session.rollback()
+            raise
+        finally:
+            self.local.depth = depth
+
     # ------------------------------ methods that no need to wrap --- end------------------------------
 
     # ------------------------------ auto wrapped 'public' methods  --- start ------------------------------
@@ -117,6 +228,45 @@ class SQLAlchemyAdapter(DBAdapter):
     def find_first_object_by(self, ObjectClass, **kwargs):
         return ObjectClass.query.filter_by(**kwargs).first()
 
+    def find_page(self, ObjectClass, criterion=(), after_id=None, limit=None, fields=None, desc=False):
+        """ Query a page of objects ordered by the primary key 'id', using keyset pagination
+
+        The next page starts after the id of the last row of this page, so the cost of a page doesn't grow with its
+        position. Paging is opted in by 'limit' or 'after_id', then at most 'pagination.max_limit' rows are returned no
+        matter how large 'limit' is. Without both of them all the rows are returned as the list APIs always did. Rows
+        are queried as tuples and serialized in bulk without creating instances of ObjectClass.
+
+        :type criterion: list|tuple
+        :param criterion: filters of the query
+
+        :type after_id: int
+        :param after_id: id of the last row of previous page. None for the first page
+
+        :type limit: int
+        :param limit: max number of rows of the page. None or 0 for 'pagination.max_limit' if after_id given else all
+
+        :type fields: list
+        :param fields: names of the columns to query, 'id' is always included. Unknown names are ignored. None for all
+
+        :type desc: bool
+        :param desc: order by id descending if True, so that the page contains rows whose id less than after_id
+
+        :rtype: list
+        :return list of dict same as ObjectClass.dic() but only the columns in fields, see DBBase.rows_dic
+        """
+        if limit is not None and limit <= 0:
+            limit = None
+        if limit is not None or after_id is not None:
+            max_limit = safe_get_config("pagination.max_limit", 1000)
+            limit = max_limit if limit is None else min(limit, max_limit)
+
+        columns = [c for c in ObjectClass.__table__.columns if fields is None or c.name == "id" or c.name in fields]
+        query = self.db_session.query(*columns).filter(*criterion)
+        if after_id is not None:
+            query = query.filter(ObjectClass.id < after_id if desc else ObjectClass.id > after_id)
+        rows = query.order_by(ObjectClass.id.desc() if desc else ObjectClass.id).limit(limit).all()
+
+        return ObjectClass.rows_dic(columns, rows)
 
     def add_object(self, inst):
         self.db_session.add(inst)
@@ -127,6 +277,25 @@ class SQLAlchemyAdapter(DBAdapter):
         self.db_session.add(object)
         return object
 
+    def add_object_if_absent(self, ObjectClass, **kwargs):
+        """ Insert a row of 'ObjectClass' unless it conflicts with an existing one on a unique key.
+
+        The check and the insert are one atomic statement, so it can be used as a lock across processes. The insert runs
+        in a savepoint and only the savepoint is rolled back on conflict, it's safe to call inside a transaction. Errors
+        other than duplicate key, a violated foreign key or a missing NOT NULL column for example, are raised.
+
+        :rtype: bool
+        :return True if inserted, False if a conflicting row exists already
+        """
+        try:
+            with self.db_session.begin_nested():
+                self.db_session.execute(ObjectClass.__table__.insert(), kwargs)
+            return True
+        except IntegrityError as e:
+            if not is_duplicate_key(e):
+                raise
+            return False
+
     def update_object(self, object, **kwargs):
         """ Update object 'object' with the fields and values specified in '**kwargs'. """
         for key, value in kwargs.items():
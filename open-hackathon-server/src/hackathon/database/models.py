@@ -24,10 +24,12 @@
 # THE SOFTWARE.
 # -----------------------------------------------------------------------------------
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, TypeDecorator
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, TypeDecorator, Index, UniqueConstraint
 from sqlalchemy.orm import backref, relation
 from . import Base, db_adapter
 from datetime import datetime
+from itertools import izip
+from operator import attrgetter, itemgetter
 from hackathon.util import get_now
 import json
 from pytz import utc
@@ -45,23 +47,7 @@ def date_serializer(date):
 
 
 def to_dic(inst, cls):
-    # add your coversions for things like datetime's
-    # and what-not that aren't serializable.
-    convert = dict()
-    convert[TZDateTime] = date_serializer
-
-    d = dict()
-    for c in cls.__table__.columns:
-        v = getattr(inst, c.name)
-        if c.type.__class__ in convert.keys() and v is not None:
-            try:
-                func = convert[c.type.__class__]
-                d[c.name] = func(v)
-            except:
-                d[c.name] = "Error:  Failed to covert using ", str(convert[c.type.__class__])
-        else:
-            d[c.name] = v
-    return d
+    return get_serializer(cls)(inst)
 
 
 def to_json(inst, cls):
@@ -95,6 +81,77 @@ class TZDateTime(TypeDecorator):
         return value
 
 
+# add your coversions for things like datetime's
+# and what-not that aren't serializable.
+CONVERTERS = {
+    TZDateTime: date_serializer
+}
+
+# model class -> function that converts its instance to dict
+serializers = {}
+
+
+def compile_row_serializer(columns):
+    """Compile a function that converts a row tuple of columns to dict
+
+    Column names and converters are resolved once here instead of for every row.
+
+    :type columns: list
+    :param columns: columns of the table in the same order as the values in row
+
+    :rtype: function
+    :return function that takes a row tuple and returns dict
+    """
+    names = tuple(c.name for c in columns)
+    converted = tuple((i, c.name, CONVERTERS[c.type.__class__]) for i, c in enumerate(columns)
+                      if c.type.__class__ in CONVERTERS)
+
+    def serialize(row):
+        d = dict(izip(names, row))
+        for i, name, func in converted:
+            v = row[i]
+            if v is not None:
+                try:
+                    d[name] = func(v)
+                except:
+                    d[name] = "Error:  Failed to covert using ", str(func)
+        return d
+
+    return serialize
+
+
+def get_serializer(cls):
+    """Return the function that converts an instance of model cls to dict, which is compiled once per class
+
+    :type cls: type
+    :param cls: the model class
+
+    :rtype: function
+    :return function that takes an instance and returns dict
+    """
+    serializer = serializers.get(cls)
+    if serializer is None:
+        columns = list(cls.__table__.columns)
+        names = [c.name for c in columns]
+        serialize_row = compile_row_serializer(columns)
+        # read the loaded values from __dict__ directly, fall back to the instrumented attributes if any of them is
+        # not loaded yet, for example expired after commit
+        loaded_values = itemgetter(*names)
+        values = attrgetter(*names)
+        if len(names) == 1:
+            loaded_values = lambda d, get=loaded_values: (get(d),)
+            values = lambda inst, get=values: (get(inst),)
+
+        def serializer(inst):
+            try:
+                return serialize_row(loaded_values(inst.__dict__))
+            except KeyError:
+                return serialize_row(values(inst))
+
+        serializers[cls] = serializer
+    return serializer
+
+
 class DBBase(Base):
     """
     DB model base class, providing basic functions
@@ -107,6 +164,12 @@ class DBBase(Base):
     def dic(self):
         return to_dic(self, self.__class__)
 
+    @classmethod
+    def rows_dic(cls, columns, rows):
+        """Same as dic() but for row tuples queried by columns of the table, see find_page"""
+        serialize = compile_row_serializer(columns)
+        return [serialize(row) for row in rows]
+
     def json(self):
         return to_json(self, self.__class__)
 
@@ -153,7 +216,7 @@ class UserEmail(DBBase):
 
     id = Column(Integer, primary_key=True)
     name = Column(String(80))
-    email = Column(String(120))
+    email = Column(String(120), index=True)
     primary_email = Column(Integer)  # 0:NOT Primary Email 1:Primary Email
     verified = Column(Integer)  # 0 for not verified, 1 for verified
     create_time = Column(TZDateTime, default=get_now())
@@ -199,6 +262,8 @@ class UserHackathonRel(DBBase):
     hackathon_id = Column(Integer, ForeignKey('hackathon.id', ondelete='CASCADE'))
     hackathon = relationship('Hackathon', backref=backref('registers', lazy='dynamic'))
 
+    __table_args__ = (Index("ix_user_hackathon_rel_user_id_hackathon_id", "user_id", "hackathon_id"),)
+
     def __init__(self, **kwargs):
         super(UserHackathonRel, self).__init__(**kwargs)
 
@@ -288,10 +353,25 @@ class Hackathon(DBBase):
     basic_info = Column(Text)
     extra_info = Column(Text)
 
+    # copies of the settings in basic_info so that the scheduler jobs can filter hackathons in SQL.
+    # MUST be updated together with basic_info, see HackathonSettings.to_columns
+    recycle_enabled = Column(Integer, default=0, index=True)
+    recycle_minutes = Column(Integer, default=60)
+    recycle_idle_minutes = Column(Integer, default=0)
+    pre_allocate_enabled = Column(Integer, default=0)
+    pre_allocate_number = Column(Integer, default=1)
+
     create_time = Column(TZDateTime, default=get_now())
     update_time = Column(TZDateTime)
     archive_time = Column(TZDateTime)
 
+    __table_args__ = (
+        # online hackathons to pre-allocate experiments for
+        Index("ix_hackathon_status_pre_allocate_enabled", "status", "pre_allocate_enabled"),
+        # online hackathons to recycle experiments of
+        Index("ix_hackathon_status_recycle_enabled", "status", "recycle_enabled"),
+    )
+
     def dic(self):
         d = to_dic(self, self.__class__)
         d["basic_info"] = json.loads(self.basic_info or "{}")
@@ -299,6 +379,15 @@ class Hackathon(DBBase):
         d["extra_info"] = json.loads(self.extra_info or "{}")
         return d
 
+    @classmethod
+    def rows_dic(cls, columns, rows):
+        dics = super(Hackathon, cls).rows_dic(columns, rows)
+        for d in dics:
+            for name in ["basic_info", "extra_info"]:
+                if name in d:
+                    d[name] = json.loads(d[name] or "{}")
+        return dics
+
     def __init__(self, **kwargs):
         super(Hackathon, self).__init__(**kwargs)
 
@@ -319,7 +408,7 @@ class DockerHostServer(DBBase):
     create_time = Column(TZDateTime, default=get_now())
     update_time = Column(TZDateTime)
 
-    hackathon_id = Column(Integer, ForeignKey('hackathon.id', ondelete='CASCADE'))
+    hackathon_id = Column(Integer, ForeignKey('hackathon.id', ondelete='CASCADE'), index=True)
     hackathon = relationship('Hackathon', backref=backref('docker_host_servers', lazy='dynamic'))
 
     def __init__(self, **kwargs):
@@ -351,6 +440,17 @@ class Experiment(DBBase):
     hackathon_id = Column(Integer, ForeignKey('hackathon.id', ondelete='CASCADE'))
     hackathon = relationship('Hackathon', backref=backref('experiments', lazy='dynamic'))
 
+    __table_args__ = (
+        # for the idle-aware recycling
+        Index("ix_experiment_status_last_heart_beat_time", "status", "last_heart_beat_time"),
+        # the running experiment of user in hackathon
+        Index("ix_experiment_user_id_hackathon_id_status", "user_id", "hackathon_id", "status"),
+        # the experiments of user on template, and the pre-allocated ones whose user_id is ReservedUser.DefaultUserID
+        Index("ix_experiment_template_id_user_id_status", "template_id", "user_id", "status"),
+        # the experiment list of hackathon
+        Index("ix_experiment_hackathon_id_status_create_time", "hackathon_id", "status", "create_time"),
+    )
+
     def __init__(self, **kwargs):
         super(Experiment, self).__init__(**kwargs)
 
@@ -377,6 +477,8 @@ class VirtualEnvironment(DBBase):
     experiment_id = Column(Integer, ForeignKey('experiment.id', ondelete='CASCADE'))
     experiment = relationship('Experiment', backref=backref('virtual_environments', lazy='dynamic'))
 
+    __table_args__ = (Index("ix_virtual_environment_name_status_remote_provider", "name", "status", "remote_provider"),)
+
     def __init__(self, **kwargs):
         super(VirtualEnvironment, self).__init__(**kwargs)
 
@@ -422,12 +524,32 @@ class PortBinding(DBBase):
     virtual_environment_id = Column(Integer, ForeignKey('virtual_environment.id', ondelete='CASCADE'))
     virtual_environment = relationship('VirtualEnvironment', backref=backref('port_bindings', lazy='dynamic'))
 
-    experiment_id = Column(Integer, ForeignKey('experiment.id', ondelete='CASCADE'))
+    experiment_id = Column(Integer, ForeignKey('experiment.id', ondelete='CASCADE'), index=True)
     experiment = relationship('Experiment', backref=backref('port_bindings', lazy='dynamic'))
 
     url = Column(String(200))  # public url schema for display
 
 
+class HostPortReservation(DBBase):
+    """
+    Port of docker host reserved by an experiment. The unique key makes sure that a port is never assigned twice even
+    if several servers are assigning ports of the same docker host at the same time
+    """
+    __tablename__ = 'host_port_reservation'
+
+    id = Column(Integer, primary_key=True)
+    port = Column(Integer, nullable=False)
+    create_time = Column(TZDateTime, default=get_now())
+
+    docker_host_server_id = Column(Integer, ForeignKey('docker_host_server.id', ondelete='CASCADE'), nullable=False)
+    experiment_id = Column(Integer, ForeignKey('experiment.id', ondelete='CASCADE'), index=True)
+
+    __table_args__ = (UniqueConstraint("docker_host_server_id", "port", name="uq_host_port_reservation_host_port"),)
+
+    def __init__(self, **kwargs):
+        super(HostPortReservation, self).__init__(**kwargs)
+
+
 class Template(DBBase):
     __tablename__ = 'template'
 
@@ -647,7 +769,7 @@ class AzureEndpoint(DBBase):
 class AdminHackathonRel(DBBase):
     __tablename__ = 'admin_hackathon_rel'
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('user.id', ondelete='CASCADE'))
+    user_id = Column(Integer, ForeignKey('user.id', ondelete='CASCADE'), index=True)
     user = relationship('User', backref=backref('admin_hackathon_rels', lazy='dynamic'))
 
     role_type = Column(Integer)  # enum.ADMIN_ROLE_TYPE
@@ -659,3 +781,7 @@ class AdminHackathonRel(DBBase):
 
     def __init__(self, **kwargs):
         super(AdminHackathonRel, self).__init__(**kwargs)
+
+
+# compile the serializers of all models at import time
+map(get_serializer, DBBase.__subclasses__())
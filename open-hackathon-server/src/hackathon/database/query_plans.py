@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("..")
+
+from sqlalchemy import select, and_, text, Integer, String
+
+from hackathon.util import get_now
+from hackathon.database.models import (
+    Experiment,
+    PortBinding,
+    VirtualEnvironment,
+    AdminHackathonRel,
+    UserHackathonRel,
+    UserEmail,
+    DockerHostServer,
+    Hackathon,
+)
+
+__all__ = ["QUERY_SHAPES", "find_covering_index", "find_full_scans"]
+
+# (table, columns compared in WHERE clause) of the hot queries. Each of them must be served by an index
+QUERY_SHAPES = [
+    (Experiment.__table__, ["user_id", "hackathon_id", "status"]),
+    (Experiment.__table__, ["template_id", "user_id", "status"]),
+    (Experiment.__table__, ["hackathon_id", "status", "create_time"]),
+    (PortBinding.__table__, ["experiment_id"]),
+    (VirtualEnvironment.__table__, ["name", "status", "remote_provider"]),
+    (AdminHackathonRel.__table__, ["user_id"]),
+    (UserHackathonRel.__table__, ["user_id", "hackathon_id"]),
+    (UserEmail.__table__, ["email"]),
+    (DockerHostServer.__table__, ["hackathon_id"]),
+    (Hackathon.__table__, ["status", "pre_allocate_enabled"]),
+    (Hackathon.__table__, ["status", "recycle_enabled"]),
+]
+
+
+def find_covering_index(table, columns):
+    """Find the index declared in models whose leading columns are exactly the columns of a query shape
+
+    :type table: Table
+    :param table: the table queried
+
+    :type columns: list
+    :param columns: names of the columns compared in WHERE clause
+
+    :rtype: Index
+    :return the index or None if no index can serve the query
+    """
+    for index in table.indexes:
+        index_columns = [c.name for c in index.columns]
+        if set(index_columns[:len(columns)]) == set(columns):
+            return index
+    return None
+
+
+def find_full_scans(engine):
+    """EXPLAIN every query shape on a MySQL db and return the ones that scan the whole table
+
+    :type engine: Engine
+    :param engine: engine of the db whose indexes are checked
+
+    :rtype: list
+    :return list of (table name, columns) whose query plan is a full table scan
+    """
+    full_scans = []
+    for table, columns in QUERY_SHAPES:
+        query = select([table]).where(and_(*[table.c[c] == __sample_value(table.c[c]) for c in columns]))
+        compiled = query.compile()
+        plan = engine.execute(text("EXPLAIN %s" % compiled), **compiled.params).fetchall()
+        if any(row["type"] == "ALL" for row in plan):
+            full_scans.append((table.name, columns))
+    return full_scans
+
+
+def __sample_value(column):
+    if isinstance(column.type, Integer):
+        return 1
+    if isinstance(column.type, String):
+        return ""
+    return get_now()
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("..")
+import json
+import time
+import threading
+
+from hackathon import Component
+
+__all__ = ["ContainerInventory"]
+
+
+class HostContainerInventory(object):
+    """Running containers on a docker host, keyed by both name and id
+
+    Containers are listed once through '/containers/json' and then kept current by events from '/events'. The event
+    stream is subscribed before listing so that no change is missed. Once the stream breaks, the inventory is not ready
+    until it's subscribed and listed again.
+
+    Containers are in the same format as items of '/containers/json', for example:
+        {"Id": "8dfafdbc3a40", "Names": ["/boring_feynman"], "Ports": [{"PrivatePort": 22, "PublicPort": 10022}]}
+    """
+
+    def __init__(self, base_url, http, log):
+        self.base_url = base_url
+        self.http = http
+        self.log = log
+        self.ready = False
+        self.lock = threading.Lock()
+        self.by_id = {}
+        self.by_name = {}
+        self.watch_thread = None
+        self.closed = False
+
+    def watch(self):
+        """Start the background thread that subscribes events of the docker host"""
+        with self.lock:
+            if self.watch_thread is None:
+                self.watch_thread = threading.Thread(target=self.__watch_forever,
+                                                     name="docker-events-%s" % self.base_url)
+                self.watch_thread.daemon = True
+                self.watch_thread.start()
+
+    def close(self):
+        """Stop watching events. The inventory should not be used any more"""
+        self.closed = True
+        self.ready = False
+
+    def get_by_name(self, name):
+        with self.lock:
+            return self.by_name.get(name.lstrip("/"))
+
+    def get_by_id(self, container_id):
+        with self.lock:
+            return self.by_id.get(container_id)
+
+    def list(self):
+        with self.lock:
+            return self.by_id.values()
+
+    def refresh(self, container_id):
+        """Inspect a container and update the inventory immediately, without waiting for its event"""
+        resp = self.http.get("%s/containers/%s/json" % (self.base_url, container_id))
+        if resp.status_code == 404:
+            self.__remove(container_id)
+            return
+
+        info = json.loads(resp.content)
+        if info["State"]["Running"] or info["State"].get("Restarting"):
+            self.__put(self.__from_inspect(info))
+        else:
+            self.__remove(info["Id"])
+
+    def __watch_forever(self):
+        backoff = 1
+        while not self.closed:
+            try:
+                # no read timeout since there might be no event for long
+                resp = self.http.get("%s/events" % self.base_url, stream=True,
+                                     timeout=(self.http.connect_timeout, None))
+                self.__seed()
+                backoff = 1
+                for line in resp.iter_lines():
+                    if self.closed:
+                        return
+                    if line:
+                        self.__on_event(json.loads(line))
+                raise Exception("docker events stream of %s closed" % self.base_url)
+            except Exception as e:
+                self.ready = False
+                self.log.error(e)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+
+    def __seed(self):
+        containers = json.loads(self.http.get("%s/containers/json" % self.base_url).content)
+        with self.lock:
+            self.by_id = {}
+            self.by_name = {}
+            for c in containers:
+                self.__put_unlocked(c)
+            self.ready = True
+        self.log.debug("%d containers found on docker host %s" % (len(containers), self.base_url))
+
+    def __on_event(self, event):
+        # docker 1.10+ adds 'Type' and 'Action', older versions use 'status' only
+        if event.get("Type", "container") != "container":
+            return
+        status = event.get("status") or event.get("Action")
+        container_id = event.get("id") or event.get("Actor", {}).get("ID")
+        if status == "start":
+            self.refresh(container_id)
+        elif status in ("die", "destroy"):
+            self.__remove(container_id)
+
+    def __put(self, container):
+        with self.lock:
+            self.__put_unlocked(container)
+
+    def __put_unlocked(self, container):
+        self.by_id[container["Id"]] = container
+        for name in container["Names"]:
+            self.by_name[name.lstrip("/")] = container
+
+    def __remove(self, container_id):
+        with self.lock:
+            container = self.by_id.pop(container_id, None)
+            if container is not None:
+                for name in container["Names"]:
+                    self.by_name.pop(name.lstrip("/"), None)
+
+    def __from_inspect(self, info):
+        """Convert result of '/containers/(id)/json' to the format of '/containers/json'"""
+        ports = []
+        for private, bindings in ((info.get("NetworkSettings") or {}).get("Ports") or {}).iteritems():
+            port, protocol = private.split("/")
+            for binding in bindings or []:
+                ports.append({
+                    "PrivatePort": int(port),
+                    "PublicPort": int(binding["HostPort"]),
+                    "IP": binding.get("HostIp"),
+                    "Type": protocol
+                })
+        return {
+            "Id": info["Id"],
+            "Names": [info["Name"]],
+            "Image": info.get("Config", {}).get("Image"),
+            "Ports": ports
+        }
+
+
+class ContainerInventory(Component):
+    """Inventories of running containers of all docker hosts
+
+    :Example:
+        inventory = ContainerInventory(http)
+        host_inventory = inventory.get(docker_host, 'http://docker-host:4243')
+        if host_inventory.ready:
+            container = host_inventory.get_by_name("container-name")
+    """
+
+    def __init__(self, http):
+        """
+        :type http: DockerHttpClient
+        :param http: the pooled http client of docker remote API
+        """
+        self.http = http
+        self.lock = threading.Lock()
+        self.hosts = {}  # docker_host.id -> HostContainerInventory
+
+    def get(self, docker_host, base_url):
+        """Get the inventory of docker host. The inventory is created and starts watching on first access
+
+        :type docker_host: DockerHostServer
+        :param docker_host: the docker host
+
+        :type base_url: str|unicode
+        :param base_url: url of docker remote API of the host
+
+        :rtype: HostContainerInventory
+        """
+        with self.lock:
+            inventory = self.hosts.get(docker_host.id)
+            if inventory is None or inventory.base_url != base_url:
+                # the ip or port of docker host changed
+                if inventory is not None:
+                    inventory.close()
+                inventory = HostContainerInventory(base_url, self.http, self.log)
+                self.hosts[docker_host.id] = inventory
+        inventory.watch()
+        return inventory
+
+    def stats(self):
+        """Return the count of running containers of every docker host, None if the inventory is not ready"""
+        with self.lock:
+            return dict((i.base_url, len(i.by_id) if i.ready else None) for i in self.hosts.values())
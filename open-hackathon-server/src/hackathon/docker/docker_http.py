@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("..")
+import time
+import random
+from threading import Lock
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from hackathon import Component
+
+__all__ = ["DockerHttpClient"]
+
+
+class DockerHttpClient(Component):
+    """HTTP client of docker remote API that keeps a pool of keep-alive connections per docker host
+
+    Every request has connect and read timeouts so that a hung host won't block the caller forever. Requests that fail
+    to connect are retried with exponential backoff and random jitter. Idempotent requests(GET/HEAD) are also retried on
+    read timeout or 5xx responses. POST/DELETE are never retried once sent since docker may have handled them.
+
+    :Example:
+        http = DockerHttpClient()
+        resp = http.get("http://host:4243/containers/json")
+        resp = http.post("http://host:4243/images/create?fromImage=ubuntu", timeout=(3, 600))
+        http.stats() # {"http://host:4243": {"requests": 2, "failures": 0, "retries": 0}}
+    """
+
+    IDEMPOTENT_METHODS = ("GET", "HEAD")
+
+    def __init__(self):
+        self.connect_timeout = self.util.safe_get_config("docker.http.connect_timeout_seconds", 3)
+        self.read_timeout = self.util.safe_get_config("docker.http.read_timeout_seconds", 30)
+        self.max_retries = self.util.safe_get_config("docker.http.max_retries", 2)
+        self.backoff_seconds = self.util.safe_get_config("docker.http.backoff_seconds", 0.2)
+        self.pool_size = self.util.safe_get_config("docker.http.pool_size", 10)
+        self.lock = Lock()
+        self.sessions = {}  # base url of docker host -> requests.Session
+        self.counters = {}  # base url of docker host -> statistics
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        """Send request through the pooled session of the docker host
+
+        :type method: str|unicode
+        :param method: http method like GET, POST
+
+        :type url: str|unicode
+        :param url: full url of the docker remote API
+
+        :param kwargs: other arguments of requests.Session.request. Default timeout (connect, read) is from config
+
+        :rtype: requests.Response
+        :return the response. Exceptions of requests will be raised if retries used up
+        """
+        base_url = self.__get_base_url(url)
+        session = self.__get_session(base_url)
+        kwargs.setdefault("timeout", (self.connect_timeout, self.read_timeout))
+        idempotent = method.upper() in self.IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            self.__count(base_url, "requests")
+            try:
+                resp = session.request(method, url, **kwargs)
+                if not (idempotent and resp.status_code >= 500 and attempt < self.max_retries):
+                    return resp
+            except (requests.exceptions.ConnectTimeout, requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout) as e:
+                # a request is surely not handled by docker if failed to connect
+                retryable = idempotent or isinstance(e, requests.exceptions.ConnectTimeout)
+                if not retryable or attempt >= self.max_retries:
+                    self.__count(base_url, "failures")
+                    raise
+                self.log.debug("%s %s failed: %s, will retry" % (method, url, e))
+
+            attempt += 1
+            self.__count(base_url, "retries")
+            # exponential backoff with full jitter
+            time.sleep(random.uniform(0, self.backoff_seconds * (2 ** attempt)))
+
+    def stats(self):
+        """Return statistics of the connection pools
+
+        :rtype: dict
+        :return base url of docker host -> count of requests, failures and retries
+        """
+        with self.lock:
+            return dict((k, dict(v)) for k, v in self.counters.iteritems())
+
+    def __get_base_url(self, url):
+        # http://host:port/path -> http://host:port
+        scheme, rest = url.split("://", 1)
+        return "%s://%s" % (scheme, rest.split("/", 1)[0])
+
+    def __get_session(self, base_url):
+        with self.lock:
+            session = self.sessions.get(base_url)
+            if session is None:
+                session = requests.Session()
+                # retries are handled by ourselves
+                session.mount(base_url, HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0))
+                self.sessions[base_url] = session
+                self.counters[base_url] = {"requests": 0, "failures": 0, "retries": 0}
+            return session
+
+    def __count(self, base_url, key):
+        with self.lock:
+            self.counters[base_url][key] += 1
@@ -41,7 +41,6 @@ from hackathon.database.models import (
     DockerHostServer,
 )
 from hackathon.constants import (
-    EStatus,
     PortBindingType,
     VEStatus,
     HEALTH,
@@ -61,6 +60,15 @@ from hackathon.azureformation.azure_endpoint_service import (
 from docker_formation_base import (
     DockerFormationBase,
 )
+from docker_http import (
+    DockerHttpClient,
+)
+from container_inventory import (
+    ContainerInventory,
+)
+from port_allocator import (
+    PortAllocator,
+)
 from hackathon.azureformation.azure_adapter import (
     AzureAdapter,
 )
@@ -71,7 +79,6 @@ from hackathon.constants import (
     HEALTH_STATUS,
 )
 import json
-import requests
 from datetime import timedelta
 
 
@@ -84,38 +91,47 @@ class HostedDockerFormation(DockerFormationBase, Component):
     Host resource are required. Azure key required in case of azure.
     """
     application_json = {'content-type': 'application/json'}
-    host_ports = []
-    host_port_max_num = 30
     docker_host_manager = RequiredFeature("docker_host_manager")
 
     def __init__(self):
-        self.lock = Lock()
+        self.http = DockerHttpClient()
+        self.inventory = ContainerInventory(self.http)
+        self.port_allocator = PortAllocator()
+        # units of an experiment start concurrently, but azure endpoints of a host must be updated one at a time
+        self.endpoint_locks = {}  # docker_host.id -> Lock
 
     def report_health(self):
         """Report health of DockerHostServers
 
         :rtype: dict
         :return health status item of docker. OK when all servers running, Warning if some of them working, Error if no server running
+            statistics of the http connection pools are included in 'pools', count of running containers in
+            'containers'
         """
         try:
-            hosts = self.db.find_all_objects(DockerHostServer)
-            alive = 0
-            for host in hosts:
-                if self.ping(host):
-                    alive += 1
+            # servers are pinged concurrently, the placement of docker hosts is refreshed by the way
+            self.docker_host_manager.refresh_host_states()
+            hosts = self.docker_host_manager.get_host_states()
+            alive = len(filter(lambda h: h.alive, hosts))
             if alive == len(hosts):
                 return {
-                    HEALTH.STATUS: HEALTH_STATUS.OK
+                    HEALTH.STATUS: HEALTH_STATUS.OK,
+                    "pools": self.http.stats(),
+                    "containers": self.inventory.stats()
                 }
             elif alive > 0:
                 return {
                     HEALTH.STATUS: HEALTH_STATUS.WARNING,
-                    HEALTH.DESCRIPTION: 'at least one docker host servers are down'
+                    HEALTH.DESCRIPTION: 'at least one docker host servers are down',
+                    "pools": self.http.stats(),
+                    "containers": self.inventory.stats()
                 }
             else:
                 return {
                     HEALTH.STATUS: HEALTH_STATUS.ERROR,
-                    HEALTH.DESCRIPTION: 'all docker host servers are down'
+                    HEALTH.DESCRIPTION: 'all docker host servers are down',
+                    "pools": self.http.stats(),
+                    "containers": self.inventory.stats()
                 }
         except Exception as e:
             return {
@@ -123,28 +139,26 @@ class HostedDockerFormation(DockerFormationBase, Component):
                 HEALTH.DESCRIPTION: e.message
             }
 
-    def get_available_host_port(self, docker_host, private_port):
-        """
-        We use double operation to ensure ports not conflicted, first we get ports from host machine, but in multiple
-        threads situation, the interval between two requests is too short, maybe the first thread do not get port
-        ended, so the host machine don't update ports in time, thus the second thread may get the same port.
-        To avoid this condition, we use static variable host_ports to cache the latest host_port_max_num ports.
-        Every thread visit variable host_ports is synchronized.
-        To save space, we will release the ports if the number over host_port_max_num.
-        :param docker_host:
-        :param private_port:
-        :return:
-        """
-        self.log.debug("try to assign docker port %d on server %r" % (private_port, docker_host))
-        containers = self.__containers_info(docker_host)
-        host_ports = flatten(map(lambda p: p['Ports'], containers))
+    def get_available_host_port(self, docker_host, expr_id, in_use=None):
+        """Reserve a free port of docker host for experiment
+
+        Ports are reserved in DB so they never conflict, even if several threads or servers assign ports of the same
+        docker host at the same time. See PortAllocator for details.
 
-        # todo if azure return -1
-        def sub(port):
-            return port["PublicPort"] if "PublicPort" in port else -1
+        :type docker_host: DockerHostServer
+        :param docker_host: the docker host
 
-        host_public_ports = map(lambda x: sub(x), host_ports)
-        return self.__get_available_host_port(host_public_ports, private_port)
+        :type expr_id: int
+        :param expr_id: id of the experiment
+
+        :type in_use: set|None
+        :param in_use: public ports of running containers on the docker host, see __get_host_ports_in_use
+
+        :rtype: int
+        :return the port reserved
+        """
+        self.log.debug("try to assign docker port on server %r for experiment %d" % (docker_host, expr_id))
+        return self.port_allocator.allocate(docker_host, expr_id, in_use)
 
     def stop(self, name, **kwargs):
         """
@@ -158,8 +172,9 @@ class HostedDockerFormation(DockerFormationBase, Component):
         docker_host = self.docker_host_manager.get_host_server_by_id(container.host_server_id)
         if self.__get_container(name, docker_host) is not None:
             containers_url = '%s/containers/%s/stop' % (self.get_vm_url(docker_host), name)
-            req = requests.post(containers_url)
+            req = self.http.post(containers_url)
             self.log.debug(req.content)
+            self.__refresh_inventory(docker_host, container.container_id)
         self.__stop_container(expr_id, container, docker_host)
 
     def delete(self, name, **kwargs):
@@ -173,8 +188,9 @@ class HostedDockerFormation(DockerFormationBase, Component):
         expr_id = kwargs["expr_id"]
         docker_host = self.docker_host_manager.get_host_server_by_id(container.host_server_id)
         containers_url = '%s/containers/%s?force=1' % (self.get_vm_url(docker_host), name)
-        req = requests.delete(containers_url)
+        req = self.http.delete(containers_url)
         self.log.debug(req.content)
+        self.__refresh_inventory(docker_host, container.container_id)
 
         self.__stop_container(expr_id, container, docker_host)
 
@@ -182,83 +198,21 @@ class HostedDockerFormation(DockerFormationBase, Component):
         """
         In this function, we create a container and then start a container
         :param unit: docker template unit
-        :param docker_host:
+        :param docker_host: host whose capacity for the container is reserved already, so that all containers of an
+            experiment are on the same host. If absent, a host is chosen for the container alone
         :return:
         """
-        virtual_environment = kwargs["virtual_environment"]
-        hackathon = kwargs["hackathon"]
-        experiment = kwargs["experiment"]
-        container_name = unit.get_name()
-        host_server = self.docker_host_manager.get_available_docker_host(1, hackathon)
-
-        container = DockerContainer(experiment,
-                                    name=container_name,
-                                    host_server_id=host_server.id,
-                                    virtual_environment=virtual_environment,
-                                    image=unit.get_image_with_tag())
-        self.db.add_object(container)
-        self.db.commit()
-
-        # port binding
-        ps = map(lambda p:
-                 [p.port_from, p.port_to],
-                 self.__assign_ports(experiment, host_server, virtual_environment, unit.get_ports()))
-
-        # guacamole config
-        guacamole = unit.get_remote()
-        port_cfg = filter(lambda p:
-                          p[DockerTemplateUnit.PORTS_PORT] == guacamole[DockerTemplateUnit.REMOTE_PORT],
-                          unit.get_ports())
-        if len(port_cfg) > 0:
-            gc = {
-                "displayname": container_name,
-                "name": container_name,
-                "protocol": guacamole[DockerTemplateUnit.REMOTE_PROTOCOL],
-                "hostname": host_server.public_ip,
-                "port": port_cfg[0]["public_port"]
-            }
-            if DockerTemplateUnit.REMOTE_USERNAME in guacamole:
-                gc["username"] = guacamole[DockerTemplateUnit.REMOTE_USERNAME]
-            if DockerTemplateUnit.REMOTE_PASSWORD in guacamole:
-                gc["password"] = guacamole[DockerTemplateUnit.REMOTE_PASSWORD]
-            # save guacamole config into DB
-            virtual_environment.remote_paras = json.dumps(gc)
-
-        exist = self.__get_container(container_name, host_server)
-        if exist is not None:
-            container.container_id = exist["Id"]
-            host_server.container_count += 1
-            self.db.commit()
-        else:
-            container_config = unit.get_container_config()
-            # create container
-            try:
-                container_create_result = self.__create(host_server, container_config, container_name)
-            except Exception as e:
-                self.log.error(e)
-                self.log.error("container %s fail to create" % container_name)
-                return None
-            container.container_id = container_create_result["Id"]
-            # start container
-            try:
-                self.__start(host_server, container_create_result["Id"])
-                host_server.container_count += 1
-                self.db.commit()
-            except Exception as e:
-                self.log.error(e)
-                self.log.error("container %s fail to start" % container["Id"])
-                return None
-            # check
-            if self.__get_container(container_name, host_server) is None:
-                self.log.error(
-                    "container %s has started, but can not find it in containers' info, maybe it exited again."
-                    % container_name)
-                return None
-
-        self.log.debug("starting container %s is ended ... " % container_name)
-        virtual_environment.status = VEStatus.RUNNING
-        self.db.commit()
-        return container
+        host_server = kwargs.get("docker_host")
+        if host_server is None:
+            # capacity of the host is reserved already
+            host_server = self.docker_host_manager.get_available_docker_host(1, kwargs["hackathon"])
+        try:
+            container = self.__add_container(unit, host_server, **kwargs)
+        except:
+            self.docker_host_manager.release_capacity(host_server.id, 1)
+            raise
+        # from now on the capacity is released along with the container by stop() or delete(), even if it fails to start
+        return self.__start_on_host(unit, host_server, container, **kwargs)
 
     def get_vm_url(self, docker_host):
         return 'http://%s:%d' % (docker_host.public_dns, docker_host.public_docker_api_port)
@@ -267,11 +221,14 @@ class HostedDockerFormation(DockerFormationBase, Component):
         docker_host, image_name, tag = context.docker_host, context.image_name, context.tag
         pull_image_url = self.get_vm_url(docker_host) + "/images/create?fromImage=" + image_name + '&tag=' + tag
         self.log.debug(" send request to pull image:" + pull_image_url)
-        return requests.post(pull_image_url)
+        # pulling image takes long
+        return self.http.post(pull_image_url,
+                              timeout=(self.http.connect_timeout,
+                                       self.util.safe_get_config("docker.http.pull_timeout_seconds", 1800)))
 
     def get_pulled_images(self, docker_host):
         get_images_url = self.get_vm_url(docker_host) + "/images/json?all=0"
-        current_images_info = json.loads(requests.get(get_images_url).content)  # [{},{},{}]
+        current_images_info = json.loads(self.http.get(get_images_url).content)  # [{},{},{}]
         current_images_tags = map(lambda x: x['RepoTags'], current_images_info)  # [[],[],[]]
         return flatten(current_images_tags)  # [ imange:tag, image:tag ]
 
@@ -279,7 +236,7 @@ class HostedDockerFormation(DockerFormationBase, Component):
         hackathons = self.hackathon_manager.get_online_hackathons()
         map(lambda h: self.__ensure_images_for_hackathon(h), hackathons)
 
-    def check_container_status_is_normal(self, docker_container):
+    def check_container_status_is_normal(self, docker_container, docker_host=None):
         """check container's running status on docker host
 
         if status is Running or Restarting returns True , else returns False
@@ -287,12 +244,20 @@ class HostedDockerFormation(DockerFormationBase, Component):
         :type docker_container: DockerContainer
         :param docker_container: the container that you want to check
 
+        :type docker_host: DockerHostServer
+        :param docker_host: the host of the container if loaded already, queried from DB if None
+
         :type boolean
         :return True: the container running status is running or restarting , else returns False
 
         """
-        docker_host = self.db.find_first_object_by(DockerHostServer, id=docker_container.host_server_id)
+        if docker_host is None:
+            docker_host = self.db.find_first_object_by(DockerHostServer, id=docker_container.host_server_id)
         if docker_host is not None:
+            inventory = self.__get_ready_inventory(docker_host)
+            if inventory is not None:
+                # only running(including restarting) containers are in the inventory
+                return inventory.get_by_id(docker_container.container_id) is not None
             container_info = self.__get_container_info_by_container_id(docker_host, docker_container.container_id)
             if container_info is None:
                 return False
@@ -312,7 +277,7 @@ class HostedDockerFormation(DockerFormationBase, Component):
         """
         try:
             ping_url = '%s/_ping' % self.__get_vm_url(docker_host)
-            req = requests.get(ping_url)
+            req = self.http.get(ping_url)
             self.log.debug(req.content)
             return req.status_code == 200 and req.content == 'OK'
         except Exception as e:
@@ -351,60 +316,134 @@ class HostedDockerFormation(DockerFormationBase, Component):
     def __get_vm_url(self, docker_host):
         return 'http://%s:%d' % (docker_host.public_dns, docker_host.public_docker_api_port)
 
-    def __clear_ports_cache(self):
+    def __add_container(self, unit, host_server, **kwargs):
+        """Save the container to start on the docker host into DB
+
+        :rtype: DockerContainer
         """
-        cache ports, if ports' number more than host_port_max_num, release the ports.
-        But if there is a thread apply new ports, we will do this operation in the next loop.
-        Because the host machine do not update the ports information,
-        if we release ports now, the new ports will be lost.
-        :return:
+        container = DockerContainer(kwargs["experiment"],
+                                    name=unit.get_name(),
+                                    host_server_id=host_server.id,
+                                    virtual_environment=kwargs["virtual_environment"],
+                                    image=unit.get_image_with_tag())
+        self.db.add_object(container)
+        return container
+
+    def __start_on_host(self, unit, host_server, container, **kwargs):
+        """Create and start a container on the docker host
+
+        :rtype: DockerContainer
+        :return the container started or None if failed
         """
-        num = self.db.count(Experiment, Experiment.status == EStatus.STARTING)
-        if num > 0:
-            self.log.debug("there are %d experiment is starting, host ports will updated in next loop" % num)
-            return
-        self.log.debug("-----release ports cache successfully------")
-        self.host_ports = []
+        virtual_environment = kwargs["virtual_environment"]
+        experiment = kwargs["experiment"]
+        container_name = unit.get_name()
+
+        # port binding
+        ps = map(lambda p:
+                 [p.port_from, p.port_to],
+                 self.__assign_ports(experiment, host_server, virtual_environment, unit.get_ports()))
+
+        # guacamole config
+        guacamole = unit.get_remote()
+        port_cfg = filter(lambda p:
+                          p[DockerTemplateUnit.PORTS_PORT] == guacamole[DockerTemplateUnit.REMOTE_PORT],
+                          unit.get_ports())
+        if len(port_cfg) > 0:
+            gc = {
+                "displayname": container_name,
+                "name": container_name,
+                "protocol": guacamole[DockerTemplateUnit.REMOTE_PROTOCOL],
+                "hostname": host_server.public_ip,
+                "port": port_cfg[0]["public_port"]
+            }
+            if DockerTemplateUnit.REMOTE_USERNAME in guacamole:
+                gc["username"] = guacamole[DockerTemplateUnit.REMOTE_USERNAME]
+            if DockerTemplateUnit.REMOTE_PASSWORD in guacamole:
+                gc["password"] = guacamole[DockerTemplateUnit.REMOTE_PASSWORD]
+            # save guacamole config into DB
+            virtual_environment.remote_paras = json.dumps(gc)
+
+        exist = self.__get_container(container_name, host_server)
+        if exist is not None:
+            container.container_id = exist["Id"]
+            self.db.commit()
+        else:
+            container_config = unit.get_container_config()
+            # create container
+            try:
+                container_create_result = self.__create(host_server, container_config, container_name)
+            except Exception as e:
+                self.log.error(e)
+                self.log.error("container %s fail to create" % container_name)
+                return None
+            container.container_id = container_create_result["Id"]
+            # start container
+            try:
+                self.__start(host_server, container_create_result["Id"])
+                # don't wait for the event, the container is checked right after
+                self.__refresh_inventory(host_server, container_create_result["Id"])
+                self.db.commit()
+            except Exception as e:
+                self.log.error(e)
+                self.log.error("container %s fail to start" % container["Id"])
+                return None
+            # check
+            if self.__get_container(container_name, host_server) is None:
+                self.log.error(
+                    "container %s has started, but can not find it in containers' info, maybe it exited again."
+                    % container_name)
+                return None
+
+        self.log.debug("starting container %s is ended ... " % container_name)
+        virtual_environment.status = VEStatus.RUNNING
+        self.db.commit()
+        return container
 
     def __stop_container(self, expr_id, container, docker_host):
         self.__release_ports(expr_id, docker_host)
-        docker_host.container_count -= 1
-        if docker_host.container_count < 0:
-            docker_host.container_count = 0
-        self.db.commit()
+        self.docker_host_manager.release_capacity(docker_host.id, 1)
 
     def __containers_info(self, docker_host):
         containers_url = '%s/containers/json' % self.get_vm_url(docker_host)
-        req = requests.get(containers_url)
+        req = self.http.get(containers_url)
         self.log.debug(req.content)
         return self.util.convert(json.loads(req.content))
 
-    def __get_available_host_port(self, port_bindings, port):
+    def __get_host_ports_in_use(self, docker_host):
+        """Get public ports of running containers on docker host
+
+        Containers not started by the allocator, for example started manually, might occupy ports too.
+
+        :rtype: set
         """
-        simple lock mechanism, visit static variable ports synchronize, because port_bindings is not in real-time,
-        so we should cache the latest ports, when the cache ports number is more than host_port_max_num,
-        we will release it to save space.
-        :param port_bindings:
-        :param port:
-        :return:
+        inventory = self.__get_ready_inventory(docker_host)
+        containers = inventory.list() if inventory is not None else self.__containers_info(docker_host)
+        host_ports = flatten(map(lambda c: c['Ports'], containers))
+        return set(p["PublicPort"] for p in host_ports if "PublicPort" in p)
+
+    def __get_ready_inventory(self, docker_host):
+        """Get the container inventory of docker host
+
+        :rtype: HostContainerInventory
+        :return the inventory or None if it's not ready, in which case docker host should be queried directly
         """
-        self.lock.acquire()
+        inventory = self.inventory.get(docker_host, self.get_vm_url(docker_host))
+        return inventory if inventory.ready else None
+
+    def __refresh_inventory(self, docker_host, container_id):
+        if not container_id:
+            return
         try:
-            host_port = port + 10000
-            while host_port in port_bindings or host_port in self.host_ports:
-                host_port += 1
-            if host_port >= 65535:
-                self.log.error("port used up on this host server")
-                raise Exception("no port available")
-            if len(self.host_ports) >= self.host_port_max_num:
-                self.__clear_ports_cache()
-            self.host_ports.append(host_port)
-            self.log.debug("host_port is %d " % host_port)
-            return host_port
-        finally:
-            self.lock.release()
+            self.inventory.get(docker_host, self.get_vm_url(docker_host)).refresh(container_id)
+        except Exception as e:
+            self.log.error(e)
 
     def __get_container(self, name, docker_host):
+        inventory = self.__get_ready_inventory(docker_host)
+        if inventory is not None:
+            return inventory.get_by_name(name)
+
         containers = self.__containers_info(docker_host)
         return next((c for c in containers if name in c["Names"] or '/' + name in c["Names"]), None)
 
@@ -417,7 +456,7 @@ class HostedDockerFormation(DockerFormationBase, Component):
         :return:
         """
         containers_url = '%s/containers/create?name=%s' % (self.get_vm_url(docker_host), container_name)
-        req = requests.post(containers_url, data=json.dumps(container_config), headers=self.application_json)
+        req = self.http.post(containers_url, data=json.dumps(container_config), headers=self.application_json)
         self.log.debug(req.content)
         container = json.loads(req.content)
         if container is None:
@@ -432,7 +471,7 @@ class HostedDockerFormation(DockerFormationBase, Component):
         :return:
         """
         url = '%s/containers/%s/start' % (self.get_vm_url(docker_host), container_id)
-        req = requests.post(url, headers=self.application_json)
+        req = self.http.post(url, headers=self.application_json)
         self.log.debug(req.content)
 
     def __get_available_public_ports(self, expr_id, host_server, host_ports):
@@ -462,10 +501,10 @@ class HostedDockerFormation(DockerFormationBase, Component):
         :return:
         """
         # get 'host_port'
+        in_use = self.__get_host_ports_in_use(host_server)
         map(lambda p:
             p.update(
-                {DockerTemplateUnit.PORTS_HOST_PORT: self.get_available_host_port(host_server, p[
-                    DockerTemplateUnit.PORTS_PORT])}
+                {DockerTemplateUnit.PORTS_HOST_PORT: self.get_available_host_port(host_server, expr.id, in_use)}
             ),
             port_cfg)
 
@@ -476,47 +515,48 @@ class HostedDockerFormation(DockerFormationBase, Component):
             map(lambda cfg: cfg.update({DockerTemplateUnit.PORTS_PUBLIC_PORT: cfg[DockerTemplateUnit.PORTS_HOST_PORT]}),
                 public_ports_cfg)
         else:
-            public_ports = self.__get_available_public_ports(expr.id, host_server, host_ports)
+            with self.endpoint_locks.setdefault(host_server.id, Lock()):
+                public_ports = self.__get_available_public_ports(expr.id, host_server, host_ports)
             for i in range(len(public_ports_cfg)):
                 public_ports_cfg[i][DockerTemplateUnit.PORTS_PUBLIC_PORT] = public_ports[i]
 
         binding_dockers = []
 
-        # update port binding
-        for public_cfg in public_ports_cfg:
-            binding_cloud_service = PortBinding(name=public_cfg[DockerTemplateUnit.PORTS_NAME],
-                                                port_from=public_cfg[DockerTemplateUnit.PORTS_PUBLIC_PORT],
-                                                port_to=public_cfg[DockerTemplateUnit.PORTS_HOST_PORT],
-                                                binding_type=PortBindingType.CLOUD_SERVICE,
-                                                binding_resource_id=host_server.id,
-                                                virtual_environment=ve,
-                                                experiment=expr,
-                                                url=public_cfg[DockerTemplateUnit.PORTS_URL]
-                                                if DockerTemplateUnit.PORTS_URL in public_cfg else None)
-            binding_docker = PortBinding(name=public_cfg[DockerTemplateUnit.PORTS_NAME],
-                                         port_from=public_cfg[DockerTemplateUnit.PORTS_HOST_PORT],
-                                         port_to=public_cfg[DockerTemplateUnit.PORTS_PORT],
-                                         binding_type=PortBindingType.DOCKER,
-                                         binding_resource_id=host_server.id,
-                                         virtual_environment=ve,
-                                         experiment=expr)
-            binding_dockers.append(binding_docker)
-            self.db.add_object(binding_cloud_service)
-            self.db.add_object(binding_docker)
-        self.db.commit()
-
-        local_ports_cfg = filter(lambda p: DockerTemplateUnit.PORTS_PUBLIC not in p, port_cfg)
-        for local_cfg in local_ports_cfg:
-            port_binding = PortBinding(name=local_cfg[DockerTemplateUnit.PORTS_NAME],
-                                       port_from=local_cfg[DockerTemplateUnit.PORTS_HOST_PORT],
-                                       port_to=local_cfg[DockerTemplateUnit.PORTS_PORT],
-                                       binding_type=PortBindingType.DOCKER,
-                                       binding_resource_id=host_server.id,
-                                       virtual_environment=ve,
-                                       experiment=expr)
-            binding_dockers.append(port_binding)
-            self.db.add_object(port_binding)
-        self.db.commit()
+        # save all port bindings in a single unit of work
+        with self.db.transaction():
+            # update port binding
+            for public_cfg in public_ports_cfg:
+                binding_cloud_service = PortBinding(name=public_cfg[DockerTemplateUnit.PORTS_NAME],
+                                                    port_from=public_cfg[DockerTemplateUnit.PORTS_PUBLIC_PORT],
+                                                    port_to=public_cfg[DockerTemplateUnit.PORTS_HOST_PORT],
+                                                    binding_type=PortBindingType.CLOUD_SERVICE,
+                                                    binding_resource_id=host_server.id,
+                                                    virtual_environment=ve,
+                                                    experiment=expr,
+                                                    url=public_cfg[DockerTemplateUnit.PORTS_URL]
+                                                    if DockerTemplateUnit.PORTS_URL in public_cfg else None)
+                binding_docker = PortBinding(name=public_cfg[DockerTemplateUnit.PORTS_NAME],
+                                             port_from=public_cfg[DockerTemplateUnit.PORTS_HOST_PORT],
+                                             port_to=public_cfg[DockerTemplateUnit.PORTS_PORT],
+                                             binding_type=PortBindingType.DOCKER,
+                                             binding_resource_id=host_server.id,
+                                             virtual_environment=ve,
+                                             experiment=expr)
+                binding_dockers.append(binding_docker)
+                self.db.add_object(binding_cloud_service)
+                self.db.add_object(binding_docker)
+
+            local_ports_cfg = filter(lambda p: DockerTemplateUnit.PORTS_PUBLIC not in p, port_cfg)
+            for local_cfg in local_ports_cfg:
+                port_binding = PortBinding(name=local_cfg[DockerTemplateUnit.PORTS_NAME],
+                                           port_from=local_cfg[DockerTemplateUnit.PORTS_HOST_PORT],
+                                           port_to=local_cfg[DockerTemplateUnit.PORTS_PORT],
+                                           binding_type=PortBindingType.DOCKER,
+                                           binding_resource_id=host_server.id,
+                                           virtual_environment=ve,
+                                           experiment=expr)
+                binding_dockers.append(port_binding)
+                self.db.add_object(port_binding)
         return binding_dockers
 
     def __release_ports(self, expr_id, host_server):
@@ -531,10 +571,12 @@ class HostedDockerFormation(DockerFormationBase, Component):
                 ports_binding)
             ports_to = [d.port_to for d in docker_binding]
             if len(ports_to) != 0:
-                self.__release_public_ports(expr_id, host_server, ports_to)
-            for port in ports_binding:
-                self.db.delete_object(port)
-            self.db.commit()
+                with self.endpoint_locks.setdefault(host_server.id, Lock()):
+                    self.__release_public_ports(expr_id, host_server, ports_to)
+            with self.db.transaction():
+                for port in ports_binding:
+                    self.db.delete_object(port)
+                self.port_allocator.release(expr_id)
         self.log.debug("End to release ports: expr_id: %d, host_server: %r" % (expr_id, host_server))
 
     def __release_public_ports(self, expr_id, host_server, host_ports):
@@ -557,7 +599,7 @@ class HostedDockerFormation(DockerFormationBase, Component):
         """
         try:
             get_container_url = self.get_vm_url(docker_host) + "/container/%s/json?all=0" % container_id
-            req = requests.get(get_container_url)
+            req = self.http.get(get_container_url)
             if req.status_code >= 200 and req.status_code < 300 :
                 container_info = json.loads(req.content)
                 return container_info
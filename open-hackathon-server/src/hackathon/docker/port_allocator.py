@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("..")
+import threading
+from collections import deque
+
+from hackathon import Component
+from hackathon.database.models import HostPortReservation
+
+__all__ = ["PortAllocator"]
+
+
+class HostPortBitmap(object):
+    """Used ports of a docker host in range [start, end), one bit per port
+
+    Free ports are taken from a cursor that only moves forward, and ports released are queued to be taken first. So
+    both take() and release() are O(1), amortized over a scan of the range.
+    """
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.bits = bytearray((end - start + 7) / 8)
+        self.cursor = start
+        self.released = deque()
+        self.used = 0
+
+    def is_used(self, port):
+        offset = port - self.start
+        return (self.bits[offset >> 3] >> (offset & 7)) & 1 == 1
+
+    def mark(self, port):
+        """Mark a port as used. Ports out of the range are ignored
+
+        :rtype: bool
+        :return True if the port was free before
+        """
+        if not self.start <= port < self.end or self.is_used(port):
+            return False
+        offset = port - self.start
+        self.bits[offset >> 3] |= 1 << (offset & 7)
+        self.used += 1
+        return True
+
+    def release(self, port):
+        """Mark a port as free so that it can be taken again"""
+        if not self.start <= port < self.end or not self.is_used(port):
+            return
+        offset = port - self.start
+        self.bits[offset >> 3] &= ~(1 << (offset & 7)) & 0xff
+        self.used -= 1
+        self.released.append(port)
+
+    def take(self, in_use=None):
+        """Take a free port and mark it as used
+
+        :type in_use: set|None
+        :param in_use: ports in use on the docker host but maybe not reserved through the allocator. They are marked
+            as used when met
+
+        :rtype: int|None
+        :return a free port or None if the range is used up
+        """
+        while self.released:
+            port = self.released.popleft()
+            if self.__try_mark(port, in_use):
+                return port
+
+        while self.cursor < self.end:
+            port = self.cursor
+            self.cursor += 1
+            if self.__try_mark(port, in_use):
+                return port
+        return None
+
+    def __try_mark(self, port, in_use):
+        if self.is_used(port):
+            return False
+        self.mark(port)
+        return in_use is None or port not in in_use
+
+
+class PortAllocator(Component):
+    """Allocate ports of docker hosts to experiments
+
+    Every port assigned is reserved in table host_port_reservation whose unique key (docker_host_server_id, port) makes
+    the reservation atomic across threads and processes. A bitmap per docker host, loaded from the reservations, is
+    kept in memory to pick a candidate port without querying DB. A candidate might have been reserved by another
+    process already, it's marked as used and the next one is tried. Reservations released by other processes are picked
+    up once the range is scanned through and the bitmap is reloaded.
+
+    :Example:
+        allocator = PortAllocator()
+        port = allocator.allocate(docker_host, expr.id)  # 10000
+        allocator.release(expr.id)
+    """
+
+    def __init__(self):
+        self.start = self.util.safe_get_config("docker.host_ports.start", 10000)
+        self.end = self.util.safe_get_config("docker.host_ports.end", 65535)
+        self.lock = threading.Lock()
+        self.bitmaps = {}  # docker_host.id -> HostPortBitmap
+
+    def allocate(self, docker_host, expr_id, in_use=None):
+        """Reserve a free port of docker host for experiment
+
+        :type docker_host: DockerHostServer
+        :param docker_host: the docker host
+
+        :type expr_id: int
+        :param expr_id: id of experiment that the port is reserved for
+
+        :type in_use: set|None
+        :param in_use: public ports of running containers on the docker host, if known
+
+        :rtype: int
+        :return the port reserved
+        """
+        reloaded = False
+        while True:
+            with self.lock:
+                bitmap = self.__get_bitmap(docker_host.id)
+                port = bitmap.take(in_use)
+                if port is None and not reloaded:
+                    # ports released by other processes are only known from DB
+                    bitmap = self.__load_bitmap(docker_host.id)
+                    reloaded = True
+                    port = bitmap.take(in_use)
+            if port is None:
+                self.log.error("port used up on docker host %d" % docker_host.id)
+                raise Exception("no port available")
+
+            # the port is marked in bitmap already, reserve it out of the lock
+            if self.db.add_object_if_absent(HostPortReservation,
+                                            docker_host_server_id=docker_host.id,
+                                            port=port,
+                                            experiment_id=expr_id):
+                self.log.debug("host_port is %d " % port)
+                return port
+            self.log.debug("port %d of docker host %d is reserved by others" % (port, docker_host.id))
+
+    def release(self, expr_id):
+        """Release all ports reserved for experiment
+
+        :type expr_id: int
+        :param expr_id: id of experiment
+        """
+        reservations = self.db.find_all_objects_by(HostPortReservation, experiment_id=expr_id)
+        if len(reservations) == 0:
+            return
+        ports = [(r.docker_host_server_id, r.port) for r in reservations]
+        self.db.delete_all_objects_by(HostPortReservation, experiment_id=expr_id)
+
+        with self.lock:
+            for host_id, port in ports:
+                bitmap = self.bitmaps.get(host_id)
+                if bitmap is not None:
+                    bitmap.release(port)
+
+    def stats(self):
+        """Return the count of ports used in the bitmap of every docker host"""
+        with self.lock:
+            return dict((host_id, b.used) for host_id, b in self.bitmaps.iteritems())
+
+    def __get_bitmap(self, host_id):
+        bitmap = self.bitmaps.get(host_id)
+        if bitmap is None:
+            bitmap = self.__load_bitmap(host_id)
+        return bitmap
+
+    def __load_bitmap(self, host_id):
+        bitmap = HostPortBitmap(self.start, self.end)
+        for r in self.db.find_all_objects_by(HostPortReservation, docker_host_server_id=host_id):
+            bitmap.mark(r.port)
+        self.bitmaps[host_id] = bitmap
+        return bitmap
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("..")
+
+from sqlalchemy.orm import joinedload
+
+from hackathon.constants import PortBindingType
+from hackathon.database.models import (
+    Experiment,
+    VirtualEnvironment,
+    PortBinding,
+    DockerHostServer,
+    AzureVirtualMachine,
+    AzureEndpoint,
+)
+
+__all__ = ["ExprGraph"]
+
+
+class ExprGraph(object):
+    """An experiment with everything that its status report needs, loaded in a fixed number of queries
+
+    Relationships of VirtualEnvironment, PortBinding and AzureVirtualMachine are dynamic, which query DB every time
+    they are accessed and can't be eager loaded. So they are loaded once per table here and linked in memory:
+        1. experiment with its hackathon, template and user
+        2. virtual environments with their containers
+        3. port bindings
+        4. docker hosts of the containers and port bindings
+        5. azure virtual machines
+        6. azure endpoints
+    Queries of empty tables are skipped, for example 5 and 6 for docker experiments.
+
+    :Example:
+        graph = ExprGraph.load(self.db, expr_id)
+        for ve in graph.virtual_environments:
+            for p in graph.port_bindings_of(ve):
+                host = graph.docker_hosts.get(p.binding_resource_id)
+    """
+
+    def __init__(self, expr):
+        self.expr = expr
+        self.virtual_environments = []
+        self.port_bindings = {}  # virtual_environment.id -> [PortBinding]
+        self.docker_hosts = {}  # docker_host.id -> DockerHostServer
+        self.azure_virtual_machines = {}  # virtual_environment.id -> [AzureVirtualMachine]
+        self.azure_endpoints = {}  # azure_virtual_machine.id -> [AzureEndpoint]
+
+    @staticmethod
+    def load(db, expr_id):
+        """Load the experiment graph
+
+        :type db: SQLAlchemyAdapter
+        :param db: the db adapter
+
+        :type expr_id: int
+        :param expr_id: id of the experiment
+
+        :rtype: ExprGraph
+        :return the graph or None if experiment not found
+        """
+        session = db.session()
+        expr = session.query(Experiment) \
+            .options(joinedload(Experiment.hackathon), joinedload(Experiment.template), joinedload(Experiment.user)) \
+            .filter(Experiment.id == expr_id) \
+            .first()
+        if expr is None:
+            return None
+
+        graph = ExprGraph(expr)
+        # container is a backref of DockerContainer which is added when mappers configured, so refer it by name
+        graph.virtual_environments = session.query(VirtualEnvironment) \
+            .options(joinedload("container")) \
+            .filter(VirtualEnvironment.experiment_id == expr_id) \
+            .order_by(VirtualEnvironment.id) \
+            .all()
+        if len(graph.virtual_environments) == 0:
+            return graph
+
+        for p in session.query(PortBinding).filter(PortBinding.experiment_id == expr_id).order_by(PortBinding.id):
+            graph.port_bindings.setdefault(p.virtual_environment_id, []).append(p)
+
+        host_ids = set(ve.container.host_server_id for ve in graph.virtual_environments if ve.container is not None)
+        host_ids.update(p.binding_resource_id for bindings in graph.port_bindings.values() for p in bindings
+                        if p.binding_type in (PortBindingType.DOCKER, PortBindingType.CLOUD_SERVICE))
+        host_ids.discard(None)
+        if host_ids:
+            hosts = session.query(DockerHostServer).filter(DockerHostServer.id.in_(host_ids)).all()
+            graph.docker_hosts = dict((h.id, h) for h in hosts)
+
+        ve_ids = [ve.id for ve in graph.virtual_environments]
+        vms = session.query(AzureVirtualMachine) \
+            .filter(AzureVirtualMachine.virtual_environment_id.in_(ve_ids)) \
+            .order_by(AzureVirtualMachine.id) \
+            .all()
+        for vm in vms:
+            graph.azure_virtual_machines.setdefault(vm.virtual_environment_id, []).append(vm)
+        if vms:
+            endpoints = session.query(AzureEndpoint) \
+                .filter(AzureEndpoint.virtual_machine_id.in_([vm.id for vm in vms])) \
+                .order_by(AzureEndpoint.id) \
+                .all()
+            for ep in endpoints:
+                graph.azure_endpoints.setdefault(ep.virtual_machine_id, []).append(ep)
+        return graph
+
+    def port_bindings_of(self, ve):
+        return self.port_bindings.get(ve.id, [])
+
+    def azure_virtual_machines_of(self, ve):
+        return self.azure_virtual_machines.get(ve.id, [])
+
+    def azure_endpoints_of(self, vm):
+        return self.azure_endpoints.get(vm.id, [])
@@ -44,30 +44,27 @@ from hackathon.constants import (
     AVMStatus,
 )
 from hackathon.database.models import (
-    VirtualEnvironment,
-    DockerHostServer,
     Experiment,
     Hackathon,
     Template,
     User,
-    HackathonTemplateRel)
+    PortBinding,
+    HostPortReservation)
 
 from hackathon.hackathon_response import (
     internal_server_error,
+    service_unavailable,
     precondition_failed,
     not_found,
     ok,
 )
 
-from hackathon.template.docker_template_unit import (
-    DockerTemplateUnit,
-)
 from hackathon.template.base_template import (
     BaseTemplate,
 )
+from hackathon.expr.expr_graph import ExprGraph
 import json
-import random
-import string
+import time
 from sqlalchemy import (
     and_,
 )
@@ -85,13 +82,20 @@ class ExprManager(Component):
     docker = RequiredFeature("docker")
     scheduler = RequiredFeature("scheduler")
     azure_vm_service = RequiredFeature("azure_vm_service")
+    expr_recycler = RequiredFeature("expr_recycler")
+    heart_beat_buffer = RequiredFeature("heart_beat_buffer")
+    expr_pre_allocator = RequiredFeature("expr_pre_allocator")
+    expr_starter = RequiredFeature("expr_starter")
+    expr_status_watcher = RequiredFeature("expr_status_watcher")
 
-    def start_expr(self, hackathon_name, template_name, user_id):
+    def start_expr(self, hackathon_name, template_name, user_id, asynchronous=False):
         """
         A user uses a template to start a experiment under a hackathon
         :param hackathon_name:
         :param template_name:
         :param user_id:
+        :param asynchronous: if True, return the experiment with status STARTING at once and start it in background.
+            Poll get_expr_status for its progress, including the position in start queue
         :return:
         """
         hack_temp = self.__check_template_status(hackathon_name, template_name)
@@ -114,15 +118,35 @@ class ExprManager(Component):
                 return self.__report_expr_status(expr)
 
         # new expr
-        return self.__start_new_expr(hackathon, template, user_id)
+        return self.__start_new_expr(hackathon, template, user_id, asynchronous)
+
+    def start_pre_allocated_expr(self, hackathon_name, template_name):
+        """Start an experiment planned by ExprPreAllocator for DefaultUserID
+
+        The planner limits pre-allocated experiments per hackathon by its pre_allocate_number already, so the cap of
+        'pre_allocate.docker' and 'pre_allocate.azure' per template doesn't apply.
+
+        :rtype: dict|None
+        :return same as start_expr
+        """
+        hack_temp = self.__check_template_status(hackathon_name, template_name)
+        if hack_temp is None:
+            return not_found('hackathon or template is not existed')
+        return self.__start_new_expr(hack_temp[0], hack_temp[1], ReservedUser.DefaultUserID, capped=False)
 
     def heart_beat(self, expr_id):
-        expr = self.db.find_first_object_by(Experiment, id=expr_id, status=EStatus.RUNNING)
-        if expr is None:
-            return not_found('Experiment does not running')
+        """Record heart beat of experiment. It's buffered in memory and written into DB in batch
 
-        expr.last_heart_beat_time = self.util.get_now()
-        self.db.commit()
+        Experiments already in the buffer were running when their previous heart beats received, so DB won't be queried
+        again until the buffer is flushed.
+        """
+        expr_id = int(expr_id)
+        if self.heart_beat_buffer.get(expr_id) is None:
+            expr = self.db.find_first_object_by(Experiment, id=expr_id, status=EStatus.RUNNING)
+            if expr is None:
+                return not_found('Experiment does not running')
+
+        self.heart_beat_buffer.beat(expr_id, self.util.get_now())
         return ok('OK')
 
     def stop_expr(self, expr_id, force=0):
@@ -156,6 +180,7 @@ class ExprManager(Component):
                 else:
                     expr.status = EStatus.STOPPED
                 self.db.commit()
+                self.expr_status_watcher.notify(expr_id)
             else:
                 try:
                     # todo support delete azure vm
@@ -180,37 +205,88 @@ class ExprManager(Component):
         else:
             return not_found('Experiment Not found')
 
+    def watch_expr_status(self, expr_id, etag=None, wait=0):
+        """Get the status of experiment unless it's not changed from etag, waiting at most wait seconds for a change
+
+        Reports are cached and woken up by the status changes, see ExprStatusWatcher. Neither DB nor docker is queried
+        while the cached report is fresh.
+
+        :type expr_id: int
+        :param expr_id: id of the experiment
+
+        :type etag: str|unicode|None
+        :param etag: the ETag of the report that client has
+
+        :type wait: int
+        :param wait: seconds to wait, no more than 'expr_status.max_wait_seconds'
+
+        :rtype: tuple
+        :return (report, etag of the report). report is None if it's not changed from etag, etag is None if report
+            is an error
+        """
+        deadline = time.time() + min(wait, self.util.safe_get_config("expr_status.max_wait_seconds", 30))
+        while True:
+            cached = self.expr_status_watcher.get(expr_id)
+            if cached is None:
+                version = self.expr_status_watcher.reports.version
+                report = self.get_expr_status(expr_id)
+                if "error" in report:
+                    return report, None
+                cached = self.expr_status_watcher.put(expr_id, report, version)
+            if cached[0] != etag:
+                return cached[1], cached[0]
+
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None, etag
+            # don't hold the DB connection while waiting
+            self.db.remove()
+            # changes by other servers are noticed once the report expires
+            self.expr_status_watcher.wait(expr_id, min(remaining, self.expr_status_watcher.ttl_seconds))
+
     def get_expr_list_by_user_id(self, user_id):
         return map(lambda u: u.dic(),
                    self.db.find_all_objects(Experiment, and_(Experiment.user_id == user_id,
                                                              Experiment.status < 5)))
 
-    def get_expr_list_by_hackathon_id(self, hackathon_id, **kwargs):
+    def get_expr_list_by_hackathon_id(self, hackathon_id, after_id=None, limit=None, fields=None, **kwargs):
+        """Get a page of experiments of hackathon filtered by user name and status
+
+        :type after_id: int
+        :param after_id: id of the last experiment of previous page
+
+        :type limit: int
+        :param limit: max number of experiments
+
+        :type fields: list
+        :param fields: columns of Experiment to return, 'user_info' for user info. None for all
+
+        :rtype: list
+        :return list of experiments along with user info
+        """
+        with_user = fields is None or "user_info" in fields
+        if with_user and fields is not None:
+            fields = fields + ["user_id"]
+
         condition = self.__get_filter_condition(hackathon_id, **kwargs)
-        experiments = self.db.find_all_objects(Experiment, condition)
-        return map(lambda u: self.__get_expr_with_user_info(u), experiments)
+        experiments = self.db.find_page(Experiment, [condition], after_id, limit, fields)
+        if with_user:
+            users = self.user_manager.users_display_info([e["user_id"] for e in experiments])
+            for e in experiments:
+                e['user_info'] = users.get(e["user_id"])
+        return experiments
 
     def scheduler_recycle_expr(self):
         """recycle experiment acrroding to hackathon basic info on recycle configuration
 
         According to the hackathon's basic info on 'recycle_enabled', find out time out experiments
-        Then call function to recycle them
+        Then call function to recycle them. See ExprRecycler for details
 
-        :return:
+        :rtype: dict
+        :return metrics of the recycle run, None if experiments are being recycled by another process
         """
         self.log.debug("start checking recyclable experiment ... ")
-        for hackathon in self.hackathon_manager.get_recyclable_hackathon_list():
-            # check recycle enabled
-            mins = self.hackathon_manager.get_recycle_minutes(hackathon)
-            expr_time_cond = Experiment.create_time < self.util.get_now() - timedelta(minutes=mins)
-            status_cond = Experiment.status == EStatus.RUNNING
-            # filter out the experiments that need to be recycled
-            exprs = self.db.find_all_objects(Experiment,
-                                             status_cond,
-                                             expr_time_cond,
-                                             Experiment.hackathon_id == hackathon.id)
-            for expr in exprs:
-                self.__recycle_expr(expr)
+        return self.expr_recycler.recycle()
 
     def schedule_pre_allocate_expr_job(self):
         next_run_time = self.util.get_now() + timedelta(seconds=1)
@@ -220,50 +296,48 @@ class ExprManager(Component):
                                     next_run_time=next_run_time,
                                     minutes=self.util.safe_get_config("pre_allocate.check_interval_minutes", 5))
 
+    def schedule_recover_orphaned_expr_job(self):
+        next_run_time = self.util.get_now() + timedelta(seconds=30)
+        self.scheduler.add_interval(feature="expr_manager",
+                                    method="recover_orphaned_expr",
+                                    id="recover_orphaned_expr",
+                                    next_run_time=next_run_time,
+                                    minutes=self.util.safe_get_config("start_expr.recover_interval_minutes", 5))
+
+    def recover_orphaned_expr(self):
+        """Fail the docker experiments left in STARTING by a lost start queue
+
+        The start queue of ExprStarter is in memory, so experiments queued or being started stay STARTING forever if
+        their process stops. The process renews a lease on them, see ExprStarter. An experiment is orphaned if its lease
+        is older than 'start_expr.lease_timeout_seconds', whichever process runs this job. It's marked as FAILED so that
+        the user can start a new one, then its containers are deleted and its ports are released. Azure experiments are
+        left to the azure formation, which updates their status.
+
+        :rtype: int
+        :return count of experiments recovered
+        """
+        timeout = self.util.safe_get_config("start_expr.lease_timeout_seconds", 300)
+        deadline = self.util.get_now() - timedelta(seconds=timeout)
+        exprs = self.db.find_all_objects(Experiment,
+                                         Experiment.status == EStatus.STARTING,
+                                         Experiment.last_heart_beat_time < deadline)
+        recovered = 0
+        for expr in exprs:
+            if expr.template.provider != VE_PROVIDER.DOCKER or self.expr_starter.owns(expr.id):
+                continue
+            if self.__fail_orphaned_expr(expr, deadline):
+                recovered += 1
+        if recovered > 0:
+            self.log.info("%d orphaned experiments are marked as failed" % recovered)
+        return recovered
+
     def pre_allocate_expr(self):
-        # only deal with online hackathons
-        hackathon_id_list = self.hackathon_manager.get_pre_allocate_enabled_hackathon_list()
-        htrs = self.db.find_all_objects(HackathonTemplateRel, HackathonTemplateRel.hackathon_id.in_(hackathon_id_list))
-        templates = map(lambda x: x.template, htrs)
-        for template in templates:
-            try:
-                pre_num = self.hackathon_manager.get_pre_allocate_number(template.hackathon)
-                curr_num = self.db.count(Experiment,
-                                         Experiment.user_id == ReservedUser.DefaultUserID,
-                                         Experiment.template_id == template.id,
-                                         (Experiment.status == EStatus.STARTING) | (
-                                             Experiment.status == EStatus.RUNNING))
-                # todo test azure, config num
-                if template.provider == VE_PROVIDER.AZURE:
-                    if curr_num < pre_num:
-                        remain_num = pre_num - curr_num
-                        start_num = self.db.count_by(Experiment,
-                                                     user_id=ReservedUser.DefaultUserID,
-                                                     template=template,
-                                                     status=EStatus.STARTING)
-                        if start_num > 0:
-                            self.log.debug("there is an azure env starting, will check later ... ")
-                            return
-                        else:
-                            self.log.debug(
-                                "no starting template: %s , remain num is %d ... " % (template.name, remain_num))
-                            self.start_expr(template.hackathon.name, template.name, ReservedUser.DefaultUserID)
-                            break
-                            # curr_num += 1
-                            # self.log.debug("all template %s start complete" % template.name)
-                elif template.provider == VE_PROVIDER.DOCKER:
-                    self.log.debug(
-                        "template name is %s, hackathon name is %s" % (template.name, template.hackathon.name))
-                    if curr_num < pre_num:
-                        remain_num = pre_num - curr_num
-                        self.log.debug("no idle template: %s, remain num is %d ... " % (template.name, remain_num))
-                        self.start_expr(template.hackathon.name, template.name, ReservedUser.DefaultUserID)
-                        # curr_num += 1
-                        break
-                        # self.log.debug("all template %s start complete" % template.name)
-            except Exception as e:
-                self.log.error(e)
-                self.log.error("check default experiment failed")
+        """Start pre-allocated experiments for online hackathons. See ExprPreAllocator for details
+
+        :rtype: dict
+        :return metrics of the pre-allocate cycle
+        """
+        return self.expr_pre_allocator.pre_allocate()
 
     def assign_expr_to_admin(self, expr):
         """assign expr to admin to trun expr into pre_allocate_expr
@@ -271,52 +345,111 @@ class ExprManager(Component):
         :type expr: Experiment
         :param expr: which expr you want to assign
 
-        :return:
+        :rtype: bool
+        :return True if assigned successfully otherwise False
         """
         try:
             self.db.update_object(expr, user_id=ReservedUser.DefaultUserID)
+            return True
         except Exception as e:
             self.log.error(e)
+            return False
+
+    def recycle_expr(self, expr):
+        """recycle expr
+
+        If it is a docker experiment , stop it ; else assign it to default user
+
+        :type expr: Experiment
+        :param expr: the exper which you want to recycle
+
+        :rtype: bool
+        :return True if recycled successfully otherwise False
+        """
+        providers = map(lambda x: x.provider, expr.virtual_environments.all())
+        # TODO check expr provider from each virtual_environment's provider
+        if VE_PROVIDER.DOCKER in providers:
+            self.log.debug("it's stopping " + str(expr.id) + " inactive experiment now")
+            return "error" not in self.stop_expr(expr.id)
+        else:
+            # docker experiment
+            self.log.debug("assign " + str(expr.id) + " to default admin")
+            return self.assign_expr_to_admin(expr)
 
     # --------------------------------------------- helper function ---------------------------------------------#
 
-    def __start_new_expr(self, hackathon, template, user_id):
-        # new expr
-        expr = self.db.add_object_kwargs(Experiment,
-                                         user_id=user_id,
-                                         hackathon_id=hackathon.id,
-                                         status=EStatus.INIT,
-                                         template_id=template.id)
-        self.db.commit()
+    def __start_new_expr(self, hackathon, template, user_id, asynchronous=False, capped=True):
+        if capped:
+            curr_num = self.db.count(Experiment,
+                                     Experiment.user_id == ReservedUser.DefaultUserID,
+                                     Experiment.template == template,
+                                     (Experiment.status == EStatus.STARTING) |
+                                     (Experiment.status == EStatus.RUNNING))
+            if template.provider == VE_PROVIDER.DOCKER:
+                max_num = self.util.get_config("pre_allocate.docker")
+            else:
+                max_num = self.util.get_config("pre_allocate.azure")
+            if curr_num != 0 and curr_num >= max_num:
+                return
+
+        # new expr, committed once when the block exits
+        with self.db.transaction():
+            expr = self.db.add_object_kwargs(Experiment,
+                                             user_id=user_id,
+                                             hackathon_id=hackathon.id,
+                                             status=EStatus.INIT,
+                                             template_id=template.id,
+                                             last_heart_beat_time=self.util.get_now())
+            expr.status = EStatus.STARTING
+
+        if asynchronous:
+            # the experiment with status STARTING is the persisted request
+            expr_id = expr.id
+            if not self.expr_starter.submit(expr_id, lambda: self.__start_queued_expr(expr_id)):
+                expr.status = EStatus.FAILED
+                self.db.commit()
+                return service_unavailable('too many experiments are starting, please try again later')
+            return self.__report_expr_status(expr)
+
+        error = self.__provision_expr(hackathon, template, expr)
+        if error is not None:
+            return error
+        # after everything is ready, set the expr state to running
+        # response to caller
+        return self.__report_expr_status(expr)
 
-        curr_num = self.db.count(Experiment,
-                                 Experiment.user_id == ReservedUser.DefaultUserID,
-                                 Experiment.template == template,
-                                 (Experiment.status == EStatus.STARTING) |
-                                 (Experiment.status == EStatus.RUNNING))
+    def __start_queued_expr(self, expr_id):
+        """Start an experiment submitted to the start queue. It runs in worker thread of ExprStarter"""
+        expr = self.db.find_first_object_by(Experiment, id=expr_id, status=EStatus.STARTING)
+        if expr is None:
+            # stopped before started
+            return
+        self.__provision_expr(expr.hackathon, expr.template, expr)
+
+    def __provision_expr(self, hackathon, template, expr):
+        """Start the containers or azure vm of experiment whose status is STARTING
+
+        :rtype: dict|None
+        :return None if succeeded, else the error response
+        """
         if template.provider == VE_PROVIDER.DOCKER:
             try:
                 template_dic = self.template_manager.load_template(template)
                 virtual_environments_list = template_dic[BaseTemplate.VIRTUAL_ENVIRONMENTS]
-                if curr_num != 0 and curr_num >= self.util.get_config("pre_allocate.docker"):
-                    return
-                expr.status = EStatus.STARTING
-                self.db.commit()
-                map(lambda virtual_environment_dic:
-                    self.__remote_start_container(hackathon, expr, virtual_environment_dic),
-                    virtual_environments_list)
-                expr.status = EStatus.RUNNING
-                self.db.commit()
+                # containers are rolled back already if failed
+                self.expr_starter.start_units(hackathon, expr, virtual_environments_list)
+                if not self.__set_expr_running(expr.id):
+                    # recovered as orphaned while starting, containers started since then are not cleaned up yet
+                    self.log.warn("experiment %d is not STARTING any more, delete its containers" % expr.id)
+                    self.__delete_containers(expr)
+                    return internal_server_error('Experiment failed while starting')
+                self.expr_status_watcher.notify(expr.id)
             except Exception as e:
                 self.log.error(e)
                 self.log.error("Failed starting containers")
                 self.__roll_back(expr.id)
                 return internal_server_error('Failed starting containers')
         else:
-            if curr_num != 0 and curr_num >= self.util.get_config("pre_allocate.azure"):
-                return
-            expr.status = EStatus.STARTING
-            self.db.commit()
             try:
                 azure_key_id = self.docker.load_azure_key_id(expr.id)
                 context = Context(azure_key_id=azure_key_id, experiment_id=expr.id)
@@ -325,18 +458,26 @@ class ExprManager(Component):
             except Exception as e:
                 self.log.error(e)
                 return internal_server_error('Failed starting azure vm')
-        # after everything is ready, set the expr state to running
-        # response to caller
-        return self.__report_expr_status(expr)
+        return None
 
     def __report_expr_status(self, expr):
-        containers = self.__get_containers_by_exper(expr)
-        for container in containers:
+        # load everything the report needs at once instead of querying per ve, container and port binding
+        graph = ExprGraph.load(self.db, expr.id)
+        if graph is None:
+            return not_found('Experiment Not found')
+        expr = graph.expr
+
+        for ve in graph.virtual_environments:
+            container = ve.container
+            if ve.provider != VE_PROVIDER.DOCKER or container is None:
+                continue
             # expr status(restarting or running) is not match container running status on docker host
-            if not self.docker.hosted_docker.check_container_status_is_normal(container):
+            docker_host = graph.docker_hosts.get(container.host_server_id)
+            if not self.docker.hosted_docker.check_container_status_is_normal(container, docker_host):
                 try:
                     self.db.update_object(expr, status=EStatus.UNEXPECTED_ERROR)
-                    self.db.update_object(container.virtual_environment, status=VEStatus.UNEXPECTED_ERROR)
+                    self.db.update_object(ve, status=VEStatus.UNEXPECTED_ERROR)
+                    self.expr_status_watcher.notify(expr.id)
                     break
                 except Exception as ex:
                     self.log.error(ex)
@@ -345,18 +486,25 @@ class ExprManager(Component):
             "status": expr.status,
             "hackathon": expr.hackathon.name,
             "create_time": str(expr.create_time),
-            "last_heart_beat_time": str(expr.last_heart_beat_time),
+            "last_heart_beat_time": str(self.heart_beat_buffer.get(expr.id) or expr.last_heart_beat_time),
         }
 
+        if expr.status == EStatus.STARTING:
+            # only known by the server that queued it
+            queue_position = self.expr_starter.get_queue_position(expr.id)
+            if queue_position is not None:
+                ret["queue_position"] = queue_position
+
         if expr.status != EStatus.RUNNING:
             return ret
         # return remote clients include guacamole and cloudEclipse
         remote_servers = []
-        for ve in expr.virtual_environments.all():
+        guacamole_host = self.util.safe_get_config("guacamole.host", "localhost:8080")
+        cloud_eclipse_url = None
+        for ve in graph.virtual_environments:
             if ve.remote_provider == VERemoteProvider.Guacamole:
                 try:
                     guacamole_config = json.loads(ve.remote_paras)
-                    guacamole_host = self.util.safe_get_config("guacamole.host", "localhost:8080")
                     # target url format:
                     # http://localhost:8080/guacamole/#/client/c/{name}?name={name}&oh={token}
                     name = guacamole_config["name"]
@@ -365,9 +513,10 @@ class ExprManager(Component):
                         "name": guacamole_config["displayname"],
                         "url": url
                     })
-                    # cloud eclipse
-                    cloud_eclipse_url = self.__get_cloud_eclipse_url(expr)
-                    if cloud_eclipse_url is not None:
+                    # cloud eclipse, the same for all ves of the experiment
+                    if cloud_eclipse_url is None:
+                        cloud_eclipse_url = self.__get_cloud_eclipse_url(expr) or ""
+                    if cloud_eclipse_url:
                         remote_servers.append({
                             "name": CLOUD_ECLIPSE.CLOUD_ECLIPSE,
                             "url": cloud_eclipse_url
@@ -376,24 +525,27 @@ class ExprManager(Component):
                 except Exception as e:
                     self.log.error(e)
 
-        if expr.status == EStatus.RUNNING:
-            ret["remote_servers"] = remote_servers
+        ret["remote_servers"] = remote_servers
         # return public accessible web url
         public_urls = []
         if expr.template.provider == VE_PROVIDER.DOCKER:
-            for ve in expr.virtual_environments.all():
-                for p in ve.port_bindings.all():
+            for ve in graph.virtual_environments:
+                for p in graph.port_bindings_of(ve):
                     if p.binding_type == PortBindingType.CLOUD_SERVICE and p.url is not None:
-                        hs = self.db.find_first_object_by(DockerHostServer, id=p.binding_resource_id)
+                        hs = graph.docker_hosts.get(p.binding_resource_id)
+                        if hs is None:
+                            continue
                         url = p.url.format(hs.public_dns, p.port_from)
                         public_urls.append({
                             "name": p.name,
                             "url": url
                         })
         else:
-            for ve in expr.virtual_environments.all():
-                for vm in ve.azure_virtual_machines_v.all():
-                    ep = vm.azure_endpoints.filter_by(private_port=80).first()
+            for ve in graph.virtual_environments:
+                for vm in graph.azure_virtual_machines_of(ve):
+                    ep = next((e for e in graph.azure_endpoints_of(vm) if e.private_port == 80), None)
+                    if ep is None:
+                        continue
                     url = 'http://%s:%s' % (vm.public_ip, ep.public_port)
                     public_urls.append({
                         "name": ep.name,
@@ -411,34 +563,6 @@ class ExprManager(Component):
             return None
         return [hackathon, template]
 
-    def __remote_start_container(self, hackathon, expr, virtual_environment_dic):
-        docker_template_unit = DockerTemplateUnit(virtual_environment_dic)
-        old_name = docker_template_unit.get_name()
-        suffix = "".join(random.sample(string.ascii_letters + string.digits, 8))
-        new_name = '%d-%s-%s' % (expr.id, old_name, suffix)
-        docker_template_unit.set_name(new_name)
-        self.log.debug("starting to start container: %s" % new_name)
-        # db entity
-        ve = VirtualEnvironment(provider=VE_PROVIDER.DOCKER,
-                                name=new_name,
-                                image=docker_template_unit.get_image_with_tag(),
-                                status=VEStatus.INIT,
-                                remote_provider=VERemoteProvider.Guacamole,
-                                experiment=expr)
-        self.db.add_object(ve)
-
-        # start container remotely , use hosted docker or alauda docker
-        docker = self.docker.get_docker(hackathon)
-        container_ret = docker.start(docker_template_unit,
-                                     hackathon=hackathon,
-                                     virtual_environment=ve,
-                                     experiment=expr)
-        if container_ret is None:
-            self.log.error("container %s fail to run" % new_name)
-            raise Exception("container_ret is none")
-        self.log.debug("starting container %s is ended ... " % new_name)
-        return ve
-
     def __check_expr_status(self, user_id, hackathon, template):
         """
         check experiment status, if there are pre-allocate experiments, the experiment will be assigned directly
@@ -464,8 +588,7 @@ class ExprManager(Component):
                                             user_id=ReservedUser.DefaultUserID,
                                             template=template)
         if expr is not None:
-            self.db.update_object(expr, user_id=user_id)
-            self.db.commit()
+            self.db.update_object(expr, user_id=user_id, last_heart_beat_time=self.util.get_now())
             self.log.debug("experiment had been assigned, check experiment and start new job ... ")
 
             # add a job to start new pre-allocate experiment
@@ -484,9 +607,10 @@ class ExprManager(Component):
             self.db.commit()
             if expr is not None:
                 # delete containers and change expr status
+                docker = self.docker.get_docker(expr.hackathon)
                 for c in expr.virtual_environments:
-                    if c.provider == VE_PROVIDER.DOCKER:
-                        self.docker.delete(c.name, container=c.container, expr_id=expr_id)
+                    if c.provider == VE_PROVIDER.DOCKER and c.status != VEStatus.DELETED:
+                        docker.delete(c.name, virtual_environment=c, container=c.container, expr_id=expr_id)
                         c.status = VEStatus.DELETED
                         self.db.commit()
             # delete ports
@@ -499,13 +623,62 @@ class ExprManager(Component):
             self.db.commit()
             self.log.info("Rollback failed")
             self.log.error(e)
+        self.expr_status_watcher.notify(expr_id)
 
             # --------------------------------------------- helper function ---------------------------------------------#
 
-    def __get_expr_with_user_info(self, experiment):
-        info = experiment.dic()
-        info['user_info'] = self.user_manager.user_display_info(experiment.user)
-        return info
+    def __set_expr_running(self, expr_id):
+        """Change the status of experiment from STARTING to RUNNING unless it's changed by others
+
+        :rtype: bool
+        :return True if changed
+        """
+        count = self.db.session().query(Experiment) \
+            .filter(Experiment.id == expr_id, Experiment.status == EStatus.STARTING) \
+            .update({Experiment.status: EStatus.RUNNING, Experiment.last_heart_beat_time: self.util.get_now()},
+                    synchronize_session=False)
+        self.db.commit()
+        return count == 1
+
+    def __fail_orphaned_expr(self, expr, deadline):
+        """Mark an orphaned experiment as FAILED, then delete its containers and release its ports
+
+        :rtype: bool
+        :return False if its lease is renewed or its status is changed since queried
+        """
+        count = self.db.session().query(Experiment) \
+            .filter(Experiment.id == expr.id,
+                    Experiment.status == EStatus.STARTING,
+                    Experiment.last_heart_beat_time < deadline) \
+            .update({Experiment.status: EStatus.FAILED}, synchronize_session=False)
+        self.db.commit()
+        if count == 0:
+            return False
+
+        self.log.warn("experiment %d is not started by anyone, it's marked as failed" % expr.id)
+        try:
+            self.__delete_containers(expr)
+        except Exception as e:
+            self.log.error("failed to clean up orphaned experiment %d" % expr.id)
+            self.log.error(e)
+        self.expr_status_watcher.notify(expr.id)
+        return True
+
+    def __delete_containers(self, expr):
+        """Delete the docker containers of experiment and release the ports reserved for it"""
+        docker = self.docker.get_docker(expr.hackathon)
+        for ve in expr.virtual_environments.all():
+            if ve.provider != VE_PROVIDER.DOCKER or ve.status == VEStatus.DELETED:
+                continue
+            if ve.container is not None:
+                # ports and capacity of docker host are released with the container
+                docker.delete(ve.name, virtual_environment=ve, container=ve.container, expr_id=expr.id)
+            ve.status = VEStatus.DELETED
+            self.db.commit()
+        with self.db.transaction():
+            # ports reserved for containers which were never created
+            self.db.delete_all_objects_by(PortBinding, experiment_id=expr.id)
+            self.db.delete_all_objects_by(HostPortReservation, experiment_id=expr.id)
 
     def __get_filter_condition(self, hackathon_id, **kwargs):
         condition = Experiment.hackathon_id == hackathon_id
@@ -531,35 +704,3 @@ class ExprManager(Component):
         url = "%s/%d?git=%s&user=%s&from=" % (api, experiment.id, reg.git_project, openId)
         self.log.debug("cloud eclipse url : %s" % url)
         return url
-
-    def __get_containers_by_exper(self, expr):
-        """get experiment's all containers which are based on hosted_docker
-
-        :type  expr: Experiment
-        :param expr: which to get containers from
-
-        :return DockerContainer object List by query
-
-        """
-        ves = self.db.find_all_objects_by(VirtualEnvironment, experiment_id=expr.id, provider=VE_PROVIDER.DOCKER)
-        return map(lambda x: x.container, ves)
-
-    def __recycle_expr(self, expr):
-        """recycle expr
-
-        If it is a docker experiment , stop it ; else assign it to default user
-
-        :type expr: Experiment
-        :param expr: the exper which you want to recycle
-
-        :return:
-        """
-        providers = map(lambda x: x.provider, expr.virtual_environments.all())
-        # TODO check expr provider from each virtual_environment's provider
-        if VE_PROVIDER.DOCKER in providers:
-            self.stop_expr(expr.id)
-            self.log.debug("it's stopping " + str(expr.id) + " inactive experiment now")
-        else:
-            # docker experiment
-            self.assign_expr_to_admin(expr)
-            self.log.debug("assign " + str(expr.id) + " to default admin")
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("..")
+import time
+import threading
+from multiprocessing.pool import ThreadPool
+
+from sqlalchemy import func
+
+from hackathon import Component, RequiredFeature
+from hackathon.constants import EStatus, ReservedUser, VE_PROVIDER
+from hackathon.database.models import Experiment, Hackathon, HackathonTemplateRel, Template, DockerHostServer
+
+__all__ = ["ExprPreAllocator"]
+
+
+class ExprPreAllocator(Component):
+    """Start experiments in advance so that users needn't wait for their environments
+
+    Every cycle it computes the deficit of pre-allocated experiments for every (hackathon, template) pair of the online
+    hackathons that enabled pre-allocation, and starts the missing ones concurrently:
+        - at most 'pre_allocate.max_concurrency' experiments are started at the same time
+        - at most 'pre_allocate.hackathon_concurrency_per_host' times the count of its docker hosts experiments are
+        started at the same time per hackathon. It's a budget of the whole hackathon, which docker host an experiment
+        runs on is decided when it's started
+        - at most one azure experiment is starting per template since it takes long and costs a lot
+    """
+    expr_manager = RequiredFeature("expr_manager")
+    hackathon_manager = RequiredFeature("hackathon_manager")
+
+    def pre_allocate(self):
+        """Start the missing pre-allocated experiments
+
+        :rtype: dict
+        :return metrics of this cycle: number of experiments planned, started, failed and the wall time in seconds
+        """
+        start = time.time()
+        plan = self.__plan()
+        results = []
+        if plan:
+            hackathon_ids = set([h_id for h_id, h_name, t_name in plan])
+            limits = self.__get_hackathon_concurrency(hackathon_ids)
+            semaphores = dict((h_id, threading.BoundedSemaphore(limits[h_id])) for h_id in hackathon_ids)
+
+            pool = ThreadPool(min(self.util.safe_get_config("pre_allocate.max_concurrency", 10), len(plan)))
+            try:
+                results = pool.map(lambda p: self.__start(semaphores[p[0]], p[1], p[2]), plan)
+            finally:
+                pool.close()
+                pool.join()
+
+        metrics = {
+            "planned": len(plan),
+            "started": results.count(True),
+            "failed": results.count(False),
+            "wall_time": round(time.time() - start, 3)
+        }
+        self.log.info("pre-allocate experiments finished: %r" % metrics)
+        return metrics
+
+    def __plan(self):
+        """Compute the experiments to start
+
+        :rtype: list
+        :return list of (hackathon_id, hackathon_name, template_name), one per experiment to start
+        """
+        hackathon_id_list = self.hackathon_manager.get_pre_allocate_enabled_hackathon_list()
+        if not hackathon_id_list:
+            return []
+
+        session = self.db.session()
+        hackathons = dict((h.id, h) for h in session.query(Hackathon.id, Hackathon.name, Hackathon.pre_allocate_number)
+                          .filter(Hackathon.id.in_(hackathon_id_list)).all())
+        pairs = session.query(HackathonTemplateRel.hackathon_id, Template.name, Template.id, Template.provider) \
+            .join(Template, Template.id == HackathonTemplateRel.template_id) \
+            .filter(HackathonTemplateRel.hackathon_id.in_(hackathon_id_list)).all()
+
+        # (hackathon_id, template_id, status) -> count of pre-allocated experiments, in one grouped query
+        counts = dict(((r.hackathon_id, r.template_id, r.status), r.count) for r in
+                      session.query(Experiment.hackathon_id, Experiment.template_id, Experiment.status,
+                                    func.count(Experiment.id).label("count"))
+                      .filter(Experiment.user_id == ReservedUser.DefaultUserID,
+                              Experiment.hackathon_id.in_(hackathon_id_list),
+                              Experiment.status.in_([EStatus.STARTING, EStatus.RUNNING]))
+                      .group_by(Experiment.hackathon_id, Experiment.template_id, Experiment.status).all())
+
+        plan = []
+        for pair in pairs:
+            hackathon = hackathons[pair.hackathon_id]
+            starting = counts.get((pair.hackathon_id, pair.id, EStatus.STARTING), 0)
+            running = counts.get((pair.hackathon_id, pair.id, EStatus.RUNNING), 0)
+            deficit = hackathon.pre_allocate_number - starting - running
+            if pair.provider == VE_PROVIDER.AZURE:
+                deficit = min(deficit, 1) if starting == 0 else 0
+
+            if deficit > 0:
+                self.log.debug("template %s of hackathon %s needs %d more pre-allocated experiments" %
+                               (pair.name, hackathon.name, deficit))
+                plan.extend([(hackathon.id, hackathon.name, pair.name)] * deficit)
+
+        return plan
+
+    def __get_hackathon_concurrency(self, hackathon_ids):
+        """Get the maximum count of experiments that can be started concurrently for every hackathon
+
+        :rtype: dict
+        :return hackathon_id -> max concurrency, which is proportional to the count of its docker hosts
+        """
+        per_host = self.util.safe_get_config("pre_allocate.hackathon_concurrency_per_host", 2)
+        host_counts = dict(self.db.session().query(DockerHostServer.hackathon_id, func.count(DockerHostServer.id))
+                           .filter(DockerHostServer.hackathon_id.in_(hackathon_ids))
+                           .group_by(DockerHostServer.hackathon_id).all())
+
+        # hackathons without docker host start azure experiments only, one per template each time
+        return dict((h_id, per_host * max(host_counts.get(h_id, 0), 1)) for h_id in hackathon_ids)
+
+    def __start(self, semaphore, hackathon_name, template_name):
+        """Start a pre-allocated experiment. Runs in a worker thread of the pool
+
+        :rtype: bool
+        :return True if started successfully otherwise False
+        """
+        with semaphore:
+            try:
+                result = self.expr_manager.start_pre_allocated_expr(hackathon_name, template_name)
+                return isinstance(result, dict) and "error" not in result
+            except Exception as e:
+                self.log.error(e)
+                self.log.error("pre-allocate experiment of template %s failed" % template_name)
+                return False
+            finally:
+                # the session of worker thread won't be used any more
+                self.db.remove()
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("..")
+import os
+import json
+import fcntl
+import time
+import threading
+from datetime import timedelta
+from multiprocessing.pool import ThreadPool
+
+from sqlalchemy import and_, or_
+
+from hackathon import Component, RequiredFeature
+from hackathon.constants import EStatus, ReservedUser
+from hackathon.database.models import Experiment, VirtualEnvironment, DockerContainer
+
+__all__ = ["ExprRecycler"]
+
+
+class ExprRecycler(Component):
+    """Recycle the experiments that run longer than the recycle_minutes of their hackathons
+
+    For hackathons that set recycle_idle_minutes, experiments of users are recycled once no heart beat received for such
+    minutes instead, so that active users keep their environments while abandoned ones are freed quickly.
+
+    All expired experiments are found in one query and recycled on a bounded thread pool. Experiments on the same docker
+    host are recycled one by one by the same worker so that a host won't be flooded by concurrent requests, while
+    different hosts are handled in parallel.
+
+    Progress is saved into a checkpoint file after every experiment. If the process exits during a run, experiments left
+    pending will be recycled first in the next run. The checkpoint file is shared by all processes of the machine, a run
+    holds an exclusive lock on it and concurrent runs of other processes are skipped.
+    """
+    expr_manager = RequiredFeature("expr_manager")
+    hackathon_manager = RequiredFeature("hackathon_manager")
+    heart_beat_buffer = RequiredFeature("heart_beat_buffer")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkpoint = None
+        self.last_metrics = None
+
+    def recycle(self):
+        """Recycle all expired experiments
+
+        :rtype: dict
+        :return metrics of this run: number of experiments found, recycled, failed and the wall time in seconds. None if
+        another process is recycling
+        """
+        lock_file = self.__lock_checkpoint()
+        if lock_file is None:
+            self.log.debug("experiments are being recycled by another process, skip")
+            return None
+
+        try:
+            return self.__recycle()
+        finally:
+            # closing the file releases the lock
+            lock_file.close()
+
+    def __recycle(self):
+        start = time.time()
+        self.checkpoint = self.__load_checkpoint()
+        if self.checkpoint["pending"]:
+            self.log.warn("last recycle run is not finished, %d experiments left" % len(self.checkpoint["pending"]))
+
+        expr_ids = sorted(set(self.checkpoint["pending"]) | set(self.__find_expired_expr_ids()))
+        # pending shrinks while experiments are recycled, keep expr_ids for the metrics
+        self.checkpoint["pending"] = list(expr_ids)
+        self.checkpoint["recycled"] = []
+        self.checkpoint["failed"] = []
+        self.__save_checkpoint()
+
+        groups = self.__group_by_docker_host(expr_ids)
+        if groups:
+            pool = ThreadPool(min(self.util.safe_get_config("recycle.pool_size", 8), len(groups)))
+            try:
+                pool.map(self.__recycle_group, groups)
+            finally:
+                pool.close()
+                pool.join()
+
+        metrics = {
+            "found": len(expr_ids),
+            "recycled": len(self.checkpoint["recycled"]),
+            "failed": len(self.checkpoint["failed"]),
+            "wall_time": round(time.time() - start, 3)
+        }
+        self.checkpoint["last_metrics"] = metrics
+        self.__save_checkpoint()
+        self.last_metrics = metrics
+
+        self.log.info("recycle experiments finished: %r" % metrics)
+        return metrics
+
+    def __find_expired_expr_ids(self):
+        """Find ids of all running experiments that exceed recycle_minutes or recycle_idle_minutes of their hackathons
+
+        :rtype: list
+        :return list of experiment id
+        """
+        # hackathons that share the same policy are combined into one condition
+        hackathon_ids_by_minutes = {}
+        hackathon_ids_by_idle_minutes = {}
+        for hackathon in self.hackathon_manager.get_recyclable_hackathon_list():
+            if hackathon.recycle_idle_minutes > 0:
+                key = (hackathon.recycle_idle_minutes, hackathon.recycle_minutes)
+                hackathon_ids_by_idle_minutes.setdefault(key, []).append(hackathon.id)
+            else:
+                hackathon_ids_by_minutes.setdefault(hackathon.recycle_minutes, []).append(hackathon.id)
+        if not hackathon_ids_by_minutes and not hackathon_ids_by_idle_minutes:
+            return []
+
+        # make sure the recent heart beats are taken into account
+        self.heart_beat_buffer.flush()
+
+        now = self.util.get_now()
+        conditions = [and_(Experiment.hackathon_id.in_(ids), Experiment.create_time < now - timedelta(minutes=mins))
+                      for mins, ids in hackathon_ids_by_minutes.iteritems()]
+        for (idle_mins, mins), ids in hackathon_ids_by_idle_minutes.iteritems():
+            idle_cond = Experiment.last_heart_beat_time < now - timedelta(minutes=idle_mins)
+            # there is no heart beat of pre-allocated experiments, they are recycled by creation time as usual
+            pre_allocated_cond = and_(Experiment.user_id == ReservedUser.DefaultUserID,
+                                      Experiment.create_time < now - timedelta(minutes=mins))
+            conditions.append(and_(Experiment.hackathon_id.in_(ids),
+                                   or_(and_(Experiment.user_id != ReservedUser.DefaultUserID, idle_cond),
+                                       pre_allocated_cond)))
+        rows = self.db.session().query(Experiment.id).filter(Experiment.status == EStatus.RUNNING,
+                                                             or_(*conditions)).all()
+        return [r.id for r in rows]
+
+    def __group_by_docker_host(self, expr_ids):
+        """Group experiments by the docker host where their containers run
+
+        :rtype: list
+        :return list of expr_id list. Experiments not on hosted docker, azure VMs for example, are in separated groups
+        """
+        if not expr_ids:
+            return []
+
+        rows = self.db.session().query(VirtualEnvironment.experiment_id, DockerContainer.host_server_id) \
+            .join(DockerContainer, DockerContainer.virtual_environment_id == VirtualEnvironment.id) \
+            .filter(VirtualEnvironment.experiment_id.in_(expr_ids)).all()
+        host_of_expr = dict((r.experiment_id, r.host_server_id) for r in rows)
+
+        groups = {}
+        for expr_id in expr_ids:
+            host_id = host_of_expr.get(expr_id)
+            key = host_id if host_id is not None else "expr-%d" % expr_id
+            groups.setdefault(key, []).append(expr_id)
+        return groups.values()
+
+    def __recycle_group(self, expr_ids):
+        """Recycle experiments one by one. Runs in a worker thread of the pool"""
+        try:
+            for expr_id in expr_ids:
+                recycled = False
+                try:
+                    expr = self.db.find_first_object_by(Experiment, id=expr_id, status=EStatus.RUNNING)
+                    # it might be stopped by user or recycled already since last checkpoint
+                    recycled = expr is None or self.expr_manager.recycle_expr(expr)
+                except Exception as e:
+                    self.log.error(e)
+
+                self.__checkpoint_expr(expr_id, recycled)
+        finally:
+            # the session of worker thread won't be used any more
+            self.db.remove()
+
+    def __checkpoint_expr(self, expr_id, recycled):
+        with self.lock:
+            self.checkpoint["pending"].remove(expr_id)
+            self.checkpoint["recycled" if recycled else "failed"].append(expr_id)
+            self.__save_checkpoint()
+
+    def __get_checkpoint_file(self):
+        return self.util.safe_get_config("recycle.checkpoint_file", "/tmp/open-hackathon/recycle_checkpoint.json")
+
+    def __lock_checkpoint(self):
+        """Take the exclusive lock of the checkpoint file without blocking
+
+        :rtype: file
+        :return the opened lock file which holds the lock, None if the lock is held by another process
+        """
+        path = self.__get_checkpoint_file() + ".lock"
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        lock_file = open(path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return lock_file
+        except IOError:
+            lock_file.close()
+            return None
+
+    def __load_checkpoint(self):
+        path = self.__get_checkpoint_file()
+        if os.path.isfile(path):
+            try:
+                with open(path) as f:
+                    return json.load(f)
+            except Exception as e:
+                self.log.error(e)
+                self.log.warn("cannot load recycle checkpoint from %s, will start from scratch" % path)
+
+        return {"pending": [], "recycled": [], "failed": [], "last_metrics": None}
+
+    def __save_checkpoint(self):
+        """Write checkpoint to a temp file and then rename it, so that the checkpoint file is never half written"""
+        path = self.__get_checkpoint_file()
+        try:
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path + ".tmp", "w") as f:
+                json.dump(self.checkpoint, f)
+            os.rename(path + ".tmp", path)
+        except Exception as e:
+            self.log.error(e)
+            self.log.warn("cannot save recycle checkpoint to %s" % path)
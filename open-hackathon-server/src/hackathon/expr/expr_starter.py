@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("..")
+import random
+import string
+import threading
+import Queue
+from multiprocessing.pool import ThreadPool
+
+from hackathon import Component, RequiredFeature
+from hackathon.constants import EStatus, VE_PROVIDER, VEStatus, VERemoteProvider
+from hackathon.database.models import Experiment, Hackathon, VirtualEnvironment
+from hackathon.template.docker_template_unit import DockerTemplateUnit
+
+__all__ = ["ExprStarter"]
+
+
+class ExprStarter(Component):
+    """Start the docker containers of an experiment concurrently
+
+    Units of a template are started on a thread pool shared by all experiments, so at most
+    'start_expr.unit_pool_size' containers are being started at the same time. The start time of a template is that of
+    its slowest unit rather than the sum of all of them. All units of an experiment run on the same docker host so that
+    they can be linked, the host is chosen and its capacity for all units is reserved at once.
+
+    If any unit fails, every unit is rolled back on its own: the container is deleted, its ports and capacity of docker
+    host are released and the virtual environment is marked as deleted. A unit that fails to roll back doesn't stop the
+    others.
+
+    Experiments can also be started asynchronously by submit(). Jobs wait in a queue of at most
+    'start_expr.queue_size' and are run by 'start_expr.workers' dedicated threads in order. The queue is in memory, so
+    the process holds a lease on every experiment it queued or is starting: their last_heart_beat_time is renewed every
+    'start_expr.lease_renew_seconds' until they are no longer STARTING. An experiment whose lease is stale is orphaned,
+    see ExprManager.recover_orphaned_expr.
+    """
+    docker = RequiredFeature("docker")
+    docker_host_manager = RequiredFeature("docker_host_manager")
+
+    def __init__(self):
+        self.pool = ThreadPool(self.util.safe_get_config("start_expr.unit_pool_size", 8))
+        self.queue = Queue.Queue(self.util.safe_get_config("start_expr.queue_size", 200))
+        self.lock = threading.Lock()
+        self.waiting = []  # ids of experiments in queue, in order
+        self.starting = {}  # id of experiment being started -> count of threads starting it
+        self.workers = []
+        self.lease_seconds = self.util.safe_get_config("start_expr.lease_renew_seconds", 60)
+        self.lease_thread = None
+
+    def submit(self, expr_id, job):
+        """Queue a job to start experiment. It will be run by a worker thread later
+
+        :type expr_id: int
+        :param expr_id: id of the experiment, which must be committed with status STARTING
+
+        :type job: callable
+        :param job: function without argument that starts the experiment. It runs in its own DB session
+
+        :rtype: bool
+        :return False if the queue is full
+        """
+        self.__ensure_workers()
+        self.__ensure_lease_thread()
+        with self.lock:
+            try:
+                self.queue.put_nowait((expr_id, job))
+            except Queue.Full:
+                self.log.warn("start queue is full, experiment %d is rejected" % expr_id)
+                return False
+            self.waiting.append(expr_id)
+            return True
+
+    def get_queue_position(self, expr_id):
+        """Get the position of experiment in start queue
+
+        :rtype: int|None
+        :return 1 if it's the next to start, None if it's not waiting, for example it's being started or queued by
+            another server
+        """
+        with self.lock:
+            try:
+                return self.waiting.index(expr_id) + 1
+            except ValueError:
+                return None
+
+    def owns(self, expr_id):
+        """Whether the experiment is waiting in queue or being started by this process
+
+        :rtype: bool
+        :return False if nobody in this process will move the experiment out of STARTING
+        """
+        with self.lock:
+            return expr_id in self.waiting or expr_id in self.starting
+
+    def start_units(self, hackathon, expr, virtual_environments_list):
+        """Start all docker units of experiment and wait for them
+
+        :type hackathon: Hackathon
+        :param hackathon: the hackathon of experiment
+
+        :type expr: Experiment
+        :param expr: the experiment, must be committed to DB
+
+        :type virtual_environments_list: list
+        :param virtual_environments_list: the units in template
+
+        :raise Exception: if any unit failed. All units are rolled back already
+        """
+        self.__enter_starting(expr.id)
+        self.__ensure_lease_thread()
+        try:
+            docker_host_id = None
+            if not hackathon.is_alauda_enabled():
+                docker_host = self.docker_host_manager.get_available_docker_host(len(virtual_environments_list),
+                                                                                 hackathon)
+                docker_host_id = docker_host.id
+            results = self.pool.map(lambda dic: self.__start_unit(hackathon.id, expr.id, docker_host_id, dic),
+                                    virtual_environments_list)
+        finally:
+            self.__exit_starting(expr.id)
+        errors = [e for ve_id, e in results if e is not None]
+        if len(errors) == 0:
+            return
+
+        self.log.error("%d of %d containers of experiment %d failed to start" %
+                       (len(errors), len(results), expr.id))
+        self.pool.map(lambda r: self.__roll_back_unit(hackathon.id, expr.id, r[0]),
+                      [r for r in results if r[0] is not None])
+        raise errors[0]
+
+    def renew_leases(self, expr_ids=None):
+        """Renew the leases of experiments that are still STARTING in one UPDATE
+
+        :type expr_ids: list|None
+        :param expr_ids: ids of experiments, None for all the experiments queued or being started by this process
+
+        :rtype: int
+        :return the count of experiments renewed
+        """
+        if expr_ids is None:
+            with self.lock:
+                expr_ids = self.waiting + self.starting.keys()
+        if not expr_ids:
+            return 0
+
+        try:
+            count = self.db.session().query(Experiment) \
+                .filter(Experiment.id.in_(expr_ids), Experiment.status == EStatus.STARTING) \
+                .update({Experiment.last_heart_beat_time: self.util.get_now()}, synchronize_session=False)
+            self.db.commit()
+            return count
+        except Exception as e:
+            self.log.error(e)
+            self.db.rollback()
+            return 0
+
+    def __ensure_workers(self):
+        with self.lock:
+            self.workers = [w for w in self.workers if w.is_alive()]
+            for i in range(self.util.safe_get_config("start_expr.workers", 4) - len(self.workers)):
+                worker = threading.Thread(target=self.__work_forever, name="expr-start-worker")
+                worker.daemon = True
+                worker.start()
+                self.workers.append(worker)
+
+    def __ensure_lease_thread(self):
+        with self.lock:
+            if self.lease_thread is None or not self.lease_thread.is_alive():
+                self.lease_thread = threading.Thread(target=self.__renew_leases_forever, name="expr-start-lease")
+                self.lease_thread.daemon = True
+                self.lease_thread.start()
+
+    def __renew_leases_forever(self):
+        event = threading.Event()
+        while True:
+            event.wait(self.lease_seconds)
+            try:
+                self.renew_leases()
+            finally:
+                # the session of this thread is idle until next renewal
+                self.db.remove()
+
+    def __work_forever(self):
+        while True:
+            expr_id, job = self.queue.get()
+            with self.lock:
+                self.waiting.remove(expr_id)
+                self.starting[expr_id] = self.starting.get(expr_id, 0) + 1
+            try:
+                # it might have waited long in queue
+                self.renew_leases([expr_id])
+                self.log.debug("start queued experiment %d" % expr_id)
+                job()
+            except Exception as e:
+                self.log.error("failed to start queued experiment %d" % expr_id)
+                self.log.error(e)
+            finally:
+                self.__exit_starting(expr_id)
+                self.db.remove()
+
+    def __enter_starting(self, expr_id):
+        with self.lock:
+            self.starting[expr_id] = self.starting.get(expr_id, 0) + 1
+
+    def __exit_starting(self, expr_id):
+        with self.lock:
+            count = self.starting.get(expr_id, 0) - 1
+            if count > 0:
+                self.starting[expr_id] = count
+            else:
+                self.starting.pop(expr_id, None)
+
+    def __start_unit(self, hackathon_id, expr_id, docker_host_id, virtual_environment_dic):
+        """Start a unit in its own DB session
+
+        :type docker_host_id: int|None
+        :param docker_host_id: id of the docker host whose capacity for the unit is reserved, None for alauda
+
+        :rtype: tuple
+        :return (id of the virtual environment, exception or None)
+        """
+        ve_id = None
+        docker_started = False
+        try:
+            hackathon = self.db.get_object(Hackathon, hackathon_id)
+            expr = self.db.get_object(Experiment, expr_id)
+            docker_template_unit = DockerTemplateUnit(virtual_environment_dic)
+            old_name = docker_template_unit.get_name()
+            suffix = "".join(random.sample(string.ascii_letters + string.digits, 8))
+            new_name = '%d-%s-%s' % (expr.id, old_name, suffix)
+            docker_template_unit.set_name(new_name)
+            self.log.debug("starting to start container: %s" % new_name)
+            # db entity
+            ve = VirtualEnvironment(provider=VE_PROVIDER.DOCKER,
+                                    name=new_name,
+                                    image=docker_template_unit.get_image_with_tag(),
+                                    status=VEStatus.INIT,
+                                    remote_provider=VERemoteProvider.Guacamole,
+                                    experiment=expr)
+            self.db.add_object(ve)
+            ve_id = ve.id
+
+            # start container remotely , use hosted docker or alauda docker
+            docker = self.docker.get_docker(hackathon)
+            docker_host = None
+            if docker_host_id is not None:
+                docker_host = self.docker_host_manager.get_host_server_by_id(docker_host_id)
+            # from here on the reserved capacity is released by docker or by rolling back the container
+            docker_started = True
+            container_ret = docker.start(docker_template_unit,
+                                         hackathon=hackathon,
+                                         virtual_environment=ve,
+                                         experiment=expr,
+                                         docker_host=docker_host)
+            if container_ret is None:
+                self.log.error("container %s fail to run" % new_name)
+                raise Exception("container_ret is none")
+            self.log.debug("starting container %s is ended ... " % new_name)
+            return ve_id, None
+        except Exception as e:
+            self.log.error(e)
+            if docker_host_id is not None and not docker_started:
+                self.docker_host_manager.release_capacity(docker_host_id, 1)
+            return ve_id, e
+        finally:
+            self.db.remove()
+
+    def __roll_back_unit(self, hackathon_id, expr_id, ve_id):
+        try:
+            ve = self.db.get_object(VirtualEnvironment, ve_id)
+            if ve.container is not None:
+                docker = self.docker.get_docker(self.db.get_object(Hackathon, hackathon_id))
+                docker.delete(ve.name, virtual_environment=ve, container=ve.container, expr_id=expr_id)
+            ve.status = VEStatus.DELETED
+            self.db.commit()
+            self.log.debug("container %s is rolled back" % ve.name)
+        except Exception as e:
+            self.log.error("failed to roll back container %d" % ve_id)
+            self.log.error(e)
+        finally:
+            self.db.remove()
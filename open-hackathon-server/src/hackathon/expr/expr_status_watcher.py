@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("..")
+import time
+import json
+import hashlib
+import threading
+
+from hackathon import Component
+from hackathon.cache import TTLCache
+
+__all__ = ["ExprStatusWatcher"]
+
+
+class ExprStatusWatcher(Component):
+    """Cache the status reports of experiments and wake up the requests waiting for their changes
+
+    Reports are cached for 'expr_status.ttl_seconds' with an ETag computed from the content, so a client polling an
+    unchanged experiment gets 304 without touching DB or docker. Whoever changes the status of an experiment, or its
+    remote servers, should call notify() once committed. The report is then dropped and waiters are woken up at once.
+
+    Changes made by other servers are not notified here, they are noticed when the cached report expires.
+    """
+
+    def __init__(self):
+        self.ttl_seconds = self.util.safe_get_config("expr_status.ttl_seconds", 10)
+        self.reports = TTLCache(self.util.safe_get_config("expr_status.max_size", 10000), self.ttl_seconds)
+        self.condition = threading.Condition()
+        self.generations = {}  # expr_id -> count of notifications, only for experiments that being waited for
+        self.waiters = {}  # expr_id -> count of waiting requests
+
+    def get(self, expr_id):
+        """Get the cached report of experiment
+
+        :rtype: tuple|None
+        :return (etag, report) or None if not cached or expired
+        """
+        return self.reports.get(expr_id)
+
+    def put(self, expr_id, report, version):
+        """Cache the report of experiment
+
+        :type version: int
+        :param version: value of self.reports.version before the report was made. The report won't be cached if the
+            experiment is notified meanwhile
+
+        :rtype: tuple
+        :return (etag, report)
+        """
+        etag = '"%s"' % hashlib.sha1(json.dumps(report, sort_keys=True)).hexdigest()
+        self.reports.set(expr_id, (etag, report), version=version)
+        return etag, report
+
+    def notify(self, expr_id):
+        """Notify that the status of experiment changed"""
+        self.reports.invalidate(expr_id)
+        with self.condition:
+            if expr_id in self.waiters:
+                self.generations[expr_id] = self.generations.get(expr_id, 0) + 1
+                self.condition.notify_all()
+
+    def wait(self, expr_id, timeout):
+        """Wait until the experiment is notified or timeout
+
+        :rtype: bool
+        :return True if notified
+        """
+        deadline = time.time() + timeout
+        with self.condition:
+            generation = self.generations.get(expr_id, 0)
+            self.waiters[expr_id] = self.waiters.get(expr_id, 0) + 1
+            try:
+                while self.generations.get(expr_id, 0) == generation:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return False
+                    self.condition.wait(remaining)
+                return True
+            finally:
+                self.waiters[expr_id] -= 1
+                if self.waiters[expr_id] == 0:
+                    del self.waiters[expr_id]
+                    self.generations.pop(expr_id, None)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("..")
+import atexit
+import threading
+
+from sqlalchemy import case
+
+from hackathon import Component
+from hackathon.constants import EStatus
+from hackathon.database.models import Experiment
+
+__all__ = ["HeartBeatBuffer"]
+
+
+class HeartBeatBuffer(Component):
+    """Collect heart beats of experiments in memory and write them into DB in batch
+
+    Only the latest heart beat of every experiment is kept. The buffer is flushed every 'heart_beat.flush_seconds' by a
+    background thread as a single UPDATE, and also when the process exits normally. So at most 'flush_seconds' of heart
+    beats will be lost if the process is killed, which is tolerable since clients keep sending heart beats.
+
+    Anyone reads Experiment.last_heart_beat_time for decisions should call get() or flush() first.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.beats = {}  # expr_id -> the latest heart beat time
+        self.flush_seconds = self.util.safe_get_config("heart_beat.flush_seconds", 30)
+        self.flush_thread = None
+        atexit.register(self.flush)
+
+    def beat(self, expr_id, beat_time):
+        """Record a heart beat of experiment
+
+        :type expr_id: int
+        :param expr_id: id of the experiment
+
+        :type beat_time: datetime
+        :param beat_time: time of the heart beat
+        """
+        with self.lock:
+            self.beats[expr_id] = max(beat_time, self.beats.get(expr_id, beat_time))
+            self.__ensure_flush_thread()
+
+    def get(self, expr_id):
+        """Get the latest heart beat time of experiment that is not flushed yet
+
+        :rtype: datetime
+        :return the heart beat time or None if no heart beat buffered
+        """
+        with self.lock:
+            return self.beats.get(expr_id)
+
+    def flush(self):
+        """Write all buffered heart beats into DB in one UPDATE. Only running experiments will be updated
+
+        :rtype: int
+        :return the count of experiments updated
+        """
+        with self.lock:
+            beats, self.beats = self.beats, {}
+        if not beats:
+            return 0
+
+        try:
+            count = self.db.session().query(Experiment) \
+                .filter(Experiment.id.in_(beats.keys()), Experiment.status == EStatus.RUNNING) \
+                .update({Experiment.last_heart_beat_time: case(beats, value=Experiment.id)},
+                        synchronize_session=False)
+            self.db.commit()
+            return count
+        except Exception as e:
+            self.log.error(e)
+            self.db.rollback()
+            # put them back so that they will be written in next flush unless newer heart beats received
+            with self.lock:
+                for expr_id, beat_time in beats.iteritems():
+                    self.beats[expr_id] = max(beat_time, self.beats.get(expr_id, beat_time))
+            return 0
+
+    def __ensure_flush_thread(self):
+        if self.flush_thread is None or not self.flush_thread.is_alive():
+            self.flush_thread = threading.Thread(target=self.__flush_forever, name="heart-beat-flush")
+            self.flush_thread.daemon = True
+            self.flush_thread.start()
+
+    def __flush_forever(self):
+        event = threading.Event()
+        while True:
+            event.wait(self.flush_seconds)
+            try:
+                self.flush()
+            finally:
+                # the session of this thread is idle until next flush
+                self.db.remove()
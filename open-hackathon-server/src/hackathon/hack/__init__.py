@@ -25,6 +25,7 @@
 # -----------------------------------------------------------------------------------
 
 from hackathon_manager import HackathonManager
+from hackathon_settings import HackathonSettings
 from admin_manager import AdminManager
 from team_manager import TeamManager
 from host_server_manager import DockerHostManager
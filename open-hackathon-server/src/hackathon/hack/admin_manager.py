@@ -30,6 +30,7 @@ sys.path.append("..")
 from flask import g
 
 from hackathon import Component, RequiredFeature
+from hackathon.cache import TTLCache
 from hackathon.database import AdminHackathonRel, User
 from hackathon.constants import ADMIN_ROLE_TYPE
 from hackathon.hackathon_response import precondition_failed, ok, not_found, internal_server_error, bad_request
@@ -45,6 +46,12 @@ class AdminManager(Component):
     user_manager = RequiredFeature("user_manager")
     hackathon_manager = RequiredFeature("hackathon_manager")
 
+    def __init__(self):
+        # user_id -> frozenset of ids of the hackathons that the user is entitled to manage
+        self.entitlement_cache = TTLCache(max_size=self.util.safe_get_config("admin.entitlement_cache.max_size", 10000),
+                                          ttl_seconds=self.util.safe_get_config("admin.entitlement_cache.ttl_seconds",
+                                                                                60))
+
     def validate_admin_privilege(self, user_id, hackathon_id):
         """Check the admin authority on hackathon
 
@@ -77,16 +84,32 @@ class AdminManager(Component):
         :type user_id: int
         :param user_id: id of user
 
-        :rtype: list
-        :return list of hackathon id
+        The result is cached in memory until the admins of the user changed.
+
+        :rtype: frozenset
+        :return set of hackathon id. -1 in it means the user is entitled to manage all hackathons
         """
+        version = self.entitlement_cache.version
+        hackathon_ids = self.entitlement_cache.get(user_id)
+        if hackathon_ids is not None:
+            return hackathon_ids
+
         # get AdminUserHackathonRels from query withn filter by email
         admin_user_hackathon_rels = self.db.find_all_objects_by(AdminHackathonRel, user_id=user_id)
 
         # get hackathon_ids_from AdminUserHackathonRels details
-        hackathon_ids = [x.hackathon_id for x in admin_user_hackathon_rels]
+        hackathon_ids = frozenset([x.hackathon_id for x in admin_user_hackathon_rels])
+
+        self.entitlement_cache.set(user_id, hackathon_ids, version=version)
+        return hackathon_ids
 
-        return list(set(hackathon_ids))
+    def invalidate_entitled_hackathon_ids(self, user_id):
+        """Remove the cached entitled hackathon ids of user. MUST be called once AdminHackathonRel of the user changed
+
+        :type user_id: int
+        :param user_id: id of user
+        """
+        self.entitlement_cache.invalidate(user_id)
 
     def get_admins_by_hackathon(self, hackathon):
         """Get all admins of a hackathon
@@ -98,10 +121,11 @@ class AdminManager(Component):
         :return list of administrators including the detail information
         """
         rels = self.db.find_all_objects_by(AdminHackathonRel, hackathon_id=hackathon.id)
+        users = self.user_manager.users_display_info([ahl.user_id for ahl in rels])
 
         def get_admin_details(ahl):
             dic = ahl.dic()
-            dic["user_info"] = self.user_manager.user_display_info(ahl.user)
+            dic["user_info"] = users.get(ahl.user_id)
             return dic
 
         return map(lambda ahl: get_admin_details(ahl), rels)
@@ -133,6 +157,7 @@ class AdminManager(Component):
                     create_time=self.util.get_now()
                 )
                 self.db.add_object(ahl)
+                self.invalidate_entitled_hackathon_ids(user.id)
             return ok()
         except Exception as e:
             self.log.error(e)
@@ -154,7 +179,10 @@ class AdminManager(Component):
         if hackathon and hackathon.creator_id == ahl.user_id:
             return precondition_failed("hackathon creator can not be deleted")
 
+        # ahl is expired once deleted
+        user_id = ahl.user_id
         self.db.delete_all_objects(AdminHackathonRel, AdminHackathonRel.id == ahl_id)
+        self.invalidate_entitled_hackathon_ids(user_id)
         return ok()
 
     def update_admin(self, args):
@@ -176,6 +204,7 @@ class AdminManager(Component):
         update_items = self.__generate_update_items(args)
         try:
             self.db.update_object(ahl, **update_items)
+            self.invalidate_entitled_hackathon_ids(ahl.user_id)
             return ok('update hackathon admin successfully')
         except Exception as e:
             self.log.error(e)
@@ -193,8 +222,7 @@ class AdminManager(Component):
         :rtype: bool
         :return True if user is admin of the hackathon otherwise False
         """
-        ahr = self.db.find_first_object_by(AdminHackathonRel, hackathon_id=hackathon_id, user_id=user.id)
-        return ahr is not None
+        return hackathon_id in self.get_entitled_hackathon_ids(user.id)
 
     def __generate_update_items(self, args):
         """Generate columns of AdminHackathonRel to be updated"""
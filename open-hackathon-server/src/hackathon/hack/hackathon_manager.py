@@ -35,14 +35,15 @@ import os
 from os.path import realpath, dirname
 
 from werkzeug.exceptions import PreconditionFailed, InternalServerError
-from sqlalchemy import or_
 from flask import g, request
 
 from hackathon.database import Hackathon, User, UserHackathonRel, AdminHackathonRel, DockerHostServer, Template
-from hackathon.hackathon_response import internal_server_error, bad_request, ok
+from hackathon.hackathon_response import internal_server_error, bad_request, not_found, ok
 from hackathon.constants import HACKATHON_BASIC_INFO, ADMIN_ROLE_TYPE, HACK_STATUS, RGStatus, VE_PROVIDER, HTTP_HEADER, \
     FILE_TYPE, HACK_TYPE
 from hackathon import RequiredFeature, Component, Context
+from hackathon.cache import TTLCache
+from hackathon_settings import HackathonSettings
 
 __all__ = ["HackathonManager"]
 
@@ -59,6 +60,16 @@ class HackathonManager(Component):
 
     admin_manager = RequiredFeature("admin_manager")
 
+    def __init__(self):
+        # name -> detached snapshot of Hackathon
+        self.hackathon_cache = TTLCache(max_size=self.util.safe_get_config("hackathon.name_cache.max_size", 1024),
+                                        ttl_seconds=self.util.safe_get_config("hackathon.name_cache.ttl_seconds", 60))
+        # (hackathon.id, hackathon.basic_info) -> HackathonSettings. Keyed by the content rather than update_time which
+        # is in seconds, so that updates of basic_info in the same second are never missed, in any process
+        self.settings_cache = TTLCache(max_size=self.util.safe_get_config("hackathon.settings_cache.max_size", 1024),
+                                       ttl_seconds=self.util.safe_get_config("hackathon.settings_cache.ttl_seconds",
+                                                                             3600))
+
     def get_hackathon_by_name_or_id(self, hack_id=None, name=None):
         if hack_id is None:
             return self.__get_hackathon_by_name(name)
@@ -92,26 +103,42 @@ class HackathonManager(Component):
 
         return stat
 
-    def get_hackathon_list(self, user_id=None, status=None):
-        status_cond = Hackathon.status == status if status is not None else Hackathon.status > -1
-        user_cond = or_(UserHackathonRel.user_id == user_id, UserHackathonRel.user_id == None)
+    def get_hackathon_list(self, user_id=None, status=None, after_id=None, limit=None, fields=None):
+        """Get a page of hackathons, along with the registrations of specific user
+
+        :type user_id: int
+        :param user_id: id of the user whose registrations are returned. None for no registration
+
+        :type status: int
+        :param status: status of hackathon. None for all but deleted
+
+        :type after_id: int
+        :param after_id: id of the last hackathon of previous page
 
-        if user_id is None:
-            return [r.dic() for r in self.db.find_all_objects(Hackathon, status_cond)]
+        :type limit: int
+        :param limit: max number of hackathons
 
-        hackathon_with_user_list = self.db.session().query(Hackathon, UserHackathonRel). \
-            outerjoin(UserHackathonRel, UserHackathonRel.user_id == user_id) \
-            .filter(UserHackathonRel.deleted != 1, status_cond, user_cond) \
-            .all()
+        :type fields: list
+        :param fields: columns of Hackathon to return, 'registration' for the registration. None for all
 
-        def to_dict(hackathon, register):
-            dic = hackathon.dic()
-            if register is not None:
-                dic["registration"] = register.dic()
+        :rtype: list
+        :return list of hackathons
+        """
+        status_cond = Hackathon.status == status if status is not None else Hackathon.status > -1
+        hackathons = self.db.find_page(Hackathon, [status_cond], after_id, limit, fields)
 
-            return dic
+        if user_id is None or len(hackathons) == 0 or (fields is not None and "registration" not in fields):
+            return hackathons
 
-        return map(lambda (hack, reg): to_dict(hack, reg), hackathon_with_user_list)
+        registers = self.db.find_all_objects(UserHackathonRel,
+                                             UserHackathonRel.user_id == user_id,
+                                             UserHackathonRel.hackathon_id.in_([h["id"] for h in hackathons]),
+                                             UserHackathonRel.deleted != 1)
+        registers = dict((r.hackathon_id, r) for r in registers)
+        for h in hackathons:
+            if h["id"] in registers:
+                h["registration"] = registers[h["id"]].dic()
+        return hackathons
 
     def is_hackathon_name_existed(self, name):
         """Check whether hackathon with specific name exists or not
@@ -144,15 +171,31 @@ class HackathonManager(Component):
 
         return map(lambda u: u.dic(), hackathon_list)
 
-    def __get_property_from_hackathon_basic_info(self, hackathon, key, default=None):
+    def get_hackathon_settings(self, hackathon):
+        """Get the settings parsed from basic_info of hackathon
+
+        basic_info is parsed only once for every distinct value of it
+
+        :type hackathon: Hackathon
+        :param hackathon: instance of Hackathon
+
+        :rtype: HackathonSettings
+        :return settings of the hackathon. Default settings will be returned if basic_info is invalid
+        """
+        key = (hackathon.id, hackathon.basic_info)
+        settings = self.settings_cache.get(key)
+        if settings is not None:
+            return settings
+
         try:
-            basic_info = json.loads(hackathon.basic_info)
-            return basic_info.get(key, default)
+            settings = HackathonSettings.parse(hackathon.basic_info)
         except Exception as e:
             self.log.error(e)
-            self.log.warn(
-                "cannot get %s from basic info for hackathon %d, will return default value" % (key, hackathon.id))
-            return default
+            self.log.warn("cannot load basic info for hackathon %d, will use default settings" % hackathon.id)
+            settings = HackathonSettings()
+
+        self.settings_cache.set(key, settings)
+        return settings
 
     def validate_hackathon_name(self):
         if HTTP_HEADER.HACKATHON_NAME in request.headers:
@@ -174,40 +217,22 @@ class HackathonManager(Component):
             return False
 
     def is_auto_approve(self, hackathon):
-        key = HACKATHON_BASIC_INFO.AUTO_APPROVE
-        value = self.__get_property_from_hackathon_basic_info(hackathon, key)
-        return value == 1
+        return self.get_hackathon_settings(hackathon).auto_approve
 
     def is_pre_allocate_enabled(self, hackathon):
-        try:
-            basic_info = json.loads(hackathon.basic_info)
-            k = HACKATHON_BASIC_INFO.PRE_ALLOCATE_ENABLED
-            return k in basic_info and basic_info[k] == 1
-        except Exception as e:
-            self.log.error(e)
-            self.log.warn(
-                "cannot load pre_allocate_enabled from basic info for hackathon %d, will return False" % hackathon.id)
-            return False
+        return self.get_hackathon_settings(hackathon).pre_allocate_enabled
 
     def is_alauda_enabled(self, hackathon):
-        key = HACKATHON_BASIC_INFO.ALAUDA_ENABLED
-        value = self.__get_property_from_hackathon_basic_info(hackathon, key)
-        return value if value is not None else False
+        return self.get_hackathon_settings(hackathon).alauda_enabled
 
     def is_recycle_enabled(self, hackathon):
-        key = HACKATHON_BASIC_INFO.RECYCLE_ENABLED
-        value = self.__get_property_from_hackathon_basic_info(hackathon, key)
-        return value if value is not None else False
+        return self.get_hackathon_settings(hackathon).recycle_enabled
 
     def get_recycle_minutes(self, hackathon):
-        key = HACKATHON_BASIC_INFO.RECYCLE_MINUTES
-        value = self.__get_property_from_hackathon_basic_info(hackathon, key)
-        return value if value is not None else 60
+        return self.get_hackathon_settings(hackathon).recycle_minutes
 
     def get_pre_allocate_number(self, hackathon):
-        key = HACKATHON_BASIC_INFO.PRE_ALLOCATE_NUMBER
-        value = self.__get_property_from_hackathon_basic_info(hackathon, key)
-        return value if value is not None else 1
+        return self.get_hackathon_settings(hackathon).pre_allocate_number
 
     def create_new_hackathon(self, context):
         """Create new hackathon based on the http body
@@ -228,6 +253,7 @@ class HackathonManager(Component):
 
         # todo remove the following line ASAP
         self.__test_data(new_hack)
+        self.__invalidate_hackathon_cache()
 
         return new_hack.dic()
 
@@ -241,12 +267,16 @@ class HackathonManager(Component):
         :return hackathon in dict if updated successfully.
         """
         self.log.debug("update a exist hackathon insert args: %r" % args)
-        hackathon = g.hackathon
+        # g.hackathon might come from the name cache which is up to 'hackathon.name_cache.ttl_seconds' old
+        hackathon = self.__get_hackathon_for_update(g.hackathon.id)
+        if hackathon is None:
+            return not_found("hackathon not found")
 
         try:
             update_items = self.__parse_update_items(args, hackathon)
             self.log.debug("update hackathon items :" + str(args))
             self.db.update_object(hackathon, **update_items)
+            self.__invalidate_hackathon_cache()
             return hackathon.dic()
         except Exception as e:
             self.log.error(e)
@@ -319,14 +349,17 @@ class HackathonManager(Component):
         return {"files": images}
 
     def get_recyclable_hackathon_list(self):
-        all = self.db.find_all_objects(Hackathon)
-        return filter(lambda h: self.is_recycle_enabled(h), all)
+        # only online hackathons that are not archived will be in consideration
+        return self.db.find_all_objects(Hackathon,
+                                        Hackathon.status == HACK_STATUS.ONLINE,
+                                        Hackathon.recycle_enabled == 1,
+                                        Hackathon.archive_time.is_(None))
 
     def get_pre_allocate_enabled_hackathon_list(self):
         # only online hackathons will be in consideration
-        all = self.get_online_hackathons()
-        pre_list = filter(lambda h: self.is_pre_allocate_enabled(h), all)
-        return [h.id for h in pre_list]
+        rows = self.db.session().query(Hackathon.id).filter(Hackathon.status == HACK_STATUS.ONLINE,
+                                                            Hackathon.pre_allocate_enabled == 1).all()
+        return [r.id for r in rows]
 
     # ---------------------------- private methods ---------------------------------------------------
 
@@ -345,6 +378,7 @@ class HackathonManager(Component):
             HACKATHON_BASIC_INFO.AUTO_APPROVE: False,
             HACKATHON_BASIC_INFO.RECYCLE_ENABLED: False,
             HACKATHON_BASIC_INFO.RECYCLE_MINUTES: 0,
+            HACKATHON_BASIC_INFO.RECYCLE_IDLE_MINUTES: 0,
             HACKATHON_BASIC_INFO.PRE_ALLOCATE_ENABLED: False,
             HACKATHON_BASIC_INFO.PRE_ALLOCATE_NUMBER: 1,
             HACKATHON_BASIC_INFO.ALAUDA_ENABLED: False
@@ -354,13 +388,41 @@ class HackathonManager(Component):
     def __get_hackathon_by_name(self, name):
         """Get hackathon accoring the unique name
 
+        Hackathons found are cached as detached snapshots and attached to current DB session without query on cache
+        hit. A snapshot loaded concurrently with an update will not be cached.
+
         :type name: str|unicode
         :param name: name of hackathon
 
         :rtype: Hackathon
         :return hackathon instance if found else None
         """
-        return self.db.find_first_object_by(Hackathon, name=name)
+        version = self.hackathon_cache.version
+        snapshot = self.hackathon_cache.get(name)
+        if snapshot is not None:
+            return self.db.attach(snapshot)
+
+        hackathon = self.db.find_first_object_by(Hackathon, name=name)
+        if hackathon is not None:
+            self.hackathon_cache.set(name, self.db.snapshot(hackathon), version=version)
+        return hackathon
+
+    def __get_hackathon_for_update(self, hackathon_id):
+        """Load hackathon from DB, bypassing the name cache
+
+        The instance in current session, attached from a cached snapshot for example, is overwritten by the loaded row.
+
+        :type hackathon_id: int
+        :param hackathon_id: id of hackathon
+
+        :rtype: Hackathon
+        :return hackathon instance if found else None
+        """
+        return self.db.session().query(Hackathon).populate_existing().filter(Hackathon.id == hackathon_id).first()
+
+    def __invalidate_hackathon_cache(self):
+        """Remove all cached hackathon snapshots. MUST be called once any hackathon is created or updated"""
+        self.hackathon_cache.clear()
 
     def __create_hackathon(self, context):
         """Insert hackathon and admin_hackathon_rel to database
@@ -373,7 +435,7 @@ class HackathonManager(Component):
         :rtype: Hackathon
         :return hackathon instance
         """
-
+        basic_info = self.__get_default_basic_info()
         new_hack = Hackathon(
             name=context.name,
             display_name=context.display_name,
@@ -386,9 +448,10 @@ class HackathonManager(Component):
             registration_end_time=context.get("registration_end_time"),
             judge_start_time=context.get("judge_start_time"),
             judge_end_time=context.get("judge_end_time"),
-            basic_info=self.__get_default_basic_info(),
+            basic_info=basic_info,
             extra_info=context.get("extra_info"),
-            type=context.get("type", HACK_TYPE.HACKATHON)
+            type=context.get("type", HACK_TYPE.HACKATHON),
+            **HackathonSettings.parse(basic_info).to_columns()
         )
 
         # insert into table hackathon
@@ -403,6 +466,7 @@ class HackathonManager(Component):
                                     remarks='creator',
                                     create_time=self.util.get_now())
             self.db.add_object(ahl)
+            self.admin_manager.invalidate_entitled_hackathon_ids(g.user.id)
         except Exception as ex:
             # TODO: send out a email to remind administrator to deal with this problems
             self.log.error(ex)
@@ -438,6 +502,13 @@ class HackathonManager(Component):
         result.pop('id', None)
         result.pop('create_time', None)
         result.pop('creator_id', None)
+
+        # columns of settings are copies of basic_info, they can only be updated along with basic_info
+        for column in HackathonSettings.COLUMNS:
+            result.pop(column, None)
+        if self.BASIC_INFO in result:
+            result.update(HackathonSettings.parse(result[self.BASIC_INFO]).to_columns())
+
         result['update_time'] = self.util.get_now()
         return result
 
@@ -470,26 +541,28 @@ hackathon is entity of Hackathon that defines in database/models.py.
 '''
 
 
-def is_auto_approve(hackathon):
+def get_settings(hackathon):
     hack_manager = RequiredFeature("hackathon_manager")
-    return hack_manager.is_auto_approve(hackathon)
+    return hack_manager.get_hackathon_settings(hackathon)
+
+
+def is_auto_approve(hackathon):
+    return get_settings(hackathon).auto_approve
 
 
 def is_pre_allocate_enabled(hackathon):
-    hack_manager = RequiredFeature("hackathon_manager")
-    return hack_manager.is_pre_allocate_enabled(hackathon)
+    return get_settings(hackathon).pre_allocate_enabled
 
 
 def get_pre_allocate_number(hackathon):
-    hack_manager = RequiredFeature("hackathon_manager")
-    return hack_manager.get_pre_allocate_number(hackathon)
+    return get_settings(hackathon).pre_allocate_number
 
 
 def is_alauda_enabled(hackathon):
-    hack_manager = RequiredFeature("hackathon_manager")
-    return hack_manager.is_alauda_enabled(hackathon)
+    return get_settings(hackathon).alauda_enabled
 
 
+Hackathon.get_settings = get_settings
 Hackathon.is_auto_approve = is_auto_approve
 Hackathon.is_pre_allocate_enabled = is_pre_allocate_enabled
 Hackathon.get_pre_allocate_number = get_pre_allocate_number
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+ 
+The MIT License (MIT)
+ 
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+ 
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+ 
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import sys
+
+sys.path.append("..")
+import json
+
+from hackathon.constants import HACKATHON_BASIC_INFO
+
+__all__ = ["HackathonSettings"]
+
+
+class HackathonSettings(object):
+    """Typed view of the settings saved in column 'basic_info' of table 'hackathon'
+
+    It's parsed once from the JSON string and never changed after that, so it's safe to share an instance between
+    threads. Check HACKATHON_BASIC_INFO for the meaning of the settings.
+
+    :Example:
+        settings = HackathonSettings.parse(hackathon.basic_info)
+        if settings.recycle_enabled:
+            print settings.recycle_minutes
+    """
+
+    # settings that have copies in columns of table 'hackathon'
+    COLUMNS = ("recycle_enabled", "recycle_minutes", "recycle_idle_minutes", "pre_allocate_enabled",
+               "pre_allocate_number")
+
+    def __init__(self, basic_info=None):
+        """Create settings from parsed basic_info
+
+        :type basic_info: dict
+        :param basic_info: the parsed basic_info. Default values are used if it's None
+        """
+        basic_info = basic_info or {}
+        self.__basic_info = basic_info
+
+        self.auto_approve = basic_info.get(HACKATHON_BASIC_INFO.AUTO_APPROVE) == 1
+        self.alauda_enabled = basic_info.get(HACKATHON_BASIC_INFO.ALAUDA_ENABLED) or False
+        self.recycle_enabled = basic_info.get(HACKATHON_BASIC_INFO.RECYCLE_ENABLED) or False
+        self.recycle_minutes = self.__get_or_default(HACKATHON_BASIC_INFO.RECYCLE_MINUTES, 60)
+        self.recycle_idle_minutes = self.__get_or_default(HACKATHON_BASIC_INFO.RECYCLE_IDLE_MINUTES, 0)
+        self.pre_allocate_enabled = basic_info.get(HACKATHON_BASIC_INFO.PRE_ALLOCATE_ENABLED) == 1
+        self.pre_allocate_number = self.__get_or_default(HACKATHON_BASIC_INFO.PRE_ALLOCATE_NUMBER, 1)
+        self.max_enrollment = self.__get_or_default(HACKATHON_BASIC_INFO.MAX_ENROLLMENT, 0)
+
+    @staticmethod
+    def parse(basic_info):
+        """Parse settings from the JSON string of basic_info
+
+        :type basic_info: str|unicode
+        :param basic_info: value of column 'basic_info'
+
+        :rtype: HackathonSettings
+        :return settings parsed. Raise ValueError if basic_info is not a valid JSON object
+        """
+        parsed = json.loads(basic_info or "{}")
+        if not isinstance(parsed, dict):
+            raise ValueError("basic_info must be a JSON object")
+        return HackathonSettings(parsed)
+
+    def to_columns(self):
+        """Return the settings that have copies in columns of table 'hackathon'
+
+        :rtype: dict
+        :return column name -> value, which can be passed to update_object or constructor of Hackathon
+        """
+        return {
+            "recycle_enabled": 1 if self.recycle_enabled else 0,
+            "recycle_minutes": self.recycle_minutes,
+            "recycle_idle_minutes": self.recycle_idle_minutes,
+            "pre_allocate_enabled": 1 if self.pre_allocate_enabled else 0,
+            "pre_allocate_number": self.pre_allocate_number
+        }
+
+    def get(self, key, default=None):
+        """Get the raw value of key in basic_info. Don't modify the returned value since it's shared"""
+        return self.__basic_info.get(key, default)
+
+    def __get_or_default(self, key, default):
+        value = self.__basic_info.get(key)
+        return value if value is not None else default
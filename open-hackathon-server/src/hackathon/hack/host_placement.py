@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+ 
+The MIT License (MIT)
+ 
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+ 
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+ 
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+import sys
+
+sys.path.append("..")
+import abc
+import threading
+
+__all__ = ["HostState", "PlacementPolicy", "LeastLoadedPolicy", "BinPackingPolicy", "SpreadPolicy", "get_placement_policy"]
+
+
+class HostState(object):
+    """In-memory state of a docker host that placement decisions are made on
+
+    'alive' is None until the host is pinged for the first time, such host is taken as alive.
+    """
+
+    def __init__(self, docker_host, alive=None, checked_time=None):
+        self.id = docker_host.id
+        self.hackathon_id = docker_host.hackathon_id
+        self.container_count = docker_host.container_count
+        self.container_max_count = docker_host.container_max_count
+        self.alive = alive
+        self.checked_time = checked_time
+
+    def free(self):
+        return self.container_max_count - self.container_count
+
+    def load(self):
+        return float(self.container_count) / self.container_max_count if self.container_max_count > 0 else 1.0
+
+
+class PlacementPolicy(object):
+    """Choose one docker host out of the candidates which all have enough capacity and are alive"""
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    def choose(self, candidates, req_count):
+        """
+        :type candidates: list
+        :param candidates: list of HostState, not empty
+
+        :type req_count: int
+        :param req_count: count of containers to place
+
+        :rtype: HostState
+        """
+        return
+
+
+class LeastLoadedPolicy(PlacementPolicy):
+    """Choose the host with the lowest ratio of containers to its capacity"""
+
+    def choose(self, candidates, req_count):
+        return min(candidates, key=lambda h: (h.load(), h.id))
+
+
+class BinPackingPolicy(PlacementPolicy):
+    """Choose the host with the least free capacity that still fits, so that idle hosts can be released"""
+
+    def choose(self, candidates, req_count):
+        return min(candidates, key=lambda h: (h.free(), h.id))
+
+
+class SpreadPolicy(PlacementPolicy):
+    """Choose hosts in turn regardless of their load"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.last_id = -1
+
+    def choose(self, candidates, req_count):
+        candidates = sorted(candidates, key=lambda h: h.id)
+        with self.lock:
+            host = next((h for h in candidates if h.id > self.last_id), candidates[0])
+            self.last_id = host.id
+            return host
+
+
+PLACEMENT_POLICIES = {
+    "least_loaded": LeastLoadedPolicy,
+    "bin_packing": BinPackingPolicy,
+    "spread": SpreadPolicy
+}
+
+
+def get_placement_policy(name):
+    """Create the placement policy by name
+
+    :type name: str|unicode
+    :param name: one of 'least_loaded', 'bin_packing' and 'spread'
+
+    :rtype: PlacementPolicy
+    """
+    if name not in PLACEMENT_POLICIES:
+        raise ValueError("unknown placement policy '%s'" % name)
+    return PLACEMENT_POLICIES[name]()
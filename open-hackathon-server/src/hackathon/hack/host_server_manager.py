@@ -25,31 +25,191 @@ THE SOFTWARE.
 import sys
 
 sys.path.append("..")
+import threading
+from multiprocessing.pool import ThreadPool
+
+from sqlalchemy import case
 
 from hackathon import Component, RequiredFeature
 from hackathon.database.models import DockerHostServer
+from hackathon.util import get_now
+from host_placement import HostState, get_placement_policy
 
 __all__ = ["DockerHostManager"]
 
 
 class DockerHostManager(Component):
-    """Component to manage docker host server"""
+    """Component to manage docker host server
+
+    Docker hosts are placed in memory by the policy 'docker.placement.policy'(least_loaded, bin_packing or spread).
+    The capacity and health of all hosts are refreshed by a background thread every
+    'docker.placement.refresh_seconds', so no docker host is pinged when an experiment is starting. The container
+    counts in memory are also increased on every placement so that hosts won't be overloaded between two refreshes.
+
+    Capacity of the host chosen is then reserved in DB by a conditional UPDATE of container_count, which fails if the
+    host was filled up by other threads or servers meanwhile, in which case another host is chosen.
+    """
     docker = RequiredFeature("docker")
 
+    def __init__(self):
+        self.policy = get_placement_policy(self.util.safe_get_config("docker.placement.policy", "least_loaded"))
+        self.refresh_seconds = self.util.safe_get_config("docker.placement.refresh_seconds", 30)
+        self.lock = threading.Lock()
+        self.hosts = None  # docker_host.id -> HostState
+        self.refresh_thread = None
+
     def get_available_docker_host(self, req_count, hackathon):
-        vms = self.db.find_all_objects(DockerHostServer,
-                                       DockerHostServer.container_count + req_count <=
-                                       DockerHostServer.container_max_count,
-                                       DockerHostServer.hackathon_id == hackathon.id)
+        """Choose a docker host of hackathon and reserve capacity for req_count more containers
+
+        The capacity is counted in container_count of the host. Call release_capacity() if the containers are not
+        started or once they are stopped.
+
+        :type req_count: int
+        :param req_count: count of containers to start
+
+        :type hackathon: Hackathon
+        :param hackathon: the hackathon that the containers belong to
+
+        :rtype: DockerHostServer
+        """
+        self.__ensure_refresh_thread()
+        host = self.__place_and_reserve(req_count, hackathon.id)
+        if host is None:
+            # hosts might be added or released since last refresh. Health is unknown for new hosts
+            self.__load_hosts()
+            host = self.__place_and_reserve(req_count, hackathon.id)
         # todo connect to azure to launch new VM if no existed VM meet the requirement
         # since it takes some time to launch VM,
         # it's more reasonable to launch VM when the existed ones are almost used up.
         # The new-created VM must run 'cloudvm service by default(either cloud-init or python remote ssh)
         # todo the VM public/private IP will change after reboot, need sync the IP in db with azure in this case
-        for docker_host in vms:
-            if self.docker.hosted_docker.ping(docker_host):
-                return docker_host
-        raise Exception("No available VM.")
+        if host is None:
+            raise Exception("No available VM.")
+        return self.get_host_server_by_id(host.id)
+
+    def reserve_capacity(self, host_id, req_count):
+        """Increase container_count of docker host unless it exceeds container_max_count, atomically
+
+        :type host_id: int
+        :param host_id: id of the docker host
+
+        :type req_count: int
+        :param req_count: count of containers to reserve
+
+        :rtype: bool
+        :return True if reserved, False if the host doesn't have enough capacity
+        """
+        count = self.db.session().query(DockerHostServer) \
+            .filter(DockerHostServer.id == host_id,
+                    DockerHostServer.container_count + req_count <= DockerHostServer.container_max_count) \
+            .update({DockerHostServer.container_count: DockerHostServer.container_count + req_count},
+                    synchronize_session=False)
+        self.db.commit()
+        return count == 1
+
+    def release_capacity(self, host_id, count):
+        """Decrease container_count of docker host atomically, no less than 0
+
+        :type host_id: int
+        :param host_id: id of the docker host
+
+        :type count: int
+        :param count: count of containers released
+        """
+        self.db.session().query(DockerHostServer) \
+            .filter(DockerHostServer.id == host_id) \
+            .update({DockerHostServer.container_count: case([(DockerHostServer.container_count > count,
+                                                               DockerHostServer.container_count - count)],
+                                                             else_=0)},
+                    synchronize_session=False)
+        self.db.commit()
+        with self.lock:
+            host = (self.hosts or {}).get(host_id)
+            if host is not None:
+                host.container_count = max(host.container_count - count, 0)
 
     def get_host_server_by_id(self, id):
         return self.db.find_first_object_by(DockerHostServer, id=id)
+
+    def get_host_states(self):
+        """Get the in-memory states of all docker hosts which placement decisions are made on
+
+        :rtype: list
+        :return list of HostState
+        """
+        with self.lock:
+            return (self.hosts or {}).values()
+
+    def refresh_host_states(self):
+        """Reload capacity of all docker hosts from DB and ping them concurrently"""
+        hosts = self.db.find_all_objects(DockerHostServer)
+        if len(hosts) == 0:
+            self.__set_hosts({})
+            return
+
+        pool = ThreadPool(min(len(hosts), self.util.safe_get_config("docker.placement.ping_pool_size", 10)))
+        try:
+            # ping doesn't touch DB, it's safe to share the host objects of this thread
+            alive = pool.map(self.docker.hosted_docker.ping, hosts)
+        finally:
+            pool.close()
+            pool.join()
+
+        now = get_now()
+        self.__set_hosts(dict((h.id, HostState(h, a, now)) for h, a in zip(hosts, alive)))
+
+    def __place(self, req_count, hackathon_id):
+        with self.lock:
+            if self.hosts is None:
+                return None
+            candidates = [h for h in self.hosts.values()
+                          if h.hackathon_id == hackathon_id and h.free() >= req_count and h.alive is not False]
+            if len(candidates) == 0:
+                return None
+            host = self.policy.choose(candidates, req_count)
+            host.container_count += req_count
+            return host
+
+    def __place_and_reserve(self, req_count, hackathon_id):
+        while True:
+            host = self.__place(req_count, hackathon_id)
+            if host is None or self.reserve_capacity(host.id, req_count):
+                return host
+            # filled up by others since last refresh
+            self.log.debug("docker host %d doesn't have capacity for %d containers" % (host.id, req_count))
+            with self.lock:
+                host.container_count = host.container_max_count
+
+    def __load_hosts(self):
+        """Load hosts from DB without ping. Health of known hosts is kept"""
+        hosts = self.db.find_all_objects(DockerHostServer)
+        with self.lock:
+            known = self.hosts or {}
+            states = {}
+            for h in hosts:
+                old = known.get(h.id)
+                states[h.id] = HostState(h, old.alive, old.checked_time) if old is not None else HostState(h)
+            self.hosts = states
+
+    def __set_hosts(self, states):
+        with self.lock:
+            self.hosts = states
+
+    def __ensure_refresh_thread(self):
+        with self.lock:
+            if self.refresh_thread is None or not self.refresh_thread.is_alive():
+                self.refresh_thread = threading.Thread(target=self.__refresh_forever, name="docker-host-refresh")
+                self.refresh_thread.daemon = True
+                self.refresh_thread.start()
+
+    def __refresh_forever(self):
+        event = threading.Event()
+        while True:
+            try:
+                self.refresh_host_states()
+            except Exception as e:
+                self.log.error(e)
+            finally:
+                # the session of this thread is idle until next refresh
+                self.db.remove()
+            event.wait(self.refresh_seconds)
@@ -114,7 +114,7 @@ class TeamManager(Component):
             return not_found("no such team's members")
 
 
-    def get_hackathon_team_list(self, hackathon_id, name=None, number=None):
+    def get_hackathon_team_list(self, hackathon_id, name=None, number=None, after_id=None, limit=None, fields=None):
         """Get the team list of selected hackathon
 
         :type hackathon_id: int
@@ -124,18 +124,25 @@ class TeamManager(Component):
         :param name: name of team. optional
 
         :type number: int
-        :param number: querying condition, return number of teams
+        :param number: querying condition, return number of teams. Same as limit
+
+        :type after_id: int
+        :param after_id: id of the last team of previous page
+
+        :type limit: int
+        :param limit: max number of teams
+
+        :type fields: list
+        :param fields: columns of Team to return. None for all
 
         :rtype: list
         :return: a list of team filter by name and number on selected hackathon
         """
-        hackathon_team_list = self.db.find_all_objects_by(Team, hackathon_id=hackathon_id)
-        hackathon_team_list = map(lambda x: x.dic(), hackathon_team_list)
+        criterion = [Team.hackathon_id == hackathon_id]
         if name is not None:
-            hackathon_team_list = filter(lambda x: name in x["name"], hackathon_team_list)
-        if number is not None:
-            hackathon_team_list = hackathon_team_list[0:number]
-        return hackathon_team_list
+            criterion.append(Team.name.like('%' + name + '%'))
+
+        return self.db.find_page(Team, criterion, after_id, limit or number, fields)
 
     def create_team(self, kwargs):
         """Create new team by given args.
@@ -453,10 +460,11 @@ class TeamManager(Component):
         :return list of all members as well as user info
         """
         team_members = self.db.find_all_objects_by(UserTeamRel, team_id=team.id)
+        users = self.user_manager.users_display_info([m.user_id for m in team_members])
 
         def get_info(sql_object):
             r = sql_object.dic()
-            r['user'] = self.user_manager.user_display_info(sql_object.user)
+            r['user'] = users.get(sql_object.user_id)
             return r
 
         team_members = map(lambda x: get_info(x), team_members)
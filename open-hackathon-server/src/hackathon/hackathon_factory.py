@@ -23,7 +23,88 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
-__all__ = ["factory", "RequiredFeature"]
+__all__ = ["factory", "RequiredFeature", "Scope"]
+
+import threading
+
+from flask import g, has_request_context
+
+
+class Scope:
+    """Life cycle of the instances that a provider creates
+
+    Attributes:
+        SINGLETON: one instance for the whole process, created lazily upon the first request. The default scope
+        REQUEST: one instance per flask request. Falls back to THREAD if no request context is available
+        THREAD: one instance per thread, useful for stateful objects that are not thread-safe
+        TRANSIENT: a new instance everytime the feature is requested
+    """
+    SINGLETON = "singleton"
+    REQUEST = "request"
+    THREAD = "thread"
+    TRANSIENT = "transient"
+
+
+class ScopedProvider(object):
+    """Create and cache instances for a feature according to its scope
+
+    Singleton instances are created under a lock with double-checked locking so that concurrent threads never get two
+    different instances. Once created, resolving a singleton is a plain attribute read without any lock or allocation.
+    """
+    # marker of instance not created yet, None is a valid instance
+    _NOT_CREATED = object()
+
+    def __init__(self, feature, create, scope):
+        self.feature = feature
+        self.create = create
+        self.scope = scope
+        self.instance = self._NOT_CREATED
+        self.lock = threading.RLock()
+        self.local = threading.local()
+        self.request_key = "_factory_%s" % feature
+
+    def get(self):
+        if self.scope == Scope.SINGLETON:
+            return self.__get_singleton()
+        elif self.scope == Scope.REQUEST:
+            return self.__get_per_request()
+        elif self.scope == Scope.THREAD:
+            return self.__get_per_thread()
+        else:
+            return self.create()
+
+    def reset(self):
+        """Drop the cached singleton and the instance of current thread. Mainly for unit test"""
+        with self.lock:
+            self.instance = self._NOT_CREATED
+            self.local = threading.local()
+
+    def __get_singleton(self):
+        instance = self.instance
+        if instance is self._NOT_CREATED:
+            with self.lock:
+                if self.instance is self._NOT_CREATED:
+                    self.instance = self.create()
+                instance = self.instance
+        return instance
+
+    def __get_per_thread(self):
+        instance = getattr(self.local, "instance", self._NOT_CREATED)
+        if instance is self._NOT_CREATED:
+            instance = self.create()
+            self.local.instance = instance
+        return instance
+
+    def __get_per_request(self):
+        if not has_request_context():
+            return self.__get_per_thread()
+
+        instance = getattr(g, self.request_key, self._NOT_CREATED)
+        if instance is self._NOT_CREATED:
+            instance = self.create()
+            setattr(g, self.request_key, instance)
+        return instance
+
 
 #
 # Hackathon factory
@@ -53,16 +134,22 @@ class HackathonFactory:
         :type provider: object | callable
         :param provider: the object to be added.
 
+        :type scope: str
+        :param scope: keyword only. Life cycle of the instances created by a callable provider, see Scope. Default is
+        Scope.SINGLETON. It's ignored if provider is not callable since the object itself is always returned.
+
         :Example:
             from *** import UserManager
             factory.provide("user_manager", UesrManager)
             factory.provide("user_manager", UesrManager, *init_args, **init_kwargs)
+            factory.provide("azure_adapter", AzureAdapter, scope=Scope.THREAD)
 
             # or:
             um = UserManager
             factory.provide("user_manager", um)
 
         """
+        scope = kwargs.pop("scope", Scope.SINGLETON)
         if not self.allow_replace:
             assert not self.providers.has_key(feature), "Duplicate feature: %r" % feature
         if callable(provider):
@@ -71,14 +158,15 @@ class HackathonFactory:
         else:
             def call():
                 return provider
-        self.providers[feature] = call
+            scope = Scope.SINGLETON
+        self.providers[feature] = ScopedProvider(feature, call, scope)
 
     def __getitem__(self, feature):
         try:
             provider = self.providers[feature]
         except KeyError:
             raise KeyError, "Unknown feature named %r" % feature
-        return provider()
+        return provider.get()
 
 
 factory = HackathonFactory()
@@ -144,18 +232,26 @@ class RequiredFeature(object):
         self.assertion = assertion
 
     def __get__(self, obj, T):
-        return self.result  # <-- will request the feature upon first call
+        return self.request()
 
     def __getattr__(self, name):
-        self.result = self.request()
-        if name == "result":
-            return self.result
-        else:
-            return getattr(self.result, name)
+        # only called for attributes not found on RequiredFeature itself, i.e. members of the target
+        return getattr(self.request(), name)
+
+    @property
+    def result(self):
+        return self.request()
 
     def request(self):
+        """Resolve the feature from factory
+
+        Resolution is cheap after the first call since the factory caches instances according to their scope. The
+        assertion runs only when a different instance is returned, e.g. the first call or a new request/thread.
+        """
         obj = factory[self.feature]
-        assert self.assertion(obj), \
-            "The value %r of %r does not match the specified criteria" \
-            % (obj, self.feature)
+        if obj is not self.__dict__.get("_asserted"):
+            assert self.assertion(obj), \
+                "The value %r of %r does not match the specified criteria" \
+                % (obj, self.feature)
+            self.__dict__["_asserted"] = obj
         return obj
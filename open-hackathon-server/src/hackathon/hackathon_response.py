@@ -34,6 +34,7 @@ __all__ = [
     "precondition_failed",
     "unsupported_mediatype",
     "internal_server_error",
+    "service_unavailable",
     "ok",
 ]
 
@@ -118,6 +119,14 @@ def internal_server_error(message="",
     return __response_with_code(500, message, friendly_message)
 
 
+def service_unavailable(message="",
+                        friendly_message=(
+                                'The server is temporarily unable to service your request due to '
+                                'maintenance downtime or capacity problems.  Please try again later.'
+                        )):
+    return __response_with_code(503, message, friendly_message)
+
+
 def ok(message=""):
     return {
         "code": 200,
@@ -81,12 +81,16 @@ def scheduler_executor(feature, method, context):
     mtd = getattr(inst, method)
     args_len = len(inspect.getargspec(mtd).args)
 
-    if args_len < 2:
-        # if target method doesn't expect any parameter except 'self', the args_len is 1
-        mtd()
-    else:
-        # call with execution context
-        mtd(context)
+    try:
+        if args_len < 2:
+            # if target method doesn't expect any parameter except 'self', the args_len is 1
+            mtd()
+        else:
+            # call with execution context
+            mtd(context)
+    finally:
+        # close the transaction left by read-only queries, the thread will be reused by other jobs
+        RequiredFeature("db").remove()
 
 
 class HackathonScheduler():
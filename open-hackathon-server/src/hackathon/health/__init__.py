@@ -27,10 +27,13 @@
 import sys
 
 sys.path.append("..")
+import threading
+from multiprocessing.pool import ThreadPool
+from multiprocessing import TimeoutError
 
 from hackathon.util import get_now
 from hackathon import RequiredFeature
-from hackathon.constants import HEALTH_STATUS
+from hackathon.constants import HEALTH_STATUS, HEALTH
 
 __all__ = ["report_health"]
 
@@ -39,6 +42,8 @@ __all__ = ["report_health"]
 app_start_time = get_now()
 
 STATUS = "status"
+# seconds since the item was checked
+AGE = "age_seconds"
 
 # all available health check items
 all_health_items = {
@@ -57,6 +62,113 @@ basic_health_items = {
     "storage": RequiredFeature("storage")
 }
 
+util = RequiredFeature("util")
+log = RequiredFeature("log")
+db = RequiredFeature("db")
+
+
+class HealthSnapshot(object):
+    """The latest reports of health check items, refreshed by a background thread
+
+    Items are checked concurrently every 'health.refresh_seconds', each within 'health.item_timeout_seconds'. An item
+    that is still running from a previous round, for example a hung network call, is not checked again until it
+    returns, its last report is kept and gets older. So a slow item never slows down the health API or other items.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reports = {}  # key -> (report, checked time)
+        self.running = set()
+        self.refresh_thread = None
+
+    def get(self, items):
+        """Get the reports of items. Items that never checked are checked right now
+
+        :type items: dict
+        :param items: health check items, key -> item
+
+        :rtype: dict
+        :return key -> (report, checked time)
+        """
+        self.__ensure_refresh_thread()
+        with self.lock:
+            missing = dict((k, v) for k, v in items.iteritems() if k not in self.reports)
+        if missing:
+            self.check(missing)
+
+        with self.lock:
+            return dict((k, self.reports[k]) for k in items.keys() if k in self.reports)
+
+    def check(self, items):
+        """Check items concurrently, wait for each item no longer than 'health.item_timeout_seconds'
+
+        :type items: dict
+        :param items: health check items, key -> item
+        """
+        with self.lock:
+            items = dict((k, v) for k, v in items.iteritems() if k not in self.running)
+            self.running.update(items.keys())
+        if not items:
+            return
+
+        timeout = util.safe_get_config("health.item_timeout_seconds", 5)
+        pool = ThreadPool(len(items))
+        try:
+            results = dict((k, pool.apply_async(self.__check_item, (k, v))) for k, v in items.iteritems())
+            start = get_now()
+            for key, result in results.iteritems():
+                # items run in parallel, so the timeout of every item counts from the same start time
+                remaining = timeout - (get_now() - start).total_seconds()
+                try:
+                    result.get(max(remaining, 0))
+                except TimeoutError:
+                    self.__put(key, {
+                        STATUS: HEALTH_STATUS.ERROR,
+                        HEALTH.DESCRIPTION: "no response in %d seconds" % timeout
+                    })
+        finally:
+            # don't join, a hung item mustn't block. Its thread exits once the item returns
+            pool.close()
+
+    def __check_item(self, key, item):
+        try:
+            report = item.report_health()
+        except Exception as e:
+            log.error(e)
+            report = {
+                STATUS: HEALTH_STATUS.ERROR,
+                HEALTH.DESCRIPTION: e.message
+            }
+        finally:
+            db.remove()
+
+        with self.lock:
+            self.reports[key] = (report, get_now())
+            self.running.discard(key)
+
+    def __put(self, key, report):
+        with self.lock:
+            self.reports[key] = (report, get_now())
+
+    def __ensure_refresh_thread(self):
+        with self.lock:
+            if self.refresh_thread is None or not self.refresh_thread.is_alive():
+                self.refresh_thread = threading.Thread(target=self.__refresh_forever, name="health-check-refresh")
+                self.refresh_thread.daemon = True
+                self.refresh_thread.start()
+
+    def __refresh_forever(self):
+        event = threading.Event()
+        while True:
+            event.wait(util.safe_get_config("health.refresh_seconds", 10))
+            try:
+                self.check(all_health_items)
+            except Exception as e:
+                log.error(e)
+
+
+snapshot = HealthSnapshot()
+
 
 def __report_detail(health, items):
     """Report the details of health check item
@@ -68,10 +180,12 @@ def __report_detail(health, items):
     :param items: a dict that contains all detail items to check
 
     :rtype dict
-    :return health status including overall status and details of sub items
+    :return health status including overall status and details of sub items, each with the seconds since it's checked
     """
-    for key, value in items.iteritems():
-        sub_report = value.report_health()
+    now = get_now()
+    for key, (report, checked_time) in snapshot.get(items).iteritems():
+        sub_report = dict(report)
+        sub_report[AGE] = int((now - checked_time).total_seconds())
         health[key] = sub_report
         if sub_report[STATUS] != HEALTH_STATUS.OK and health[STATUS] != HEALTH_STATUS.ERROR:
             health[STATUS] = sub_report[STATUS]
@@ -112,14 +112,15 @@ class AlaudaDockerHealthCheck(HealthCheck):
 
 
 class GuacamoleHealthCheck(HealthCheck):
-    """Check the status of Guacamole Server by request its homepage"""
+    """Check the status of Guacamole Server by request the headers of its homepage"""
 
     def __init__(self):
         self.guacamole_url = self.util.get_config("guacamole.host") + '/guacamole'
+        self.timeout = self.util.safe_get_config("health.item_timeout_seconds", 5)
 
     def report_health(self):
         try:
-            req = requests.get(self.guacamole_url)
+            req = requests.head(self.guacamole_url, timeout=self.timeout, allow_redirects=True)
             self.log.debug(req.status_code)
             if req.status_code == 200:
                 return {
@@ -137,16 +138,12 @@ class AzureHealthCheck(HealthCheck):
 
     def report_health(self):
         azure_key = self.db.find_first_object(AzureKey)
-<<<<<<< HEAD
-        azure = AzureAdapter(azure_key.id)
-=======
         if not azure_key:
             return {
                 STATUS: HEALTH_STATUS.WARNING,
                 DESCRIPTION: "No Azure key found"
             }
-        azure = Service(azure_key.id)
->>>>>>> msopentech/master
+        azure = AzureAdapter(azure_key.id)
         if azure.ping():
             return {
                 STATUS: HEALTH_STATUS.OK
@@ -160,7 +157,7 @@ class StorageHealthCheck(HealthCheck):
     """Check the status of storage"""
 
     def report_health(self):
-        self.storage.report_health()
+        return self.storage.report_health()
 
     def __init__(self):
         self.storage = RequiredFeature("storage")
@@ -32,19 +32,45 @@ from flask import g
 from hackathon.database.models import UserHackathonRel, Experiment, UserProfile
 from hackathon.hackathon_response import bad_request, precondition_failed, internal_server_error, not_found, ok
 from hackathon.constants import EStatus, RGStatus, ReservedUser
-import json
 
 
 class RegisterManager(Component):
     hackathon_manager = RequiredFeature("hackathon_manager")
     user_manager = RequiredFeature("user_manager")
 
-    def get_hackathon_registration(self, num=None):
-        registers = self.db.find_all_objects_order_by(UserHackathonRel,
-                                                      num,  # limit num
-                                                      UserHackathonRel.create_time.desc(),
-                                                      hackathon_id=g.hackathon.id)
-        return map(lambda x: self.get_registration_with_profile(x), registers)
+    def get_hackathon_registration(self, num=None, after_id=None, limit=None, fields=None):
+        """Get a page of registrations of current hackathon, the latest first
+
+        :type num: int
+        :param num: same as limit, kept for the legacy API
+
+        :type after_id: int
+        :param after_id: id of the last registration of previous page
+
+        :type limit: int
+        :param limit: max number of registrations
+
+        :type fields: list
+        :param fields: columns of UserHackathonRel to return, 'user' for user info. None for all
+
+        :rtype: list
+        :return list of registrations along with user info
+        """
+        with_user = fields is None or "user" in fields
+        if with_user and fields is not None:
+            fields = fields + ["user_id"]
+
+        registers = self.db.find_page(UserHackathonRel,
+                                      [UserHackathonRel.hackathon_id == g.hackathon.id],
+                                      after_id,
+                                      limit or num,
+                                      fields,
+                                      desc=True)
+        if with_user:
+            users = self.user_manager.users_display_info([r["user_id"] for r in registers])
+            for r in registers:
+                r['user'] = users.get(r["user_id"])
+        return registers
 
     def get_registration_with_profile(self, register):
         register_dic = register.dic()
@@ -58,7 +84,7 @@ class RegisterManager(Component):
         return self.db.find_first_object_by(UserHackathonRel, user_id=user_id, hackathon_id=hackathon_id)
 
     def check_register_enrollment(self, hackathon):
-        max = int(json.loads(hackathon.basic_info)['max_enrollment'])
+        max = int(hackathon.get_settings().max_enrollment)
         if max == 0:  # means no limit
             return True
         else:
@@ -92,13 +92,31 @@ class TemplateManager(Component):
     def get_template_by_name(self, template_name):
         return self.db.find_first_object_by(Template, name=template_name)
 
-    def get_templates_by_hackathon_id(self, hackathon_id):
-        htrs = self.db.find_all_objects_by(HackathonTemplateRel, hackathon_id=hackathon_id)
-        return map(lambda x: x.template, htrs)
+    def get_templates_by_hackathon_id(self, hackathon_id, after_id=None, limit=None, fields=None):
+        """Get a page of the templates of hackathon
 
-    def get_template_list(self, **kwargs):
+        :type fields: list
+        :param fields: columns of Template to return. None for all
+
+        :rtype: list
+        :return list of templates in dict
+        """
+        template_ids = self.db.session().query(HackathonTemplateRel.template_id) \
+            .filter(HackathonTemplateRel.hackathon_id == hackathon_id) \
+            .subquery()
+        return self.db.find_page(Template, [Template.id.in_(template_ids)], after_id, limit, fields)
+
+    def get_template_list(self, after_id=None, limit=None, fields=None, **kwargs):
+        """Get a page of templates filtered by status, name and description
+
+        :type fields: list
+        :param fields: columns of Template to return. None for all
+
+        :rtype: list
+        :return list of templates in dict
+        """
         condition = self.__get_filter_condition(**kwargs)
-        return self.db.find_all_objects(Template, condition)
+        return self.db.find_page(Template, [condition], after_id, limit, fields)
 
     def get_user_templates(self, user, hackathon):
         template_list = self.__get_templates_by_user(user, hackathon)
@@ -30,9 +30,11 @@ sys.path.append("..")
 
 from flask import request, g
 
-from hackathon.database import UserToken, User, UserEmail
+from hackathon.database import UserToken, User, UserEmail, UserProfile
 from hackathon.constants import ReservedUser, HTTP_HEADER
 from hackathon import Component, RequiredFeature
+from hackathon.cache import TTLCache
+from hackathon.hackathon_response import ok
 
 __all__ = ["UserManager"]
 
@@ -41,6 +43,11 @@ class UserManager(Component):
     """Component for user management"""
     admin_manager = RequiredFeature("admin_manager")
 
+    def __init__(self):
+        # token -> detached snapshot of User. Entries never outlive the expire_date of the token
+        self.token_cache = TTLCache(max_size=self.util.safe_get_config("login.token_cache.max_size", 10000),
+                                    ttl_seconds=self.util.safe_get_config("login.token_cache.ttl_seconds", 300))
+
     def validate_login(self):
         """Make sure user token is included in http request headers and it must NOT be expired
 
@@ -60,6 +67,34 @@ class UserManager(Component):
         g.user = user
         return True
 
+    def logout(self, user):
+        """Logout user by deleting all the tokens of the user
+
+        :type user: User
+        :param user: the user to logout
+
+        :return ok() if logout successfully
+        """
+        self.db.delete_all_objects_by(UserToken, user_id=user.id)
+        self.invalidate_user_tokens(user.id)
+        self.db.update_object(user, online=0)
+        return ok()
+
+    def invalidate_user_tokens(self, user_id):
+        """Remove all cached tokens of specific user
+
+        :type user_id: int
+        :param user_id: id of the user
+        """
+        self.token_cache.invalidate_if(lambda token, user: user.id == user_id)
+
+    def get_token_cache_stats(self):
+        """Return the size, hits, misses and evictions of token cache
+
+        :rtype: dict
+        """
+        return self.token_cache.stats()
+
     def get_user_by_id(self, user_id):
         """Query user by unique id
 
@@ -104,21 +139,32 @@ class UserManager(Component):
         if user is None:
             return None
 
-        ret = {
-            "id": user.id,
-            "name": user.name,
-            "nickname": user.nickname,
-            "email": [e.dic() for e in user.emails.all()],
-            "provider": user.provider,
-            "avatar_url": user.avatar_url,
-            "online": user.online,
-            "create_time": str(user.create_time),
-            "last_login_time": str(user.last_login_time)
-        }
-        if user.profile:
-            ret["user_profile"] = user.profile.dic()
+        return self.__display_info(user, user.emails.all(), user.profile)
 
-        return ret
+    def users_display_info(self, user_ids):
+        """Return detail information of many users at once
+
+        Users, emails and profiles are loaded in three queries no matter how many users there are. Use it instead of
+        user_display_info when building lists.
+
+        :type user_ids: list
+        :param user_ids: ids of the users. Duplicates and None are allowed
+
+        :rtype dict
+        :return user id -> user detail info same as user_display_info. Users not found are absent
+        """
+        user_ids = list(set(uid for uid in user_ids if uid is not None))
+        if len(user_ids) == 0:
+            return {}
+
+        users = self.db.find_all_objects(User, User.id.in_(user_ids))
+        emails = {}
+        for e in self.db.find_all_objects(UserEmail, UserEmail.user_id.in_(user_ids)):
+            emails.setdefault(e.user_id, []).append(e)
+        profiles = self.db.find_all_objects(UserProfile, UserProfile.user_id.in_(user_ids))
+        profiles = dict((p.user_id, p) for p in profiles)
+
+        return dict((u.id, self.__display_info(u, emails.get(u.id, []), profiles.get(u.id))) for u in users)
 
     def is_super_admin(self, user):
         """Check whether an user is super admin or not
@@ -138,17 +184,48 @@ class UserManager(Component):
 
     # ----------------------------private methods-------------------------------------
 
+    def __display_info(self, user, emails, profile):
+        ret = {
+            "id": user.id,
+            "name": user.name,
+            "nickname": user.nickname,
+            "email": [e.dic() for e in emails],
+            "provider": user.provider,
+            "avatar_url": user.avatar_url,
+            "online": user.online,
+            "create_time": str(user.create_time),
+            "last_login_time": str(user.last_login_time)
+        }
+        if profile:
+            ret["user_profile"] = profile.dic()
+
+        return ret
+
     def __validate_token(self, token):
         """Validate token to make sure it exists and not expired
 
+        Valid tokens are cached along with a snapshot of the user, so that we don't query DB for every request. The
+        snapshot is attached to current DB session without query. Note that tokens deleted by other processes keep
+        valid in cache until they expire which is at most 'login.token_cache.ttl_seconds'.
+
         :type token: str|unicode
         :param token: token strin
 
         :rtype: User
         :return user related to the token or None if token is invalid
         """
+        version = self.token_cache.version
+        snapshot = self.token_cache.get(token)
+        if snapshot is not None:
+            return self.db.attach(snapshot)
+
+        now = self.util.get_now()
         t = self.db.find_first_object_by(UserToken, token=token)
-        if t is not None and t.expire_date >= self.util.get_now():
-            return t.user
+        if t is not None and t.expire_date >= now:
+            user = t.user
+            if user is not None:
+                self.token_cache.set(token, self.db.snapshot(user), (t.expire_date - now).total_seconds(),
+                                     version=version)
+            return user
 
         return None
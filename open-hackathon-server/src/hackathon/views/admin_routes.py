@@ -33,6 +33,7 @@ from flask import g, request
 from hackathon import api, RequiredFeature
 from hackathon.decorators import hackathon_name_required, admin_privilege_required
 from hackathon.hackathon_response import not_found, bad_request
+from pagination import get_page_args
 
 __all__ = ["register_admin_routes"]
 
@@ -46,7 +47,7 @@ expr_manager = RequiredFeature("expr_manager")
 class AdminRegisterListResource(Resource):
     @admin_privilege_required
     def get(self):
-        return register_manager.get_hackathon_registration()
+        return register_manager.get_hackathon_registration(**get_page_args())
 
 
 class AdminRegisterResource(Resource):
@@ -78,8 +79,7 @@ class AdminRegisterResource(Resource):
 class AdminHackathonTemplateListResource(Resource):
     @hackathon_name_required
     def get(self):
-        templates = template_manager.get_templates_by_hackathon_id(g.hackathon.id)
-        return map(lambda x: x.dic(), templates)
+        return template_manager.get_templates_by_hackathon_id(g.hackathon.id, **get_page_args())
 
 
 class AdminHackathonTemplateResource(Resource):
@@ -109,7 +109,8 @@ class ExperimentListResource(Resource):
         args = parse.parse_args()
         return expr_manager.get_expr_list_by_hackathon_id(g.hackathon.id,
                                                           user_name=args['user_name'],
-                                                          status=args['status'])
+                                                          status=args['status'],
+                                                          **get_page_args())
 
 
 class AdminExperimentResource(Resource):
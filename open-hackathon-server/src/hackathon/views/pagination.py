@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+ 
+The MIT License (MIT)
+ 
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+ 
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+ 
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+
+import sys
+
+sys.path.append("..")
+
+from flask_restful import reqparse
+
+__all__ = ["get_page_args"]
+
+
+def get_page_args():
+    """Parse the keyset pagination and projection arguments of list APIs from query string
+
+    'after_id' is the id of the last item of previous page, 'limit' is the max number of items and 'fields' is a comma
+    separated list of the columns to return. For example: /api/template/list?after_id=20&limit=10&fields=id,name
+
+    :rtype: dict
+    :return dict with keys 'after_id', 'limit' and 'fields' which can be passed to the list methods of managers
+    """
+    parse = reqparse.RequestParser()
+    parse.add_argument('after_id', type=int, location='args')
+    parse.add_argument('limit', type=int, location='args')
+    parse.add_argument('fields', type=str, location='args')
+    args = parse.parse_args()
+
+    fields = args['fields']
+    if fields is not None:
+        fields = [f.strip() for f in fields.split(",") if f.strip()]
+    return {
+        "after_id": args['after_id'],
+        "limit": args['limit'],
+        "fields": fields
+    }
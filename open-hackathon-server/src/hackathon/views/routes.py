@@ -32,6 +32,7 @@ from flask import g, request
 from flask_restful import Resource, reqparse
 from hackathon.decorators import hackathon_name_required, token_required
 from hackathon.hackathon_response import not_found
+from pagination import get_page_args
 
 hackathon_manager = RequiredFeature("hackathon_manager")
 user_manager = RequiredFeature("user_manager")
@@ -52,7 +53,7 @@ class HackathonListResource(Resource):
         parse.add_argument('user_id', type=int, location='args')
         parse.add_argument('status', type=int, location='args')
         args = parse.parse_args()
-        return hackathon_manager.get_hackathon_list(args["user_id"], args["status"])
+        return hackathon_manager.get_hackathon_list(args["user_id"], args["status"], **get_page_args())
 
 
 class HackathonStatResource(Resource):
@@ -74,7 +75,7 @@ class HackathonRegisterResource(Resource):
         parse = reqparse.RequestParser()
         parse.add_argument('num', type=int, location='args', default=5)
         args = parse.parse_args()
-        return register_manager.get_hackathon_registration(args['num'])
+        return register_manager.get_hackathon_registration(args['num'], **get_page_args())
 
 
 class HackathonTeamListResource(Resource):
@@ -85,7 +86,7 @@ class HackathonTeamListResource(Resource):
         parse.add_argument('number', type=int, location='args', required=False)
         result = parse.parse_args()
         id = g.hackathon.id
-        return team_manager.get_hackathon_team_list(id, result['name'], result['number'])
+        return team_manager.get_hackathon_team_list(id, result['name'], result['number'], **get_page_args())
 
 
 class TemplateResource(Resource):
@@ -131,17 +132,16 @@ class TemplateListResource(Resource):
         parse.add_argument('name', type=str, location='args', required=False)
         parse.add_argument('description', type=str, location='args', required=False)
         args = parse.parse_args()
-        templates = template_manager.get_template_list(status=args['status'],
-                                                       name=args['name'],
-                                                       description=args['description'])
-        return map(lambda x: x.dic(), templates)
+        return template_manager.get_template_list(status=args['status'],
+                                                  name=args['name'],
+                                                  description=args['description'],
+                                                  **get_page_args())
 
 
 class HackathonTemplateListResource(Resource):
     @hackathon_name_required
     def get(self):
-        templates = template_manager.get_templates_by_hackathon_id(g.hackathon.id)
-        return map(lambda x: x.dic(), templates)
+        return template_manager.get_templates_by_hackathon_id(g.hackathon.id, **get_page_args())
 
 
 def register_routes():
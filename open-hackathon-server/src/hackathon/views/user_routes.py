@@ -27,7 +27,7 @@ import sys
 sys.path.append("..")
 
 from hackathon import api, RequiredFeature, Component
-from flask import g, request
+from flask import g, request, Response
 from flask_restful import Resource, reqparse
 from hackathon.decorators import token_required, hackathon_name_required
 from hackathon.hackathon_response import internal_server_error, not_found, bad_request
@@ -54,6 +54,12 @@ class CurrentUserResource(Resource):
         return user_manager.user_display_info(g.user)
 
 
+class UserLoginResource(Resource):
+    @token_required
+    def delete(self):
+        return user_manager.logout(g.user)
+
+
 class UserHackathonRelResource(Resource, Component):
     @token_required
     @hackathon_name_required
@@ -83,13 +89,23 @@ class UserHackathonListResource(Resource):
         return hackathon_manager.get_user_hackathon_list(args['user_id'])
 
 
+def expr_status_response(expr_id, wait=0):
+    """Response with the status of experiment and its ETag, or 304 if it's not changed from header If-None-Match"""
+    report, etag = expr_manager.watch_expr_status(expr_id, request.headers.get("If-None-Match"), wait)
+    if report is None:
+        return Response(status=304, headers={"ETag": etag})
+    if etag is None:
+        return report
+    return report, 200, {"ETag": etag}
+
+
 class UserExperimentResource(Resource, Component):
     def get(self):
         parser = reqparse.RequestParser()
         parser.add_argument('id', type=int, location='args', required=True)
         args = parser.parse_args()
         try:
-            return expr_manager.get_expr_status(args['id'])
+            return expr_status_response(args['id'])
         except Exception as e:
             self.log.error(e)
             return internal_server_error("cannot find the experiment")
@@ -102,7 +118,8 @@ class UserExperimentResource(Resource, Component):
         template_name = args["template_name"]
         hackathon = args["hackathon"]
         try:
-            return expr_manager.start_expr(hackathon, template_name, g.user.id)
+            # with "async": true, the experiment is started in background. Poll its status by get()
+            return expr_manager.start_expr(hackathon, template_name, g.user.id, args.get("async", False))
         except Exception as err:
             self.log.error(err)
             return {"error": "fail to start due to '%s'" % err}, 500
@@ -124,6 +141,24 @@ class UserExperimentResource(Resource, Component):
         return expr_manager.heart_beat(args["id"])
 
 
+class UserExperimentStatusResource(Resource, Component):
+    def get(self):
+        """Long poll the status of experiment
+
+        Blocks at most 'wait' seconds until the status or remote servers of experiment change from what header
+        If-None-Match refers to. Responses 304 if nothing changed.
+        """
+        parser = reqparse.RequestParser()
+        parser.add_argument('id', type=int, location='args', required=True)
+        parser.add_argument('wait', type=int, location='args', default=30)
+        args = parser.parse_args()
+        try:
+            return expr_status_response(args['id'], args['wait'])
+        except Exception as e:
+            self.log.error(e)
+            return internal_server_error("cannot find the experiment")
+
+
 class UserExperimentListResource(Resource):
     def get(self):
         parse = reqparse.RequestParser()
@@ -283,6 +318,7 @@ def register_user_routes():
 
     # user API
     api.add_resource(CurrentUserResource, "/api/user")
+    api.add_resource(UserLoginResource, "/api/user/login")
 
     # user-hackathon-relationship, or register, API
     api.add_resource(UserHackathonRelResource, "/api/user/registration")
@@ -290,6 +326,7 @@ def register_user_routes():
 
     # experiment API
     api.add_resource(UserExperimentResource, "/api/user/experiment")
+    api.add_resource(UserExperimentStatusResource, "/api/user/experiment/status")
     api.add_resource(UserExperimentListResource, "/api/user/experiment/list")
 
     # team API
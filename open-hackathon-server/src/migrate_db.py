@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateColumn
+
+from hackathon.database import Base, engine
+from hackathon.database.models import Hackathon, PortBinding, HostPortReservation
+from hackathon.constants import PortBindingType
+from hackathon.database import db_adapter
+from hackathon.hack.hackathon_settings import HackathonSettings
+
+
+def add_missing_columns():
+    """Add columns that are defined in models but not exist in db yet
+
+    Base.metadata.create_all only creates missing tables, existing tables won't be altered. New columns are added as
+    nullable, values must be filled by the migration that introduces them.
+    """
+    inspector = inspect(engine)
+    existing_tables = inspector.get_table_names()
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+
+        existing_columns = [c["name"] for c in inspector.get_columns(table.name)]
+        for column in table.columns:
+            if column.name not in existing_columns:
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                print "add column %s.%s" % (table.name, column.name)
+                engine.execute("ALTER TABLE %s ADD COLUMN %s" % (table.name, ddl))
+
+
+def add_missing_indexes():
+    """Create indexes that are defined in models but not exist in db yet
+
+    An index is regarded as existing if there is an index of the same name or of the same columns, for example the one
+    MySQL creates for a foreign key or the one created by hand.
+    """
+    inspector = inspect(engine)
+    existing_tables = inspector.get_table_names()
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+
+        existing_indexes = inspector.get_indexes(table.name)
+        existing_names = [i["name"] for i in existing_indexes]
+        existing_columns = [i["column_names"] for i in existing_indexes]
+        for index in table.indexes:
+            if index.name in existing_names or [c.name for c in index.columns] in existing_columns:
+                continue
+            print "create index %s on %s" % (index.name, table.name)
+            index.create(bind=engine)
+
+
+def sync_hackathon_settings():
+    """Copy settings in basic_info to the columns of table hackathon"""
+    for hackathon in db_adapter.find_all_objects(Hackathon):
+        try:
+            settings = HackathonSettings.parse(hackathon.basic_info)
+        except ValueError:
+            settings = HackathonSettings()
+        db_adapter.update_object(hackathon, **settings.to_columns())
+
+
+def sync_host_port_reservations():
+    """Reserve the host ports of existing docker port bindings, which were assigned before reservations introduced"""
+    bindings = db_adapter.find_all_objects_by(PortBinding, binding_type=PortBindingType.DOCKER)
+    for binding in bindings:
+        db_adapter.add_object_if_absent(HostPortReservation,
+                                        docker_host_server_id=binding.binding_resource_id,
+                                        port=binding.port_from,
+                                        experiment_id=binding.experiment_id)
+
+
+def migrate_db():
+    """Upgrade the structure of an existing db to the latest models
+
+    It's safe to run it multiple times. Run setup_db.py instead for a new db.
+    """
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    add_missing_indexes()
+    sync_hackathon_settings()
+    sync_host_port_reservations()
+
+
+if __name__ == "__main__":
+    migrate_db()
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+
+# Micro-benchmark of feature resolution through hackathon_factory.
+#
+# A request protected by @admin_privilege_required is simulated: user_manager, hackathon_manager and admin_manager are
+# resolved through module level RequiredFeature, and each of them touches self.db/self.log/self.util a few times just
+# like the real components do. The numbers of instances created per request and the time per request are reported
+# for Scope.TRANSIENT(every resolution creates a new instance, which is what module level RequiredFeature used to do)
+# and Scope.SINGLETON(the default now).
+#
+# run in command line:
+# python bench_factory.py [requests]
+
+import sys
+import imp
+import timeit
+from os.path import realpath, dirname, join
+
+factory_path = join(dirname(realpath(__file__)), "../../src/hackathon/hackathon_factory.py")
+# load the module directly so that flask app, DB engine and scheduler in hackathon/__init__.py are not initialized
+hackathon_factory = imp.load_source("hackathon_factory", factory_path)
+HackathonFactory, RequiredFeature, Scope = \
+    hackathon_factory.HackathonFactory, hackathon_factory.RequiredFeature, hackathon_factory.Scope
+
+created = {"count": 0}
+
+
+class Counted(object):
+    def __init__(self, *args, **kwargs):
+        created["count"] += 1
+
+
+class Adapter(Counted):
+    def find_first_object_by(self, *args, **kwargs):
+        return None
+
+
+class Log(Counted):
+    def debug(self, msg):
+        pass
+
+
+class Util(Counted):
+    def get_now(self):
+        return 0
+
+
+class Component(Counted):
+    log = RequiredFeature("log")
+    db = RequiredFeature("db")
+    util = RequiredFeature("util")
+
+
+class UserManager(Component):
+    def validate_login(self):
+        self.db.find_first_object_by("UserToken", token="token")
+        self.util.get_now()
+        return True
+
+
+class HackathonManager(Component):
+    def validate_hackathon_name(self):
+        self.db.find_first_object_by("Hackathon", name="name")
+        self.log.debug("hackathon found")
+        return True
+
+
+class AdminManager(Component):
+    def validate_admin_privilege_http(self):
+        self.db.find_first_object_by("AdminHackathonRel", user_id=1)
+        self.db.find_first_object_by("AdminHackathonRel", hackathon_id=1)
+        return True
+
+
+user_manager = RequiredFeature("user_manager")
+hack_manager = RequiredFeature("hackathon_manager")
+admin_manager = RequiredFeature("admin_manager")
+
+
+def simulate_request():
+    user_manager.validate_login()
+    hack_manager.validate_hackathon_name()
+    admin_manager.validate_admin_privilege_http()
+
+
+def setup_factory(scope):
+    hackathon_factory.factory = HackathonFactory()
+    f = hackathon_factory.factory
+    f.provide("db", Adapter, "db_session", scope=scope)
+    f.provide("log", Log, scope=scope)
+    f.provide("util", Util, scope=scope)
+    f.provide("user_manager", UserManager, scope=scope)
+    f.provide("hackathon_manager", HackathonManager, scope=scope)
+    f.provide("admin_manager", AdminManager, scope=scope)
+
+
+def run(scope, requests):
+    setup_factory(scope)
+    # warm up so that singletons are created before measuring
+    simulate_request()
+    created["count"] = 0
+    seconds = timeit.timeit(simulate_request, number=requests)
+    return float(created["count"]) / requests, seconds * 1000000 / requests
+
+
+if __name__ == '__main__':
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print "%-10s %24s %16s" % ("scope", "instances per request", "us per request")
+    for scope in [Scope.TRANSIENT, Scope.SINGLETON]:
+        instances, us = run(scope, requests)
+        print "%-10s %24.1f %16.2f" % (scope, instances, us)
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+
+# Micro-benchmark of serializing DB models to dict, which is what the list APIs spend most time on besides DB.
+#
+# 10k Experiment rows are serialized by:
+#   legacy: to_dic before the serializers were precompiled, which looks up the converters for every column of every row
+#   dic():  DBBase.dic() of instances, through the precompiled serializer of Experiment
+#   rows:   DBBase.rows_dic() of row tuples queried by columns, which is what find_page does
+# The results of the three are checked to be the same.
+#
+# run in command line:
+# python bench_serializer.py [rows]
+
+import sys
+import timeit
+from datetime import datetime
+from os.path import realpath, dirname, join
+
+sys.path.append(join(dirname(realpath(__file__)), "../../src"))
+
+from hackathon.database.models import Experiment, TZDateTime, date_serializer
+
+
+def legacy_to_dic(inst, cls):
+    convert = dict()
+    convert[TZDateTime] = date_serializer
+
+    d = dict()
+    for c in cls.__table__.columns:
+        v = getattr(inst, c.name)
+        if c.type.__class__ in convert.keys() and v is not None:
+            try:
+                func = convert[c.type.__class__]
+                d[c.name] = func(v)
+            except:
+                d[c.name] = "Error:  Failed to covert using ", str(convert[c.type.__class__])
+        else:
+            d[c.name] = v
+    return d
+
+
+def make_experiments(count):
+    now = datetime(2015, 10, 1)
+    return [Experiment(id=i, status=2, create_time=now, update_time=None, last_heart_beat_time=now, template_id=1,
+                       user_id=i, hackathon_id=1) for i in range(count)]
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    columns = list(Experiment.__table__.columns)
+    experiments = make_experiments(count)
+    rows = [tuple(getattr(e, c.name) for c in columns) for e in experiments]
+
+    benchmarks = [
+        ("legacy", lambda: [legacy_to_dic(e, Experiment) for e in experiments]),
+        ("dic()", lambda: [e.dic() for e in experiments]),
+        ("rows", lambda: Experiment.rows_dic(columns, rows)),
+    ]
+
+    expected = benchmarks[0][1]()
+    print "%-10s %16s %16s" % ("serializer", "ms per run", "us per row")
+    for name, func in benchmarks:
+        assert func() == expected, name
+        seconds = min(timeit.repeat(func, number=1, repeat=5))
+        print "%-10s %16.2f %16.2f" % (name, seconds * 1000, seconds * 1000000 / count)
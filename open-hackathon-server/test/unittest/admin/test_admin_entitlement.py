@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("../src/hackathon")
+import unittest
+from mock import Mock
+
+from hackathon import app
+from hackathon.database.models import AdminHackathonRel
+from hackathon.hack.admin_manager import AdminManager
+
+
+class DeletableRel(object):
+    """Stands for an AdminHackathonRel which is expired once its row deleted"""
+
+    def __init__(self, user_id, hackathon_id):
+        self.deleted = False
+        self.hackathon_id = hackathon_id
+        self.__user_id = user_id
+
+    @property
+    def user_id(self):
+        if self.deleted:
+            raise Exception("ObjectDeletedError")
+        return self.__user_id
+
+
+class AdminEntitlementTest(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.am = AdminManager()
+        self.am.db = Mock()
+        self.am.hackathon_manager = Mock()
+        self.am.hackathon_manager.get_hackathon_by_id.return_value = Mock(creator_id=1)
+
+    def test_entitlement_cached(self):
+        self.am.db.find_all_objects_by.return_value = [AdminHackathonRel(user_id=2, hackathon_id=5)]
+        self.assertTrue(self.am.validate_admin_privilege(2, 5))
+        self.assertTrue(self.am.validate_admin_privilege(2, 5))
+        self.assertFalse(self.am.validate_admin_privilege(2, 6))
+        self.assertEqual(1, self.am.db.find_all_objects_by.call_count)
+
+    def test_delete_admin_invalidates_entitlement(self):
+        self.am.db.find_all_objects_by.return_value = [AdminHackathonRel(user_id=2, hackathon_id=5)]
+        self.assertTrue(self.am.validate_admin_privilege(2, 5))
+
+        ahl = DeletableRel(2, 5)
+        self.am.db.find_first_object.return_value = ahl
+
+        def delete(*args):
+            ahl.deleted = True
+            self.am.db.find_all_objects_by.return_value = []
+
+        self.am.db.delete_all_objects.side_effect = delete
+
+        self.assertNotIn("error", self.am.delete_admin(10))
+        self.assertFalse(self.am.validate_admin_privilege(2, 5))
+
+    def test_delete_creator(self):
+        self.am.db.find_first_object.return_value = DeletableRel(1, 5)
+        self.assertIn("error", self.am.delete_admin(10))
+        self.assertEqual(0, self.am.db.delete_all_objects.call_count)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+
+import sys
+
+sys.path.append("../src/hackathon")
+import unittest
+
+from hackathon.cache.ttl_cache import TTLCache
+
+
+class FakeTimer(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TTLCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.timer = FakeTimer()
+        self.cache = TTLCache(max_size=2, ttl_seconds=60, timer=self.timer)
+
+    def test_get_before_expire(self):
+        self.cache.set("token", "user")
+        self.timer.now += 59
+        self.assertEqual(self.cache.get("token"), "user")
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_get_after_expire(self):
+        self.cache.set("token", "user")
+        self.timer.now += 61
+        self.assertIsNone(self.cache.get("token"))
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_ttl_capped_by_default(self):
+        self.cache.set("token", "user", ttl_seconds=3600)
+        self.timer.now += 61
+        self.assertIsNone(self.cache.get("token"))
+
+    def test_evict_least_recently_used(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_invalidate_if(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.invalidate_if(lambda k, v: v == 1)
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.get("b"), 2)
+
+    def test_set_ignored_after_invalidation(self):
+        version = self.cache.version
+        self.cache.invalidate("a")
+        self.cache.set("a", 1, version=version)
+        self.assertIsNone(self.cache.get("a"))
+
+        self.cache.set("a", 2, version=self.cache.version)
+        self.assertEqual(self.cache.get("a"), 2)
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("../src/hackathon")
+import unittest
+from datetime import datetime
+from mock import Mock, MagicMock, patch
+from sqlalchemy.exc import IntegrityError
+
+from hackathon.database.db_adapters import SQLAlchemyAdapter
+from hackathon.database.models import User, Hackathon
+
+
+class SQLAlchemyAdapterTest(unittest.TestCase):
+    def setUp(self):
+        self.session = Mock()
+        self.session.new = []
+        self.session.dirty = []
+        self.session.deleted = []
+        self.db = SQLAlchemyAdapter(self.session)
+
+    # User.query is bound to the global session, don't let it connect to DB
+    @patch.object(User, "query")
+    def test_read_does_not_commit(self, query):
+        self.db.count(User)
+        self.assertEqual(0, self.session.commit.call_count)
+
+    @patch.object(User, "query")
+    def test_read_commits_pending_changes(self, query):
+        self.session.dirty = [User(id=1)]
+        self.db.count(User)
+        self.assertEqual(1, self.session.commit.call_count)
+
+    def test_write_commits(self):
+        self.db.add_object(User(id=1))
+        self.assertEqual(1, self.session.commit.call_count)
+
+    def test_transaction_commits_once(self):
+        with self.db.transaction():
+            self.db.add_object(User(id=1))
+            self.db.add_object(User(id=2))
+            self.db.commit()
+            with self.db.transaction():
+                self.db.add_object(User(id=3))
+            self.assertEqual(0, self.session.commit.call_count)
+
+        self.assertEqual(1, self.session.commit.call_count)
+        self.assertFalse(self.db.in_transaction())
+
+    def test_add_object_if_absent(self):
+        self.session.begin_nested = MagicMock()
+        self.assertTrue(self.db.add_object_if_absent(User, id=1))
+        self.assertEqual(1, self.session.begin_nested.call_count)
+        self.assertEqual(1, self.session.commit.call_count)
+
+    def test_add_object_if_absent_duplicate(self):
+        self.session.begin_nested = MagicMock()
+        self.session.execute.side_effect = IntegrityError("INSERT", {}, Exception(1062, "Duplicate entry '1'"))
+        self.assertFalse(self.db.add_object_if_absent(User, id=1))
+        self.assertEqual(0, self.session.rollback.call_count)
+
+    def test_add_object_if_absent_raises_other_errors(self):
+        self.session.begin_nested = MagicMock()
+        self.session.execute.side_effect = IntegrityError("INSERT", {}, Exception(1452, "foreign key constraint fails"))
+        self.assertRaises(IntegrityError, self.db.add_object_if_absent, User, id=1)
+        self.assertEqual(1, self.session.rollback.call_count)
+
+    def test_transaction_rollback(self):
+        def fail():
+            with self.db.transaction():
+                self.db.add_object(User(id=1))
+                raise Exception("failed")
+
+        self.assertRaises(Exception, fail)
+        self.assertEqual(0, self.session.commit.call_count)
+        self.assertEqual(1, self.session.rollback.call_count)
+        self.assertFalse(self.db.in_transaction())
+
+    def __page_query(self, rows):
+        query = Mock()
+        query.filter.return_value = query
+        query.order_by.return_value = query
+        query.limit.return_value = query
+        query.all.return_value = rows
+        self.session.query.return_value = query
+        return query
+
+    def test_find_page_projection(self):
+        query = self.__page_query([(2, "b", datetime(1970, 1, 1, 0, 0, 1))])
+        page = self.db.find_page(User, [], after_id=1, limit=5000, fields=["name", "create_time", "unknown"])
+
+        self.assertEqual(["id", "name", "create_time"], [c.name for c in self.session.query.call_args[0]])
+        self.assertEqual(2, query.filter.call_count)
+        query.limit.assert_called_with(1000)
+        self.assertEqual([{"id": 2, "name": "b", "create_time": 1000}], page)
+
+    def test_find_page_projection_of_json_columns(self):
+        self.__page_query([(1, '{"a": 1}')])
+        page = self.db.find_page(Hackathon, fields=["basic_info"])
+        self.assertEqual([{"id": 1, "basic_info": {"a": 1}}], page)
+
+    def test_find_page_all_columns(self):
+        columns = list(User.__table__.columns)
+        self.__page_query([tuple(range(len(columns)))])
+        page = self.db.find_page(User, [User.name == "a"])
+
+        self.assertEqual(columns, list(self.session.query.call_args[0]))
+        self.assertEqual(1, len(page))
+        self.assertEqual(sorted(c.name for c in columns), sorted(page[0].keys()))
+
+    def test_find_page_not_capped_unless_paging(self):
+        query = self.__page_query([])
+        self.db.find_page(User)
+        query.limit.assert_called_with(None)
+
+        self.db.find_page(User, after_id=10)
+        query.limit.assert_called_with(1000)
+
+        self.db.find_page(User, limit=20)
+        query.limit.assert_called_with(20)
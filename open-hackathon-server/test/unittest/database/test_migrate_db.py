@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("../src")
+import json
+import unittest
+from mock import Mock, patch
+
+from hackathon.constants import HACKATHON_BASIC_INFO
+import migrate_db
+
+
+class SyncHackathonSettingsTest(unittest.TestCase):
+    @patch.object(migrate_db, "db_adapter")
+    def test_backfill_setting_columns(self, db_adapter):
+        configured = Mock(basic_info=json.dumps({HACKATHON_BASIC_INFO.PRE_ALLOCATE_ENABLED: 1,
+                                                 HACKATHON_BASIC_INFO.PRE_ALLOCATE_NUMBER: 4,
+                                                 HACKATHON_BASIC_INFO.RECYCLE_ENABLED: 1}))
+        invalid = Mock(basic_info="not json")
+        db_adapter.find_all_objects.return_value = [configured, invalid]
+
+        migrate_db.sync_hackathon_settings()
+        columns = dict((c[0][0], c[1]) for c in db_adapter.update_object.call_args_list)
+        self.assertEqual(columns[configured], {"recycle_enabled": 1,
+                                               "recycle_minutes": 60,
+                                               "recycle_idle_minutes": 0,
+                                               "pre_allocate_enabled": 1,
+                                               "pre_allocate_number": 4})
+        self.assertEqual(columns[invalid]["recycle_enabled"], 0)
+        self.assertEqual(columns[invalid]["pre_allocate_number"], 1)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("../src/hackathon")
+import unittest
+from datetime import datetime
+
+from hackathon.database.models import User, Hackathon, get_serializer
+
+
+class SerializerTest(unittest.TestCase):
+    def setUp(self):
+        self.time = datetime(1970, 1, 1, 0, 0, 1)
+
+    def test_dic(self):
+        user = User(id=1, name="a", create_time=self.time, last_login_time=None)
+        d = user.dic()
+        self.assertEqual(sorted(c.name for c in User.__table__.columns), sorted(d.keys()))
+        self.assertEqual(1, d["id"])
+        self.assertEqual("a", d["name"])
+        self.assertEqual(1000, d["create_time"])
+        self.assertIsNone(d["last_login_time"])
+        self.assertIsNone(d["nickname"])
+
+    def test_serializer_compiled_once(self):
+        self.assertIs(get_serializer(User), get_serializer(User))
+
+    def test_rows_dic(self):
+        columns = [User.__table__.c.id, User.__table__.c.create_time]
+        self.assertEqual([{"id": 1, "create_time": 1000}, {"id": 2, "create_time": None}],
+                         User.rows_dic(columns, [(1, self.time), (2, None)]))
+
+    def test_rows_dic_same_as_dic(self):
+        hackathon = Hackathon(id=1, name="h", basic_info='{"a": 1}', create_time=self.time)
+        columns = list(Hackathon.__table__.columns)
+        row = tuple(getattr(hackathon, c.name) for c in columns)
+        self.assertEqual(hackathon.dic(), Hackathon.rows_dic(columns, [row])[0])
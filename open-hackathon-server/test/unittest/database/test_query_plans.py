@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("../src/hackathon")
+import unittest
+from mock import Mock
+
+from hackathon.database.models import Experiment
+from hackathon.database.query_plans import QUERY_SHAPES, find_covering_index, find_full_scans
+
+
+class QueryPlansTest(unittest.TestCase):
+    def test_every_shape_has_index(self):
+        for table, columns in QUERY_SHAPES:
+            self.assertIsNotNone(find_covering_index(table, columns), "%s %s" % (table.name, columns))
+
+    def test_index_must_lead_with_shape_columns(self):
+        self.assertIsNone(find_covering_index(Experiment.__table__, ["create_time"]))
+        self.assertIsNone(find_covering_index(Experiment.__table__, ["user_id", "create_time"]))
+
+    def test_find_full_scans(self):
+        def explain(statement, **params):
+            result = Mock()
+            scan = "ALL" if "experiment.create_time = " in str(statement) else "ref"
+            result.fetchall.return_value = [{"type": scan}]
+            return result
+
+        engine = Mock()
+        engine.execute.side_effect = explain
+
+        self.assertEqual([("experiment", ["hackathon_id", "status", "create_time"])], find_full_scans(engine))
+        self.assertEqual(len(QUERY_SHAPES), engine.execute.call_count)
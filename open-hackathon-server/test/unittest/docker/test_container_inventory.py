@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+
+import sys
+
+sys.path.append("../src/hackathon")
+import json
+import unittest
+from mock import Mock
+
+from hackathon.docker.container_inventory import HostContainerInventory
+
+BASE_URL = "http://docker-host:4243"
+
+INSPECT_RESULT = {
+    "Id": "8dfafdbc3a40",
+    "Name": "/web",
+    "State": {"Running": True, "Restarting": False},
+    "NetworkSettings": {"Ports": {"22/tcp": [{"HostIp": "0.0.0.0", "HostPort": "10022"}]}}
+}
+
+
+class HostContainerInventoryTest(unittest.TestCase):
+    def setUp(self):
+        self.http = Mock()
+        self.inventory = HostContainerInventory(BASE_URL, self.http, Mock())
+
+    def test_refresh_running_container(self):
+        self.http.get.return_value = Mock(status_code=200, content=json.dumps(INSPECT_RESULT))
+        self.inventory.refresh("8dfafdbc3a40")
+
+        container = self.inventory.get_by_name("web")
+        self.assertEqual(container["Id"], "8dfafdbc3a40")
+        self.assertEqual(container["Ports"][0]["PublicPort"], 10022)
+        self.assertEqual(self.inventory.get_by_id("8dfafdbc3a40"), container)
+
+    def test_refresh_removed_container(self):
+        self.http.get.return_value = Mock(status_code=200, content=json.dumps(INSPECT_RESULT))
+        self.inventory.refresh("8dfafdbc3a40")
+
+        self.http.get.return_value = Mock(status_code=404)
+        self.inventory.refresh("8dfafdbc3a40")
+        self.assertIsNone(self.inventory.get_by_name("/web"))
+        self.assertEqual(self.inventory.list(), [])
+
+    def test_die_event(self):
+        self.http.get.return_value = Mock(status_code=200, content=json.dumps(INSPECT_RESULT))
+        self.inventory.refresh("8dfafdbc3a40")
+
+        self.inventory._HostContainerInventory__on_event({"status": "die", "id": "8dfafdbc3a40"})
+        self.assertIsNone(self.inventory.get_by_id("8dfafdbc3a40"))
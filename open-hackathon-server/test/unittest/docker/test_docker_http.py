@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+
+import sys
+
+sys.path.append("../src/hackathon")
+import unittest
+import requests
+from mock import Mock, patch
+
+from hackathon import app
+from hackathon.docker.docker_http import DockerHttpClient
+
+URL = "http://docker-host:4243/containers/json"
+BASE_URL = "http://docker-host:4243"
+
+
+class DockerHttpClientTest(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.http = DockerHttpClient()
+        self.http.backoff_seconds = 0
+        self.session = Mock()
+        self.http.sessions[BASE_URL] = self.session
+        self.http.counters[BASE_URL] = {"requests": 0, "failures": 0, "retries": 0}
+
+    def test_same_session_per_host(self):
+        http = DockerHttpClient()
+        with patch.object(requests, "Session") as session_class:
+            session_class.return_value.request.return_value = Mock(status_code=200)
+            http.get(URL)
+            http.post(BASE_URL + "/containers/abc/stop")
+            self.assertEqual(session_class.call_count, 1)
+
+    def test_default_timeout(self):
+        self.session.request.return_value = Mock(status_code=200)
+        self.http.get(URL)
+        self.session.request.assert_called_once_with("GET", URL, timeout=(self.http.connect_timeout,
+                                                                          self.http.read_timeout))
+
+    def test_retry_get_on_timeout(self):
+        ok = Mock(status_code=200)
+        self.session.request.side_effect = [requests.exceptions.ReadTimeout(), ok]
+        self.assertEqual(self.http.get(URL), ok)
+        self.assertEqual(self.http.stats()[BASE_URL], {"requests": 2, "failures": 0, "retries": 1})
+
+    def test_no_retry_post_once_sent(self):
+        self.session.request.side_effect = requests.exceptions.ReadTimeout()
+        self.assertRaises(requests.exceptions.ReadTimeout, self.http.post, URL)
+        self.assertEqual(self.session.request.call_count, 1)
+
+    def test_retries_bounded(self):
+        self.session.request.side_effect = requests.exceptions.ConnectTimeout()
+        self.assertRaises(requests.exceptions.ConnectTimeout, self.http.post, URL)
+        self.assertEqual(self.session.request.call_count, self.http.max_retries + 1)
+        self.assertEqual(self.http.stats()[BASE_URL]["failures"], 1)
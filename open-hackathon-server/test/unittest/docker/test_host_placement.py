@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#  
+# The MIT License (MIT)
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#  
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#  
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("../src/hackathon")
+import unittest
+from mock import Mock
+
+from hackathon import app
+from hackathon.hack.host_placement import HostState, PlacementPolicy, get_placement_policy
+from hackathon.hack.host_server_manager import DockerHostManager
+
+
+def host(id, count, max_count=10, hackathon_id=1, alive=True):
+    docker_host = Mock(id=id, hackathon_id=hackathon_id, container_count=count, container_max_count=max_count)
+    return HostState(docker_host, alive)
+
+
+class PlacementPolicyTest(unittest.TestCase):
+    def test_least_loaded(self):
+        policy = get_placement_policy("least_loaded")
+        self.assertEqual(policy.choose([host(1, 5), host(2, 3, 4), host(3, 2)], 1).id, 3)
+
+    def test_bin_packing(self):
+        policy = get_placement_policy("bin_packing")
+        self.assertEqual(policy.choose([host(1, 5), host(2, 3, 4), host(3, 2)], 1).id, 2)
+
+    def test_spread(self):
+        policy = get_placement_policy("spread")
+        hosts = [host(2, 0), host(1, 9)]
+        self.assertEqual([policy.choose(hosts, 1).id for i in range(3)], [1, 2, 1])
+
+    def test_unknown_policy(self):
+        self.assertRaises(ValueError, get_placement_policy, "random")
+
+    def test_policy_must_implement_choose(self):
+        self.assertRaises(TypeError, PlacementPolicy)
+
+
+class DockerHostManagerTest(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.manager = DockerHostManager()
+        # no background refresh
+        self.manager.refresh_thread = Mock()
+        self.manager.refresh_thread.is_alive.return_value = True
+        self.manager.db = Mock()
+        self.manager.db.find_first_object_by.side_effect = lambda cls, id: Mock(id=id)
+        self.update = self.manager.db.session.return_value.query.return_value.filter.return_value.update
+        self.update.return_value = 1
+
+    def test_place_in_memory(self):
+        hosts = [host(1, 9), host(2, 1, alive=False), host(3, 4), host(4, 0, hackathon_id=2)]
+        self.manager.hosts = dict((h.id, h) for h in hosts)
+        self.assertEqual(self.manager.get_available_docker_host(1, Mock(id=1)).id, 3)
+        self.assertEqual(self.manager.hosts[3].container_count, 5)
+        self.assertEqual(self.manager.db.find_all_objects.call_count, 0)
+
+    def test_reserve_on_another_host(self):
+        self.manager.hosts = {1: host(1, 2), 2: host(2, 5)}
+        # host 1 is filled up by others
+        self.update.side_effect = [0, 1]
+        self.assertEqual(self.manager.get_available_docker_host(1, Mock(id=1)).id, 2)
+        self.assertEqual(self.manager.hosts[1].container_count, 10)
+
+    def test_release_capacity(self):
+        self.manager.hosts = {1: host(1, 2)}
+        self.manager.release_capacity(1, 1)
+        self.assertEqual(self.update.call_count, 1)
+        self.assertEqual(self.manager.hosts[1].container_count, 1)
+
+    def test_reload_when_no_host(self):
+        self.manager.hosts = {1: host(1, 10)}
+        self.manager.db.find_all_objects.return_value = [Mock(id=1, hackathon_id=1, container_count=3,
+                                                               container_max_count=10)]
+        self.assertEqual(self.manager.get_available_docker_host(1, Mock(id=1)).id, 1)
+
+    def test_no_host(self):
+        self.manager.hosts = {1: host(1, 10)}
+        self.manager.db.find_all_objects.return_value = []
+        self.assertRaises(Exception, self.manager.get_available_docker_host, 1, Mock(id=1))
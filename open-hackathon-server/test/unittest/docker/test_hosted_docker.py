@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("../src/hackathon")
+import unittest
+from mock import Mock
+
+from hackathon import app
+from hackathon.database.models import Experiment, VirtualEnvironment
+from hackathon.docker.hosted_docker import HostedDockerFormation
+
+
+class HostedDockerCapacityTest(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.docker = HostedDockerFormation()
+        self.docker.db = Mock()
+        self.docker.http = Mock()
+        self.docker.docker_host_manager = Mock()
+        self.host = Mock(id=3, public_dns="docker-host", public_docker_api_port=4243)
+        self.docker.docker_host_manager.get_host_server_by_id.return_value = self.host
+        self.docker._HostedDockerFormation__release_ports = Mock()
+        self.docker._HostedDockerFormation__refresh_inventory = Mock()
+        self.unit = Mock()
+        self.unit.get_name.return_value = "web"
+
+    def __start(self):
+        return self.docker.start(self.unit,
+                                 hackathon=Mock(),
+                                 virtual_environment=VirtualEnvironment(),
+                                 experiment=Experiment(),
+                                 docker_host=self.host)
+
+    def __released(self):
+        return sum(c[0][1] for c in self.docker.docker_host_manager.release_capacity.call_args_list)
+
+    def test_failed_container_released_once(self):
+        self.docker._HostedDockerFormation__start_on_host = Mock(return_value=None)
+        self.assertIsNone(self.__start())
+        # the container is saved already, so it's rolled back by delete
+        self.docker.delete("web", container=Mock(host_server_id=3), expr_id=1)
+        self.assertEqual(self.__released(), 1)
+
+    def test_error_on_host_released_once(self):
+        self.docker._HostedDockerFormation__start_on_host = Mock(side_effect=Exception("docker host unreachable"))
+        self.assertRaises(Exception, self.__start)
+        self.docker.delete("web", container=Mock(host_server_id=3), expr_id=1)
+        self.assertEqual(self.__released(), 1)
+
+    def test_container_not_saved_released_by_start(self):
+        self.docker.db.add_object.side_effect = Exception("lost connection")
+        self.assertRaises(Exception, self.__start)
+        self.assertEqual(self.__released(), 1)
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#  
+# The MIT License (MIT)
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#  
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#  
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("../src/hackathon")
+import unittest
+from mock import Mock
+
+from hackathon import app
+from hackathon.docker.port_allocator import HostPortBitmap, PortAllocator
+
+
+class HostPortBitmapTest(unittest.TestCase):
+    def test_take_in_order(self):
+        bitmap = HostPortBitmap(10000, 10003)
+        self.assertEqual(bitmap.take(), 10000)
+        self.assertEqual(bitmap.take(), 10001)
+        self.assertEqual(bitmap.used, 2)
+
+    def test_skip_used(self):
+        bitmap = HostPortBitmap(10000, 10003)
+        bitmap.mark(10000)
+        self.assertEqual(bitmap.take(in_use={10001}), 10002)
+        self.assertTrue(bitmap.is_used(10001))
+        self.assertIsNone(bitmap.take())
+
+    def test_take_released_first(self):
+        bitmap = HostPortBitmap(10000, 10010)
+        ports = [bitmap.take() for i in range(3)]
+        bitmap.release(ports[1])
+        self.assertFalse(bitmap.is_used(10001))
+        self.assertEqual(bitmap.take(), 10001)
+        self.assertEqual(bitmap.take(), 10003)
+
+    def test_out_of_range(self):
+        bitmap = HostPortBitmap(10000, 10003)
+        self.assertFalse(bitmap.mark(80))
+        bitmap.release(65535)
+        self.assertEqual(bitmap.used, 0)
+
+
+class PortAllocatorTest(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.allocator = PortAllocator()
+        self.allocator.start = 10000
+        self.allocator.end = 10003
+        self.allocator.db = Mock()
+        self.allocator.db.find_all_objects_by.return_value = []
+        self.allocator.db.add_object_if_absent.return_value = True
+        self.host = Mock(id=1)
+
+    def test_allocate(self):
+        self.assertEqual(self.allocator.allocate(self.host, 1), 10000)
+        self.assertEqual(self.allocator.allocate(self.host, 1), 10001)
+        self.assertEqual(self.allocator.stats(), {1: 2})
+
+    def test_reserved_by_others(self):
+        self.allocator.db.add_object_if_absent.side_effect = [False, True]
+        self.assertEqual(self.allocator.allocate(self.host, 1), 10001)
+
+    def test_reload_when_used_up(self):
+        for i in range(3):
+            self.allocator.allocate(self.host, 1)
+        # 10001 released by another server
+        self.allocator.db.find_all_objects_by.return_value = [Mock(port=10000), Mock(port=10002)]
+        self.assertEqual(self.allocator.allocate(self.host, 2), 10001)
+
+        self.allocator.db.find_all_objects_by.return_value = [Mock(port=p) for p in range(10000, 10003)]
+        self.assertRaises(Exception, self.allocator.allocate, self.host, 3)
+
+    def test_release(self):
+        port = self.allocator.allocate(self.host, 1)
+        self.allocator.db.find_all_objects_by.return_value = [Mock(docker_host_server_id=1, port=port)]
+        self.allocator.release(1)
+        self.assertEqual(self.allocator.db.delete_all_objects_by.call_count, 1)
+        self.assertEqual(self.allocator.stats(), {1: 0})
+        self.assertEqual(self.allocator.allocate(self.host, 2), port)
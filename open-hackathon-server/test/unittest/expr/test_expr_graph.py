@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("../src/hackathon")
+import unittest
+from mock import Mock
+
+from hackathon import app
+from hackathon.constants import PortBindingType
+from hackathon.database.models import (
+    Experiment,
+    VirtualEnvironment,
+    PortBinding,
+    DockerHostServer,
+    AzureVirtualMachine,
+    AzureEndpoint,
+)
+from hackathon.expr.expr_graph import ExprGraph
+
+
+class FakeQuery(object):
+    def __init__(self, rows):
+        self.rows = rows
+
+    def options(self, *args):
+        return self
+
+    def filter(self, *args):
+        return self
+
+    def order_by(self, *args):
+        return self
+
+    def all(self):
+        return list(self.rows)
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class FakeSession(object):
+    def __init__(self, tables):
+        self.tables = tables
+        self.queried = []
+
+    def query(self, model):
+        self.queried.append(model)
+        return FakeQuery(self.tables.get(model, []))
+
+
+class ExprGraphTest(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+
+    def __load(self, tables):
+        session = FakeSession(tables)
+        db = Mock()
+        db.session.return_value = session
+        return ExprGraph.load(db, 1), session
+
+    def test_expr_not_found(self):
+        graph, session = self.__load({})
+        self.assertIsNone(graph)
+        self.assertEqual([Experiment], session.queried)
+
+    def test_docker_graph(self):
+        ves = [Mock(id=10, container=Mock(host_server_id=100)), Mock(id=11, container=None)]
+        bindings = [Mock(virtual_environment_id=10, binding_type=PortBindingType.CLOUD_SERVICE, binding_resource_id=101),
+                    Mock(virtual_environment_id=10, binding_type=PortBindingType.DOCKER, binding_resource_id=100),
+                    Mock(virtual_environment_id=11, binding_type=PortBindingType.CLOUD_SERVICE, binding_resource_id=None)]
+        hosts = [Mock(id=100), Mock(id=101)]
+        graph, session = self.__load({Experiment: [Mock(id=1)],
+                                      VirtualEnvironment: ves,
+                                      PortBinding: bindings,
+                                      DockerHostServer: hosts})
+
+        self.assertEqual([Experiment, VirtualEnvironment, PortBinding, DockerHostServer, AzureVirtualMachine],
+                         session.queried)
+        self.assertEqual(bindings[:2], graph.port_bindings_of(ves[0]))
+        self.assertEqual(bindings[2:], graph.port_bindings_of(ves[1]))
+        self.assertEqual({100: hosts[0], 101: hosts[1]}, graph.docker_hosts)
+        self.assertEqual([], graph.azure_virtual_machines_of(ves[0]))
+
+    def test_azure_graph(self):
+        ves = [Mock(id=10, container=None)]
+        vms = [Mock(id=20, virtual_environment_id=10), Mock(id=21, virtual_environment_id=10)]
+        endpoints = [Mock(virtual_machine_id=20), Mock(virtual_machine_id=21), Mock(virtual_machine_id=21)]
+        graph, session = self.__load({Experiment: [Mock(id=1)],
+                                      VirtualEnvironment: ves,
+                                      AzureVirtualMachine: vms,
+                                      AzureEndpoint: endpoints})
+
+        self.assertEqual([Experiment, VirtualEnvironment, PortBinding, AzureVirtualMachine, AzureEndpoint],
+                         session.queried)
+        self.assertEqual(vms, graph.azure_virtual_machines_of(ves[0]))
+        self.assertEqual(endpoints[:1], graph.azure_endpoints_of(vms[0]))
+        self.assertEqual(endpoints[1:], graph.azure_endpoints_of(vms[1]))
+        self.assertEqual({}, graph.docker_hosts)
+
+    def test_no_virtual_environment(self):
+        graph, session = self.__load({Experiment: [Mock(id=1)]})
+        self.assertEqual([], graph.virtual_environments)
+        self.assertEqual([Experiment, VirtualEnvironment], session.queried)
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("../src/hackathon")
+import unittest
+from collections import namedtuple
+from mock import Mock
+
+from hackathon import app
+from hackathon.constants import EStatus, VE_PROVIDER, ReservedUser
+from hackathon.expr.expr_mgr import ExprManager
+from hackathon.expr.expr_pre_allocator import ExprPreAllocator
+
+HackathonRow = namedtuple("HackathonRow", ["id", "name", "pre_allocate_number"])
+PairRow = namedtuple("PairRow", ["hackathon_id", "name", "id", "provider"])
+CountRow = namedtuple("CountRow", ["hackathon_id", "template_id", "status", "count"])
+
+
+class ExprPreAllocatorTest(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.allocator = ExprPreAllocator()
+        self.allocator.db = Mock()
+        self.allocator.hackathon_manager = Mock()
+        self.allocator.hackathon_manager.get_pre_allocate_enabled_hackathon_list.return_value = [1, 2]
+        self.allocator.expr_manager = Mock()
+
+    def __rows(self, hackathons, pairs, counts, host_counts=()):
+        """Make session.query() return the rows in the order they are queried"""
+        results = [hackathons, pairs, counts, list(host_counts)]
+
+        def query(*args):
+            q = Mock()
+            for name in ["filter", "join", "group_by"]:
+                getattr(q, name).return_value = q
+            q.all.return_value = results.pop(0)
+            return q
+
+        self.allocator.db.session.return_value.query.side_effect = query
+
+    def test_plan_deficit_per_hackathon(self):
+        self.__rows([HackathonRow(1, "h1", 3), HackathonRow(2, "h2", 2)],
+                    [PairRow(1, "docker", 10, VE_PROVIDER.DOCKER),
+                     PairRow(2, "docker", 10, VE_PROVIDER.DOCKER),
+                     PairRow(2, "azure", 20, VE_PROVIDER.AZURE)],
+                    [CountRow(1, 10, EStatus.RUNNING, 1),
+                     CountRow(2, 10, EStatus.STARTING, 1),
+                     CountRow(2, 10, EStatus.RUNNING, 1)])
+
+        plan = self.allocator._ExprPreAllocator__plan()
+        # the azure template starts one at a time however many are missing
+        self.assertEqual(sorted(plan), [(1, "h1", "docker"), (1, "h1", "docker"), (2, "h2", "azure")])
+
+    def test_plan_no_azure_while_starting(self):
+        self.__rows([HackathonRow(1, "h1", 2)],
+                    [PairRow(1, "azure", 20, VE_PROVIDER.AZURE)],
+                    [CountRow(1, 20, EStatus.STARTING, 1)])
+        self.assertEqual(self.allocator._ExprPreAllocator__plan(), [])
+
+    def test_pre_allocate_metrics(self):
+        self.__rows([HackathonRow(1, "h1", 3)],
+                    [PairRow(1, "docker", 10, VE_PROVIDER.DOCKER)],
+                    [],
+                    [(1, 1)])
+        self.allocator.expr_manager.start_pre_allocated_expr.side_effect = [{"status": 1}, {"error": 500}, None]
+
+        metrics = self.allocator.pre_allocate()
+        self.assertEqual(metrics["planned"], 3)
+        self.assertEqual(metrics["started"], 1)
+        self.assertEqual(metrics["failed"], 2)
+        self.assertEqual(self.allocator.expr_manager.start_pre_allocated_expr.call_count, 3)
+        self.allocator.expr_manager.start_pre_allocated_expr.assert_called_with("h1", "docker")
+        self.assertFalse(self.allocator.expr_manager.start_expr.called)
+
+    def test_nothing_to_pre_allocate(self):
+        self.allocator.hackathon_manager.get_pre_allocate_enabled_hackathon_list.return_value = []
+        metrics = self.allocator.pre_allocate()
+        self.assertEqual((metrics["planned"], metrics["started"], metrics["failed"]), (0, 0, 0))
+
+
+class StartPreAllocatedExprTest(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.manager = ExprManager()
+        self.manager.db = Mock()
+        self.manager.db.transaction.return_value.__enter__ = Mock()
+        self.manager.db.transaction.return_value.__exit__ = Mock(return_value=False)
+        self.manager.db.count.return_value = 1
+        self.manager.util = Mock()
+        self.manager.util.get_config.return_value = 1
+        self.hackathon = Mock(id=1)
+        self.template = Mock(id=10, provider=VE_PROVIDER.DOCKER)
+        self.manager._ExprManager__check_template_status = Mock(return_value=[self.hackathon, self.template])
+        self.provision = self.manager._ExprManager__provision_expr = Mock(return_value=None)
+        self.manager._ExprManager__report_expr_status = Mock(return_value={"status": EStatus.STARTING})
+
+    def test_planned_start_not_capped(self):
+        result = self.manager.start_pre_allocated_expr("h1", "docker")
+        self.assertEqual(result, {"status": EStatus.STARTING})
+        self.assertFalse(self.manager.db.count.called)
+        kwargs = self.manager.db.add_object_kwargs.call_args[1]
+        self.assertEqual(kwargs["user_id"], ReservedUser.DefaultUserID)
+        self.assertTrue(self.provision.called)
+
+    def test_capped_start_adds_nothing(self):
+        result = self.manager._ExprManager__start_new_expr(self.hackathon, self.template, ReservedUser.DefaultUserID)
+        self.assertIsNone(result)
+        self.assertFalse(self.manager.db.add_object_kwargs.called)
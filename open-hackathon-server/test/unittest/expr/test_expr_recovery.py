@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("../src/hackathon")
+import unittest
+from mock import Mock
+
+from hackathon import app
+from hackathon.constants import EStatus, VEStatus, VE_PROVIDER
+from hackathon.database.models import Experiment
+from hackathon.expr.expr_mgr import ExprManager
+from hackathon.template.base_template import BaseTemplate
+
+
+class ExprRecoveryTest(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.manager = ExprManager()
+        self.manager.db = Mock()
+        self.manager.db.transaction.return_value.__enter__ = Mock()
+        self.manager.db.transaction.return_value.__exit__ = Mock(return_value=False)
+        # count of rows changed by the conditional UPDATE
+        self.update = self.manager.db.session.return_value.query.return_value.filter.return_value.update
+        self.update.return_value = 1
+        self.manager.expr_starter = Mock()
+        self.manager.expr_starter.owns.side_effect = lambda expr_id: expr_id in self.owned
+        self.manager.expr_status_watcher = Mock()
+        self.manager.docker = Mock()
+        self.docker = self.manager.docker.get_docker.return_value
+        self.owned = set()
+
+    def __expr(self, expr_id, provider=VE_PROVIDER.DOCKER, ves=None):
+        expr = Mock(id=expr_id, status=EStatus.STARTING)
+        expr.template.provider = provider
+        expr.virtual_environments.all.return_value = ves or []
+        return expr
+
+    def __updated_status(self):
+        return [c[0][0][Experiment.status] for c in self.update.call_args_list]
+
+    def test_fail_orphaned_and_release_ports(self):
+        created = Mock(provider=VE_PROVIDER.DOCKER, status=VEStatus.RUNNING)
+        created.name = "created"
+        not_created = Mock(provider=VE_PROVIDER.DOCKER, status=VEStatus.INIT, container=None)
+        orphan = self.__expr(1, ves=[created, not_created])
+        self.manager.db.find_all_objects.return_value = [orphan]
+
+        self.assertEqual(self.manager.recover_orphaned_expr(), 1)
+        self.assertEqual(self.__updated_status(), [EStatus.FAILED])
+        self.assertEqual(created.status, VEStatus.DELETED)
+        self.assertEqual(not_created.status, VEStatus.DELETED)
+        self.docker.delete.assert_called_once_with("created", virtual_environment=created,
+                                                   container=created.container, expr_id=1)
+        released = [c[0][0].__name__ for c in self.manager.db.delete_all_objects_by.call_args_list]
+        self.assertEqual(sorted(released), ["HostPortReservation", "PortBinding"])
+        self.manager.expr_status_watcher.notify.assert_called_once_with(1)
+
+    def test_skip_owned_and_azure(self):
+        self.owned.add(1)
+        self.manager.db.find_all_objects.return_value = [self.__expr(1), self.__expr(2, provider=VE_PROVIDER.AZURE)]
+
+        self.assertEqual(self.manager.recover_orphaned_expr(), 0)
+        self.assertFalse(self.update.called)
+        self.assertFalse(self.manager.expr_status_watcher.notify.called)
+
+    def test_skip_lease_renewed_since_queried(self):
+        ve = Mock(provider=VE_PROVIDER.DOCKER, status=VEStatus.RUNNING)
+        self.manager.db.find_all_objects.return_value = [self.__expr(1, ves=[ve])]
+        self.update.return_value = 0
+
+        self.assertEqual(self.manager.recover_orphaned_expr(), 0)
+        self.assertFalse(self.docker.delete.called)
+        self.assertEqual(ve.status, VEStatus.RUNNING)
+
+    def test_failed_even_if_delete_failed(self):
+        ve = Mock(provider=VE_PROVIDER.DOCKER, status=VEStatus.RUNNING)
+        self.manager.db.find_all_objects.return_value = [self.__expr(1, ves=[ve])]
+        self.docker.delete.side_effect = Exception("docker host unreachable")
+
+        self.assertEqual(self.manager.recover_orphaned_expr(), 1)
+        self.assertEqual(self.__updated_status(), [EStatus.FAILED])
+        self.manager.expr_status_watcher.notify.assert_called_once_with(1)
+
+    def test_not_running_if_recovered_while_starting(self):
+        ve = Mock(provider=VE_PROVIDER.DOCKER, status=VEStatus.RUNNING)
+        expr = self.__expr(1, ves=[ve])
+        template = Mock(provider=VE_PROVIDER.DOCKER)
+        self.manager.template_manager = Mock()
+        self.manager.template_manager.load_template.return_value = {BaseTemplate.VIRTUAL_ENVIRONMENTS: [{}]}
+        self.update.return_value = 0
+
+        result = self.manager._ExprManager__provision_expr(Mock(), template, expr)
+        self.assertIn("error", result)
+        self.assertEqual(self.__updated_status(), [EStatus.RUNNING])
+        self.assertEqual(ve.status, VEStatus.DELETED)
+        self.assertFalse(self.manager.expr_status_watcher.notify.called)
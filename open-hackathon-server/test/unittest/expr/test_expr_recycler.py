@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("../src/hackathon")
+import os
+import json
+import fcntl
+import shutil
+import tempfile
+import unittest
+from collections import namedtuple
+from mock import Mock
+
+from hackathon import app
+from hackathon.expr.expr_recycler import ExprRecycler
+
+ContainerRow = namedtuple("ContainerRow", ["experiment_id", "host_server_id"])
+
+
+class ExprRecyclerTest(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.dir = tempfile.mkdtemp()
+        self.checkpoint_file = os.path.join(self.dir, "recycle_checkpoint.json")
+        config = {"recycle.checkpoint_file": self.checkpoint_file, "recycle.pool_size": 4}
+
+        self.recycler = ExprRecycler()
+        self.recycler.log = Mock()
+        self.recycler.util = Mock()
+        self.recycler.util.safe_get_config.side_effect = lambda key, default: config.get(key, default)
+        self.recycler.db = Mock()
+        self.recycler.expr_manager = Mock()
+        self.recycler.expr_manager.recycle_expr.return_value = True
+        self.find_expired = self.recycler._ExprRecycler__find_expired_expr_ids = Mock(return_value=[])
+        self.__containers([])
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def __containers(self, rows):
+        query = self.recycler.db.session.return_value.query.return_value
+        query.join.return_value.filter.return_value.all.return_value = rows
+
+    def __read_checkpoint(self):
+        with open(self.checkpoint_file) as f:
+            return json.load(f)
+
+    def test_group_by_docker_host(self):
+        self.__containers([ContainerRow(1, 10), ContainerRow(2, 20), ContainerRow(3, 10)])
+        groups = self.recycler._ExprRecycler__group_by_docker_host([1, 2, 3, 4])
+        # experiment 4 has no container, azure VM for example, it's recycled alone
+        self.assertEqual(sorted(groups), [[1, 3], [2], [4]])
+
+    def test_group_nothing(self):
+        self.assertEqual(self.recycler._ExprRecycler__group_by_docker_host([]), [])
+        self.assertFalse(self.recycler.db.session.called)
+
+    def test_resume_pending_of_checkpoint(self):
+        with open(self.checkpoint_file, "w") as f:
+            json.dump({"pending": [5, 6], "recycled": [4], "failed": [], "last_metrics": None}, f)
+        self.find_expired.return_value = [6, 7]
+
+        metrics = self.recycler.recycle()
+        self.assertEqual(metrics["found"], 3)
+        self.assertEqual(sorted(c[1]["id"] for c in self.recycler.db.find_first_object_by.call_args_list), [5, 6, 7])
+
+        checkpoint = self.__read_checkpoint()
+        self.assertEqual(checkpoint["pending"], [])
+        self.assertEqual(sorted(checkpoint["recycled"]), [5, 6, 7])
+        self.assertEqual(checkpoint["last_metrics"], metrics)
+
+    def test_metrics(self):
+        self.find_expired.return_value = [1, 2, 3]
+        self.__containers([ContainerRow(1, 10), ContainerRow(2, 10), ContainerRow(3, 20)])
+        self.recycler.expr_manager.recycle_expr.side_effect = [True, Exception("docker host down"), False]
+
+        metrics = self.recycler.recycle()
+        self.assertEqual((metrics["found"], metrics["recycled"], metrics["failed"]), (3, 1, 2))
+        self.assertEqual(self.recycler.last_metrics, metrics)
+        checkpoint = self.__read_checkpoint()
+        self.assertEqual(checkpoint["pending"], [])
+        self.assertEqual(len(checkpoint["failed"]), 2)
+
+    def test_stopped_expr_counted_as_recycled(self):
+        self.find_expired.return_value = [1]
+        self.recycler.db.find_first_object_by.return_value = None
+
+        metrics = self.recycler.recycle()
+        self.assertEqual((metrics["recycled"], metrics["failed"]), (1, 0))
+        self.assertFalse(self.recycler.expr_manager.recycle_expr.called)
+
+    def test_skip_if_recycled_by_another_process(self):
+        with open(self.checkpoint_file, "w") as f:
+            json.dump({"pending": [5], "recycled": [], "failed": [], "last_metrics": None}, f)
+
+        with open(self.checkpoint_file + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self.assertIsNone(self.recycler.recycle())
+
+        self.assertFalse(self.find_expired.called)
+        self.assertEqual(self.__read_checkpoint()["pending"], [5])
+        # lock released, the pending experiment is recycled in the next run
+        self.assertEqual(self.recycler.recycle()["recycled"], 1)
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("../src/hackathon")
+import time
+import threading
+import unittest
+import Queue
+from mock import Mock
+
+from hackathon import app
+from hackathon.expr.expr_starter import ExprStarter
+
+
+class ExprStarterTest(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.starter = ExprStarter()
+        self.roll_back = Mock()
+        self.starter._ExprStarter__roll_back_unit = self.roll_back
+
+    def test_start_concurrently(self):
+        def start_unit(hackathon_id, expr_id, docker_host_id, dic):
+            time.sleep(0.5)
+            return dic["id"], None
+
+        self.starter._ExprStarter__start_unit = start_unit
+        start = time.time()
+        self.starter.start_units(Mock(id=1), Mock(id=2), [{"id": i} for i in range(4)])
+        self.assertLess(time.time() - start, 1.5)
+        self.assertFalse(self.roll_back.called)
+
+    def test_roll_back_every_unit(self):
+        error = Exception("container_ret is none")
+        results = {0: (10, None), 1: (11, error), 2: (None, error)}
+        self.starter._ExprStarter__start_unit = lambda hackathon_id, expr_id, host_id, dic: results[dic["id"]]
+
+        self.assertRaises(Exception, self.starter.start_units, Mock(id=1), Mock(id=2), [{"id": i} for i in range(3)])
+        rolled_back = sorted(c[0][2] for c in self.roll_back.call_args_list)
+        self.assertEqual(rolled_back, [10, 11])
+
+    def test_start_units_on_one_host(self):
+        hosts = []
+
+        def start_unit(hackathon_id, expr_id, docker_host_id, dic):
+            hosts.append(docker_host_id)
+            return dic["id"], None
+
+        self.starter._ExprStarter__start_unit = start_unit
+        self.starter.docker_host_manager = Mock()
+        self.starter.docker_host_manager.get_available_docker_host.return_value = Mock(id=5)
+        hackathon = Mock(id=1)
+        hackathon.is_alauda_enabled.return_value = False
+
+        self.starter.start_units(hackathon, Mock(id=2), [{"id": i} for i in range(3)])
+        self.starter.docker_host_manager.get_available_docker_host.assert_called_once_with(3, hackathon)
+        self.assertEqual(hosts, [5, 5, 5])
+
+    def test_queue_position(self):
+        self.starter.queue = Queue.Queue(2)
+        self.starter.workers = [Mock()]
+        self.starter.workers[0].is_alive.return_value = True
+        self.starter.util = Mock()
+        self.starter.util.safe_get_config.return_value = 1
+
+        self.assertTrue(self.starter.submit(1, Mock()))
+        self.assertTrue(self.starter.submit(2, Mock()))
+        self.assertFalse(self.starter.submit(3, Mock()))
+        self.assertEqual(self.starter.get_queue_position(1), 1)
+        self.assertEqual(self.starter.get_queue_position(2), 2)
+        self.assertIsNone(self.starter.get_queue_position(3))
+
+    def test_run_queued_jobs(self):
+        done = threading.Event()
+        self.starter.db = Mock()
+        self.assertTrue(self.starter.submit(1, done.set))
+        self.assertTrue(done.wait(5))
+        self.assertIsNone(self.starter.get_queue_position(1))
+
+    def test_owns_queued_and_starting(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def job():
+            started.set()
+            release.wait(5)
+
+        self.starter.db = Mock()
+        self.assertFalse(self.starter.owns(1))
+        self.assertTrue(self.starter.submit(1, job))
+        self.assertTrue(started.wait(5))
+        self.assertTrue(self.starter.owns(1))
+        release.set()
+        for i in range(50):
+            if not self.starter.owns(1):
+                break
+            time.sleep(0.1)
+        self.assertFalse(self.starter.owns(1))
+
+    def test_renew_leases_of_owned(self):
+        self.starter.db = Mock()
+        update = self.starter.db.session.return_value.query.return_value.filter.return_value.update
+        update.return_value = 2
+        self.starter.waiting = [1]
+        self.starter.starting = {2: 1}
+
+        self.assertEqual(self.starter.renew_leases(), 2)
+        self.assertEqual(update.call_count, 1)
+        self.assertTrue(self.starter.db.commit.called)
+
+    def test_renew_nothing_if_not_owned(self):
+        self.starter.db = Mock()
+        self.assertEqual(self.starter.renew_leases(), 0)
+        self.assertFalse(self.starter.db.session.called)
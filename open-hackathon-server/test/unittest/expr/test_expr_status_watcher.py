@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("../src/hackathon")
+import time
+import threading
+import unittest
+
+from hackathon import app
+from hackathon.expr.expr_status_watcher import ExprStatusWatcher
+
+
+class ExprStatusWatcherTest(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.watcher = ExprStatusWatcher()
+
+    def test_etag_of_content(self):
+        etag, report = self.watcher.put(1, {"expr_id": 1, "status": 2}, self.watcher.reports.version)
+        self.assertEqual(self.watcher.get(1), (etag, report))
+
+        other = ExprStatusWatcher()
+        self.assertEqual(other.put(1, {"status": 2, "expr_id": 1}, other.reports.version)[0], etag)
+        self.assertNotEqual(other.put(1, {"status": 3, "expr_id": 1}, other.reports.version)[0], etag)
+
+    def test_notify_drops_report(self):
+        self.watcher.put(1, {"status": 1}, self.watcher.reports.version)
+        self.watcher.notify(1)
+        self.assertIsNone(self.watcher.get(1))
+
+    def test_stale_report_not_cached(self):
+        version = self.watcher.reports.version
+        self.watcher.notify(1)
+        self.watcher.put(1, {"status": 1}, version)
+        self.assertIsNone(self.watcher.get(1))
+
+    def test_wait_notified(self):
+        threading.Timer(0.2, self.watcher.notify, [1]).start()
+        start = time.time()
+        self.assertTrue(self.watcher.wait(1, 5))
+        self.assertLess(time.time() - start, 2)
+        self.assertEqual(self.watcher.waiters, {})
+
+    def test_wait_timeout(self):
+        threading.Timer(0.1, self.watcher.notify, [2]).start()
+        self.assertFalse(self.watcher.wait(1, 0.5))
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+
+import sys
+
+sys.path.append("../src/hackathon")
+import datetime
+import unittest
+from mock import Mock
+
+from hackathon import app
+from hackathon.expr.heart_beat_buffer import HeartBeatBuffer
+
+
+class HeartBeatBufferTest(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.buffer = HeartBeatBuffer()
+        self.buffer.db = Mock()
+        self.query = self.buffer.db.session.return_value.query.return_value.filter.return_value
+
+    def test_keep_latest_beat(self):
+        now = datetime.datetime.utcnow()
+        self.buffer.beat(1, now)
+        self.buffer.beat(1, now - datetime.timedelta(seconds=10))
+        self.assertEqual(self.buffer.get(1), now)
+        self.assertFalse(self.buffer.db.session.called)
+
+    def test_flush_in_one_update(self):
+        now = datetime.datetime.utcnow()
+        self.buffer.beats = {1: now, 2: now}
+        self.query.update.return_value = 2
+
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(self.query.update.call_count, 1)
+        self.buffer.db.commit.assert_called_once_with()
+        self.assertIsNone(self.buffer.get(1))
+
+    def test_flush_empty_buffer(self):
+        self.assertEqual(self.buffer.flush(), 0)
+        self.assertFalse(self.buffer.db.session.called)
+
+    def test_keep_beats_if_flush_failed(self):
+        now = datetime.datetime.utcnow()
+        self.buffer.beats = {1: now}
+        self.query.update.side_effect = Exception("db error")
+
+        self.assertEqual(self.buffer.flush(), 0)
+        self.buffer.db.rollback.assert_called_once_with()
+        self.assertEqual(self.buffer.get(1), now)
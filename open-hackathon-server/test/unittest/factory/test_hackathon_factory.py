@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("../src/hackathon")
+import unittest
+import threading
+
+from hackathon.hackathon_factory import HackathonFactory, Scope
+
+
+class Counted(object):
+    created = 0
+
+    def __init__(self):
+        Counted.created += 1
+
+
+class HackathonFactoryTest(unittest.TestCase):
+    def setUp(self):
+        Counted.created = 0
+        self.factory = HackathonFactory()
+
+    def test_singleton_is_default_scope(self):
+        self.factory.provide("counted", Counted)
+        first = self.factory["counted"]
+        self.assertIs(first, self.factory["counted"])
+        self.assertEqual(1, Counted.created)
+
+    def test_transient_creates_new_instance(self):
+        self.factory.provide("counted", Counted, scope=Scope.TRANSIENT)
+        self.assertIsNot(self.factory["counted"], self.factory["counted"])
+        self.assertEqual(2, Counted.created)
+
+    def test_thread_scope(self):
+        self.factory.provide("counted", Counted, scope=Scope.THREAD)
+        main = self.factory["counted"]
+        self.assertIs(main, self.factory["counted"])
+
+        others = []
+        t = threading.Thread(target=lambda: others.append(self.factory["counted"]))
+        t.start()
+        t.join()
+        self.assertIsNot(main, others[0])
+        self.assertEqual(2, Counted.created)
+
+    def test_request_scope_falls_back_to_thread_outside_request(self):
+        self.factory.provide("counted", Counted, scope=Scope.REQUEST)
+        self.assertIs(self.factory["counted"], self.factory["counted"])
+        self.assertEqual(1, Counted.created)
+
+    def test_singleton_created_once_under_contention(self):
+        self.factory.provide("counted", Counted)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.factory["counted"])) for i in range(20)]
+        map(lambda t: t.start(), threads)
+        map(lambda t: t.join(), threads)
+        self.assertEqual(1, Counted.created)
+        self.assertEqual(1, len(set(map(id, results))))
+
+    def test_init_args_are_passed(self):
+        self.factory.provide("dict", dict, a=1, scope=Scope.TRANSIENT)
+        self.assertEqual({"a": 1}, self.factory["dict"])
+
+    def test_unknown_feature(self):
+        self.assertRaises(KeyError, lambda: self.factory["unknown"])
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("../src/hackathon")
+import json
+import unittest
+from mock import Mock
+from flask import g
+
+from hackathon import app
+from hackathon.constants import HACKATHON_BASIC_INFO, HTTP_HEADER
+from hackathon.hack.hackathon_manager import HackathonManager
+
+
+class HackathonManagerTest(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.manager = HackathonManager()
+        self.manager.db = Mock()
+
+    def test_recyclable_hackathons_online_only(self):
+        self.manager.get_recyclable_hackathon_list()
+        criterion = [str(c) for c in self.manager.db.find_all_objects.call_args[0][1:]]
+        self.assertEqual(sorted(criterion), ["hackathon.archive_time IS NULL",
+                                             "hackathon.recycle_enabled = :recycle_enabled_1",
+                                             "hackathon.status = :status_1"])
+
+    def test_update_items_sync_setting_columns(self):
+        hackathon = Mock()
+        hackathon.dic.return_value = {"id": 1, "display_name": "old", "recycle_enabled": 0}
+        basic_info = {HACKATHON_BASIC_INFO.RECYCLE_ENABLED: 1, HACKATHON_BASIC_INFO.RECYCLE_MINUTES: 30}
+        args = {"id": 2, "display_name": "new", "recycle_enabled": 0, "basic_info": basic_info}
+
+        items = self.manager._HackathonManager__parse_update_items(args, hackathon)
+        self.assertNotIn("id", items)
+        self.assertEqual(items["display_name"], "new")
+        self.assertEqual(json.loads(items["basic_info"]), basic_info)
+        self.assertEqual(items["recycle_enabled"], 1)
+        self.assertEqual(items["recycle_minutes"], 30)
+        self.assertEqual(items["pre_allocate_number"], 1)
+        self.assertIn("update_time", items)
+
+    def test_setting_columns_not_updated_alone(self):
+        hackathon = Mock()
+        hackathon.dic.return_value = {"id": 1, "recycle_enabled": 0, "pre_allocate_number": 1}
+        items = self.manager._HackathonManager__parse_update_items({"recycle_enabled": 1, "pre_allocate_number": 5},
+                                                                   hackathon)
+        self.assertNotIn("recycle_enabled", items)
+        self.assertNotIn("pre_allocate_number", items)
+
+
+class HackathonNameCacheTest(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.manager = HackathonManager()
+        self.manager.db = Mock()
+        self.row = Mock(id=1)
+        self.manager.db.find_first_object_by.return_value = self.row
+        self.manager.db.snapshot.side_effect = lambda h: ("snapshot", h.id)
+        self.manager.db.attach.side_effect = lambda s: ("attached", s[1])
+
+    def __validate(self, name="h1"):
+        with app.test_request_context('/', headers={HTTP_HEADER.HACKATHON_NAME: name}):
+            if self.manager.validate_hackathon_name():
+                return g.hackathon
+            return None
+
+    def test_cache_hit_attaches_snapshot(self):
+        self.assertEqual(self.__validate(), self.row)
+        self.assertEqual(self.__validate(), ("attached", 1))
+        self.assertEqual(self.__validate(), ("attached", 1))
+        self.assertEqual(self.manager.db.find_first_object_by.call_count, 1)
+
+    def test_hackathon_not_found_not_cached(self):
+        self.manager.db.find_first_object_by.return_value = None
+        self.assertIsNone(self.__validate())
+        self.assertIsNone(self.__validate())
+        self.assertEqual(self.manager.db.find_first_object_by.call_count, 2)
+
+    def test_update_invalidates_cache(self):
+        self.__validate()
+        query = self.manager.db.session.return_value.query.return_value
+        query.populate_existing.return_value.filter.return_value.first.return_value = self.row
+        self.manager._HackathonManager__parse_update_items = Mock(return_value={"display_name": "new"})
+
+        with app.test_request_context('/'):
+            g.hackathon = Mock(id=1)
+            self.manager.update_hackathon({"id": 1})
+        self.__validate()
+        self.assertEqual(self.manager.db.find_first_object_by.call_count, 2)
+
+    def test_create_invalidates_cache(self):
+        self.__validate()
+        self.manager.db.find_first_object_by.return_value = None
+        self.manager._HackathonManager__create_hackathon = Mock()
+        self.manager._HackathonManager__test_data = Mock()
+
+        context = Mock()
+        context.name = "h2"
+        self.manager.create_new_hackathon(context)
+        self.manager.db.find_first_object_by.return_value = self.row
+        self.assertEqual(self.__validate(), self.row)
+
+    def test_snapshot_loaded_during_update_not_cached(self):
+        def find_while_updating(*args, **kwargs):
+            self.manager._HackathonManager__invalidate_hackathon_cache()
+            return self.row
+
+        self.manager.db.find_first_object_by.side_effect = find_while_updating
+        self.__validate()
+        self.__validate()
+        self.assertEqual(self.manager.db.find_first_object_by.call_count, 2)
+
+
+class UpdateHackathonTest(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.manager = HackathonManager()
+        self.manager.db = Mock()
+        self.query = self.manager.db.session.return_value.query.return_value.populate_existing.return_value
+        self.fresh = Mock(id=1)
+        self.query.filter.return_value.first.return_value = self.fresh
+        self.parse = self.manager._HackathonManager__parse_update_items = Mock(return_value={"display_name": "new"})
+
+    def test_update_fresh_row(self):
+        cached = Mock(id=1)
+        with app.test_request_context('/'):
+            g.hackathon = cached
+            self.manager.update_hackathon({"display_name": "new"})
+
+        # the diff and the write are against the row loaded from DB rather than the cached snapshot
+        self.assertIs(self.parse.call_args[0][1], self.fresh)
+        self.manager.db.update_object.assert_called_once_with(self.fresh, display_name="new")
+        self.assertEqual(str(self.query.filter.call_args[0][0]), "hackathon.id = :id_1")
+
+    def test_update_deleted_hackathon(self):
+        self.query.filter.return_value.first.return_value = None
+        with app.test_request_context('/'):
+            g.hackathon = Mock(id=1)
+            result = self.manager.update_hackathon({"display_name": "new"})
+
+        self.assertEqual(result["error"]["code"], 404)
+        self.assertFalse(self.manager.db.update_object.called)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("../src/hackathon")
+import json
+import unittest
+from datetime import datetime
+from mock import Mock
+
+from hackathon import app
+from hackathon.constants import HACKATHON_BASIC_INFO
+from hackathon.hack.hackathon_manager import HackathonManager
+from hackathon.hack.hackathon_settings import HackathonSettings
+
+
+def get_property(basic_info, key, default=None):
+    """How the flag helpers of HackathonManager read basic_info before HackathonSettings"""
+    try:
+        return json.loads(basic_info).get(key, default)
+    except Exception:
+        return default
+
+
+def value_or(basic_info, key, default):
+    value = get_property(basic_info, key)
+    return value if value is not None else default
+
+
+BASIC_INFOS = [
+    "{}",
+    json.dumps({HACKATHON_BASIC_INFO.AUTO_APPROVE: 1,
+                HACKATHON_BASIC_INFO.ALAUDA_ENABLED: 1,
+                HACKATHON_BASIC_INFO.RECYCLE_ENABLED: 1,
+                HACKATHON_BASIC_INFO.RECYCLE_MINUTES: 30,
+                HACKATHON_BASIC_INFO.PRE_ALLOCATE_ENABLED: 1,
+                HACKATHON_BASIC_INFO.PRE_ALLOCATE_NUMBER: 3}),
+    json.dumps({HACKATHON_BASIC_INFO.AUTO_APPROVE: 0,
+                HACKATHON_BASIC_INFO.RECYCLE_ENABLED: 0,
+                HACKATHON_BASIC_INFO.PRE_ALLOCATE_ENABLED: 0,
+                HACKATHON_BASIC_INFO.PRE_ALLOCATE_NUMBER: None}),
+]
+
+
+class HackathonSettingsTest(unittest.TestCase):
+    def test_same_as_flag_helpers(self):
+        for basic_info in BASIC_INFOS:
+            settings = HackathonSettings.parse(basic_info)
+            self.assertEqual(settings.auto_approve, get_property(basic_info, HACKATHON_BASIC_INFO.AUTO_APPROVE) == 1)
+            self.assertEqual(settings.alauda_enabled, value_or(basic_info, HACKATHON_BASIC_INFO.ALAUDA_ENABLED, False))
+            self.assertEqual(settings.recycle_enabled,
+                             value_or(basic_info, HACKATHON_BASIC_INFO.RECYCLE_ENABLED, False) or False)
+            self.assertEqual(settings.recycle_minutes, value_or(basic_info, HACKATHON_BASIC_INFO.RECYCLE_MINUTES, 60))
+            self.assertEqual(settings.pre_allocate_enabled,
+                             get_property(basic_info, HACKATHON_BASIC_INFO.PRE_ALLOCATE_ENABLED) == 1)
+            self.assertEqual(settings.pre_allocate_number,
+                             value_or(basic_info, HACKATHON_BASIC_INFO.PRE_ALLOCATE_NUMBER, 1))
+
+    def test_invalid_basic_info(self):
+        self.assertRaises(ValueError, HackathonSettings.parse, "not json")
+        self.assertRaises(ValueError, HackathonSettings.parse, "[1]")
+        self.assertFalse(HackathonSettings.parse(None).recycle_enabled)
+
+    def test_columns(self):
+        columns = HackathonSettings.parse(BASIC_INFOS[1]).to_columns()
+        self.assertEqual(sorted(columns.keys()), sorted(HackathonSettings.COLUMNS))
+        self.assertEqual(columns["recycle_enabled"], 1)
+        self.assertEqual(columns["pre_allocate_number"], 3)
+
+
+class HackathonSettingsCacheTest(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.manager = HackathonManager()
+
+    def test_parsed_once(self):
+        hackathon = Mock(id=1, basic_info=BASIC_INFOS[1], update_time=datetime(2016, 1, 1))
+        settings = self.manager.get_hackathon_settings(hackathon)
+        self.assertIs(self.manager.get_hackathon_settings(hackathon), settings)
+
+    def test_updated_in_the_same_second(self):
+        update_time = datetime(2016, 1, 1)
+        hackathon = Mock(id=1, basic_info=BASIC_INFOS[1], update_time=update_time)
+        self.assertTrue(self.manager.get_hackathon_settings(hackathon).recycle_enabled)
+
+        hackathon = Mock(id=1, basic_info=BASIC_INFOS[2], update_time=update_time)
+        self.assertFalse(self.manager.get_hackathon_settings(hackathon).recycle_enabled)
+
+    def test_default_settings_if_invalid(self):
+        hackathon = Mock(id=1, basic_info="not json", update_time=None)
+        self.assertEqual(self.manager.get_hackathon_settings(hackathon).pre_allocate_number, 1)
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#  
+# The MIT License (MIT)
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#  
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#  
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("../src/hackathon")
+import time
+import unittest
+from mock import Mock
+
+from hackathon import app
+from hackathon.constants import HEALTH_STATUS
+from hackathon.health import HealthSnapshot
+
+
+class HealthSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.snapshot = HealthSnapshot()
+        # no background refresh
+        self.snapshot.refresh_thread = Mock()
+        self.snapshot.refresh_thread.is_alive.return_value = True
+
+    def test_check_missing_items(self):
+        item = Mock()
+        item.report_health.return_value = {"status": HEALTH_STATUS.OK}
+        reports = self.snapshot.get({"mysql": item})
+        self.assertEqual(reports["mysql"][0], {"status": HEALTH_STATUS.OK})
+
+        # served from snapshot
+        self.snapshot.get({"mysql": item})
+        self.assertEqual(item.report_health.call_count, 1)
+
+    def test_item_timeout(self):
+        slow = Mock()
+        slow.report_health.side_effect = lambda: time.sleep(7) or {"status": HEALTH_STATUS.OK}
+        fast = Mock()
+        fast.report_health.return_value = {"status": HEALTH_STATUS.OK}
+
+        start = time.time()
+        reports = self.snapshot.get({"slow": slow, "fast": fast})
+        self.assertLess(time.time() - start, 6)
+        self.assertEqual(reports["slow"][0]["status"], HEALTH_STATUS.ERROR)
+        self.assertEqual(reports["fast"][0]["status"], HEALTH_STATUS.OK)
+
+        # still running, not checked again
+        self.snapshot.check({"slow": slow})
+        self.assertEqual(slow.report_health.call_count, 1)
+
+    def test_item_error(self):
+        item = Mock()
+        item.report_health.side_effect = Exception("connection refused")
+        reports = self.snapshot.get({"azure": item})
+        self.assertEqual(reports["azure"][0]["status"], HEALTH_STATUS.ERROR)
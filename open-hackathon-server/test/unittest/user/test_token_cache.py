@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("../src/hackathon")
+import unittest
+from datetime import datetime, timedelta
+from mock import Mock
+from flask import g
+
+from hackathon import app
+from hackathon.cache import TTLCache
+from hackathon.database.models import User, UserToken
+from hackathon.user.user_manager import UserManager
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TokenCacheTest(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.clock = Clock()
+        self.now = datetime(2015, 10, 1)
+
+        self.um = UserManager()
+        self.um.token_cache = TTLCache(max_size=100, ttl_seconds=300, timer=self.clock)
+        self.um.util = Mock()
+        self.um.util.get_now.side_effect = lambda: self.now + timedelta(seconds=self.clock.now - 1000)
+        self.um.db = Mock()
+        self.um.db.snapshot.side_effect = lambda user: User(id=user.id, name=user.name)
+        self.um.db.attach.side_effect = lambda snapshot: ("attached", snapshot.id)
+
+        self.user = User(id=1, name="u")
+        self.token = UserToken(token="t", user=self.user, expire_date=self.now + timedelta(seconds=60))
+        self.um.db.find_first_object_by.return_value = self.token
+
+    def __login(self, token="t"):
+        with app.test_request_context('/', headers={"token": token}):
+            if self.um.validate_login():
+                return g.user
+            return None
+
+    def test_cache_hit_returns_attached_user(self):
+        self.assertEqual(self.user, self.__login())
+        self.assertEqual(("attached", 1), self.__login())
+        self.assertEqual(1, self.um.db.find_first_object_by.call_count)
+
+    def test_logout_evicts_token(self):
+        self.__login()
+        self.um.logout(self.user)
+        self.um.db.find_first_object_by.return_value = None
+        self.assertIsNone(self.__login())
+
+    def test_invalidate_user_tokens(self):
+        self.__login()
+        self.um.invalidate_user_tokens(2)
+        self.assertEqual(("attached", 1), self.__login())
+
+        self.um.invalidate_user_tokens(1)
+        self.um.db.find_first_object_by.return_value = None
+        self.assertIsNone(self.__login())
+
+    def test_entry_never_outlives_token(self):
+        # the token expires in 60 seconds, earlier than the ttl of cache
+        self.__login()
+        self.clock.now += 59
+        self.assertEqual(("attached", 1), self.__login())
+
+        self.clock.now += 2
+        self.assertIsNone(self.__login())
+        self.assertEqual(2, self.um.db.find_first_object_by.call_count)
+
+    def test_expired_token_not_cached(self):
+        self.token.expire_date = self.now - timedelta(seconds=1)
+        self.assertIsNone(self.__login())
+        self.assertEqual(0, self.um.token_cache.stats()["size"])
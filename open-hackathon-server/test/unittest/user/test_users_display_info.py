@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+#
+# -----------------------------------------------------------------------------------
+# Copyright (c) Microsoft Open Technologies (Shanghai) Co. Ltd.  All rights reserved.
+#  
+# The MIT License (MIT)
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#  
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#  
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------------
+
+import sys
+
+sys.path.append("../src/hackathon")
+import unittest
+from mock import Mock
+
+from hackathon import app
+from hackathon.database.models import User, UserEmail, UserProfile
+from hackathon.user.user_manager import UserManager
+
+
+class UsersDisplayInfoTest(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.um = UserManager()
+        self.um.db = Mock()
+
+    def test_no_user(self):
+        self.assertEqual({}, self.um.users_display_info([None]))
+        self.assertEqual(0, self.um.db.find_all_objects.call_count)
+
+    def test_three_queries(self):
+        users = [User(id=1, name="a"), User(id=2, name="b")]
+        emails = [UserEmail(user_id=1, email="a@a.com"), UserEmail(user_id=1, email="a@b.com")]
+        profiles = [UserProfile(user_id=2, address="b")]
+        self.um.db.find_all_objects.side_effect = [users, emails, profiles]
+
+        ret = self.um.users_display_info([1, 2, 2, 3, None])
+
+        self.assertEqual(3, self.um.db.find_all_objects.call_count)
+        self.assertEqual([User, UserEmail, UserProfile],
+                         [c[0][0] for c in self.um.db.find_all_objects.call_args_list])
+        self.assertEqual([1, 2], sorted(ret.keys()))
+        self.assertEqual(["a@a.com", "a@b.com"], [e["email"] for e in ret[1]["email"]])
+        self.assertFalse("user_profile" in ret[1])
+        self.assertEqual([], ret[2]["email"])
+        self.assertEqual("b", ret[2]["user_profile"]["address"])